@@ -0,0 +1,371 @@
+import os
+import csv
+import glob
+import shutil
+import operator
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Format par défaut des fichiers intermédiaires du pipeline
+DEFAULT_ARTIFACT_FORMAT = 'parquet'
+
+# Opérateurs acceptés dans les filtres, au format de pyarrow : [(colonne, opérateur, valeur), ...]
+_FILTER_OPERATORS = {
+    '==': operator.eq,
+    '=': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge
+}
+
+
+def filter_mask(data, filters):
+    """
+    Évalue des filtres de la forme [(colonne, opérateur, valeur), ...] en un seul masque (ET logique).
+
+    Args:
+        data (pd.DataFrame): Données à filtrer.
+        filters (list): Filtres au format de `pd.read_parquet` ; opérateurs acceptés :
+                        ==, !=, <, <=, >, >=, in, not in.
+
+    Raises:
+        ValueError: Si un opérateur n'est pas supporté.
+
+    Returns:
+        pd.Series: Masque booléen des lignes satisfaisant tous les filtres.
+    """
+    mask = pd.Series(True, index=data.index)
+    for column, op, value in filters:
+        if op == 'in':
+            mask &= data[column].isin(value)
+        elif op == 'not in':
+            mask &= ~data[column].isin(value)
+        elif op in _FILTER_OPERATORS:
+            mask &= _FILTER_OPERATORS[op](data[column], value)
+        else:
+            raise ValueError(f"Opérateur de filtre non supporté : {op}")
+    return mask
+
+
+def filter_rows(data, filters):
+    """
+    Applique des filtres de la forme [(colonne, opérateur, valeur), ...] (tous combinés par un ET).
+
+    Args:
+        data (pd.DataFrame): Données à filtrer.
+        filters (list): Filtres au format de `pd.read_parquet` (voir `filter_mask`).
+
+    Raises:
+        ValueError: Si un opérateur n'est pas supporté.
+
+    Returns:
+        pd.DataFrame: Lignes satisfaisant tous les filtres.
+    """
+    if not filters:
+        return data
+    return data[filter_mask(data, filters)]
+
+
+########## Format Parquet ##########
+def _parquet_files(path):
+    """Liste les fichiers d'un artefact Parquet (un fichier unique, un répertoire de parts ou de partitions)."""
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, '**', '*.parquet'), recursive=True))
+    return [path]
+
+
+def _unify_schemas(schemas):
+    """Unifie les schémas des parts ; une colonne catégorielle dans une part et pas dans une autre est relue en valeurs."""
+    try:
+        return pa.unify_schemas(schemas, promote_options='permissive')
+    except (pa.ArrowTypeError, pa.ArrowInvalid):
+        schemas = [
+            pa.schema(
+                [f.with_type(f.type.value_type) if pa.types.is_dictionary(f.type) else f for f in schema],
+                metadata=schema.metadata
+            )
+            for schema in schemas
+        ]
+        return pa.unify_schemas(schemas, promote_options='permissive')
+
+
+def _parquet_dataset(path):
+    """Ouvre un artefact Parquet en unifiant les schémas des parts écrites bloc par bloc."""
+    files = _parquet_files(path)
+    schema = _unify_schemas([pq.read_schema(f) for f in files])
+    return ds.dataset(files, schema=schema, format='parquet')
+
+
+def _read_parquet(path, columns=None, filters=None, dtypes=None):
+    # Les types sont ceux des fichiers : `dtypes` n'est utile qu'aux formats sans types
+    if not os.path.isdir(path):
+        return pd.read_parquet(path, columns=columns, filters=filters)
+    expression = pq.filters_to_expression(filters) if filters else None
+    return _parquet_dataset(path).to_table(columns=columns, filter=expression).to_pandas()
+
+
+def _iter_parquet(path, chunksize, columns=None):
+    for batch in _parquet_dataset(path).to_batches(columns=columns, batch_size=chunksize):
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+
+def _write_parquet(data, path):
+    data.to_parquet(path, index=False)
+
+
+def _append_parquet(data, path):
+    # Chaque bloc ajouté devient une part du répertoire `path`
+    os.makedirs(path, exist_ok=True)
+    part = len(_parquet_files(path))
+    data.to_parquet(os.path.join(path, f"part-{part:05d}.parquet"), index=False)
+
+
+def _count_parquet(path):
+    return sum(pq.ParquetFile(f).metadata.num_rows for f in _parquet_files(path))
+
+
+class PartitionWriter:
+    """
+    Répartit des lignes entre plusieurs artefacts Parquet en gardant un fichier ouvert par partition.
+
+    Chaque bloc ajouté à une partition devient un groupe de lignes de son fichier, et non un
+    nouveau fichier : `n` partitions remplies par `k` blocs donnent `n` fichiers, et non `n × k`.
+    Un bloc dont le schéma ne peut pas être converti dans celui du fichier ouvert (ex: colonne
+    entière puis décimale dans un CSV lu par blocs) ouvre une nouvelle part de la partition.
+
+    Args:
+        paths (list): Chemins des artefacts de chaque partition (répertoires de parts).
+    """
+
+    def __init__(self, paths):
+        self.paths = list(paths)
+        self._writers = {}
+        self._parts = {}
+
+    def write(self, partition, data):
+        """
+        Ajoute un bloc de lignes à une partition.
+
+        Args:
+            partition (int): Numéro de la partition.
+            data (pd.DataFrame): Lignes à ajouter.
+
+        Returns:
+            None
+        """
+        table = pa.Table.from_pandas(data, preserve_index=False)
+        writer = self._writers.get(partition)
+        if writer is not None and not table.schema.equals(writer.schema):
+            try:
+                table = table.cast(writer.schema)
+            except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError, ValueError):
+                writer.close()
+                writer = None
+        if writer is None:
+            part = self._parts.get(partition, 0)
+            self._parts[partition] = part + 1
+            os.makedirs(self.paths[partition], exist_ok=True)
+            writer = pq.ParquetWriter(os.path.join(self.paths[partition], f"part-{part:05d}.parquet"), table.schema)
+            self._writers[partition] = writer
+        writer.write_table(table)
+
+    def close(self):
+        """Ferme les fichiers de toutes les partitions."""
+        writers, self._writers = self._writers, {}
+        for writer in writers.values():
+            writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+########## Format CSV ##########
+def _read_csv(path, columns=None, filters=None, dtypes=None):
+    # Les colonnes des filtres sont lues même si elles ne sont pas demandées, puis écartées
+    usecols = columns
+    if columns is not None and filters:
+        usecols = list(dict.fromkeys(list(columns) + [column for column, _, _ in filters]))
+    data = filter_rows(pd.read_csv(path, usecols=usecols, dtype=dtypes), filters)
+    return data if usecols is columns else data[list(columns)]
+
+
+def _iter_csv(path, chunksize, columns=None):
+    yield from pd.read_csv(path, usecols=columns, chunksize=chunksize)
+
+
+def _write_csv(data, path):
+    data.to_csv(path, index=False)
+
+
+def _append_csv(data, path):
+    data.to_csv(path, mode='a', header=not os.path.exists(path), index=False)
+
+
+def _count_csv(path):
+    # Comptage des enregistrements par le lecteur CSV, sans construire de DataFrame : un champ entre
+    # guillemets peut contenir des fins de ligne, et la dernière ligne peut ne pas en avoir.
+    # Les lignes vides sont ignorées, comme par `pd.read_csv` ; l'en-tête est exclu.
+    with open(path, newline='', encoding='utf-8') as f:
+        return max(0, sum(1 for row in csv.reader(f) if row) - 1)
+
+
+# Registre des formats, indexé par extension de fichier
+ARTIFACT_FORMATS = {
+    'parquet': {
+        'read': _read_parquet, 'iter': _iter_parquet, 'write': _write_parquet,
+        'append': _append_parquet, 'count': _count_parquet
+    },
+    'csv': {
+        'read': _read_csv, 'iter': _iter_csv, 'write': _write_csv,
+        'append': _append_csv, 'count': _count_csv
+    }
+}
+
+
+def register_artifact_format(extension, read, write, iterate=None, append=None, count=None):
+    """
+    Enregistre un nouveau format d'artefact.
+
+    Args:
+        extension (str): Extension des fichiers de ce format (ex: 'feather').
+        read (callable): read(path, columns=None, filters=None, dtypes=None) -> pd.DataFrame.
+        write (callable): write(data, path) -> None.
+        iterate (callable, optional): iterate(path, chunksize, columns=None) -> itérateur de blocs.
+        append (callable, optional): append(data, path) -> None.
+        count (callable, optional): count(path) -> nombre de lignes.
+
+    Returns:
+        None
+    """
+    ARTIFACT_FORMATS[extension.lstrip('.').lower()] = {
+        'read': read, 'iter': iterate, 'write': write, 'append': append, 'count': count
+    }
+
+
+def _format_handler(path, action):
+    """Renvoie la fonction `action` du format correspondant à l'extension de `path`."""
+    extension = os.path.splitext(os.path.normpath(path))[1].lstrip('.').lower()
+    if extension not in ARTIFACT_FORMATS:
+        raise ValueError(f"Format d'artefact inconnu pour {path}. Formats disponibles : {list(ARTIFACT_FORMATS)}")
+    handler = ARTIFACT_FORMATS[extension][action]
+    if handler is None:
+        raise ValueError(f"Le format '{extension}' ne supporte pas l'opération '{action}'.")
+    return handler
+
+
+def artifact_path(directory, name, fmt=DEFAULT_ARTIFACT_FORMAT):
+    """
+    Construit le chemin d'un artefact.
+
+    Args:
+        directory (str): Répertoire de l'artefact.
+        name (str): Nom de l'artefact sans extension (ex: 'scored_data').
+        fmt (str): Format de l'artefact ('parquet' par défaut, ou 'csv').
+
+    Returns:
+        str: Chemin de l'artefact.
+    """
+    return os.path.join(directory, f"{name}.{fmt}")
+
+
+def read_artifact(path, columns=None, filters=None, dtypes=None):
+    """
+    Charge un artefact en ne lisant que les colonnes et les lignes nécessaires.
+
+    Pour Parquet, la projection et les filtres sont poussés dans la lecture : les colonnes
+    non demandées ne sont pas lues et les groupes de lignes exclus par les statistiques
+    du fichier sont ignorés. Pour CSV, les filtres sont appliqués après lecture.
+
+    Args:
+        path (str): Chemin de l'artefact (le format est déduit de l'extension).
+        columns (list, optional): Colonnes à charger. Par défaut, toutes.
+        filters (list, optional): Filtres [(colonne, opérateur, valeur), ...] combinés par un ET.
+        dtypes (dict, optional): Types des colonnes à la lecture, pour les formats qui ne stockent
+                                 pas les types (CSV) ; ignoré pour Parquet.
+
+    Returns:
+        pd.DataFrame: Données chargées.
+    """
+    return _format_handler(path, 'read')(path, columns=columns, filters=filters, dtypes=dtypes)
+
+
+def iter_artifact(path, chunksize, columns=None):
+    """
+    Parcourt un artefact par blocs d'au plus `chunksize` lignes.
+
+    Args:
+        path (str): Chemin de l'artefact.
+        chunksize (int): Nombre de lignes par bloc.
+        columns (list, optional): Colonnes à charger. Par défaut, toutes.
+
+    Returns:
+        iterator: Blocs de données (pd.DataFrame).
+    """
+    return _format_handler(path, 'iter')(path, chunksize, columns=columns)
+
+
+def write_artifact(data, path):
+    """
+    Sauvegarde un artefact dans le format correspondant à l'extension de `path`.
+
+    Args:
+        data (pd.DataFrame): Données à sauvegarder.
+        path (str): Chemin de l'artefact.
+
+    Returns:
+        None
+    """
+    remove_artifact(path)
+    _format_handler(path, 'write')(data, path)
+
+
+def append_artifact(data, path):
+    """
+    Ajoute un bloc de lignes à un artefact (création si nécessaire).
+
+    Args:
+        data (pd.DataFrame): Bloc à ajouter, avec les mêmes colonnes que les blocs précédents.
+        path (str): Chemin de l'artefact.
+
+    Returns:
+        None
+    """
+    _format_handler(path, 'append')(data, path)
+
+
+def count_artifact_rows(path):
+    """
+    Compte les lignes d'un artefact sans le charger (métadonnées Parquet ou fins de ligne CSV).
+
+    Args:
+        path (str): Chemin de l'artefact.
+
+    Returns:
+        int: Nombre de lignes.
+    """
+    return _format_handler(path, 'count')(path)
+
+
+def remove_artifact(path):
+    """
+    Supprime un artefact s'il existe (fichier unique ou répertoire de parts).
+
+    Args:
+        path (str): Chemin de l'artefact.
+
+    Returns:
+        None
+    """
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
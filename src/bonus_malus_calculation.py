@@ -1,113 +1,328 @@
+import operator
+import numpy as np
 import pandas as pd
+import dask
 import dask.dataframe as dd
 import os
+from src.artifact_store import read_artifact, write_artifact
+from src.transactions_store import read_manifest, read_transactions, select_files, transactions_date_range
+
+# Colonnes des transactions utiles au calcul des soldes (les autres ne sont pas lues)
+TRANSACTION_COLUMNS = ['transaction_date', 'nameOrig', 'newbalanceOrig', 'nameDest', 'newbalanceDest']
+
+# Moteurs de calcul disponibles pour le traitement des transactions
+TRANSACTION_BACKENDS = ('pandas', 'dask')
+
+# Jour du premier relevé de solde du mois (le second est le dernier jour du mois)
+SNAPSHOT_DAY = 15
+
+# Crédits mis à jour avec le bonus/malus
+LOAN_COLUMNS = ['Nano_Loan', 'Advanced_Credit', 'Macro_Loan', 'Cash_Roller_Over']
+
+# Bornes (min, max) des crédits, par ordre de priorité : le plafond d'un client est celui du
+# premier crédit renseigné
+LOAN_BOUNDS_TABLE = [
+    {'column': 'Nano_Loan', 'bounds': (20, 45)},
+    {'column': 'Macro_Loan', 'bounds': (25, 250)},
+    {'column': 'Advanced_Credit', 'bounds': (100, 500)},
+    {'column': 'Cash_Roller_Over', 'bounds': (100, 500)}
+]
+
+# Bornes d'un client sans aucun crédit
+DEFAULT_LOAN_BOUNDS = (0, 0)
+
+# Règles de remboursement, testées dans l'ordre : conditions [(colonne, opérateur, valeur), ...]
+# combinées par un OU ('any') ou un ET ('all'), et ajustement en % du plafond de crédit
+REPAYMENT_RULES = [
+    {
+        'label': "Strong ability to borrow",
+        'any': [('Balance_First', '<=', 0), ('Balance_Second', '<=', 0)],
+        'adjustment_pct': 20
+    },
+    {
+        'label': "Strong repayment capacity",
+        'all': [('Balance_First', '>', 0), ('Balance_Second', '>', 0)],
+        'adjustment_pct': -20
+    },
+    {
+        'label': "Ability to borrow",
+        'all': [('Balance_First', '>', 0), ('Balance_Second', '<=', 0)],
+        'adjustment_pct': 10
+    }
+]
+
+# Libellé et bonus/malus des clients qui ne satisfont aucune règle (ex: soldes manquants)
+DEFAULT_REPAYMENT = {'label': "Uncertain", 'bonus_malus': 0}
+
+# Opérateurs acceptés dans les conditions des règles
+_RULE_OPERATORS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge
+}
+
+
+def _is_csv(path):
+    return os.path.splitext(path)[1].lower() == '.csv'
+
+
+def snapshot_dates(reference_month):
+    """
+    Renvoie les dates des deux relevés de solde d'un mois : le 15 et le dernier jour du mois.
 
-import dask.dataframe as dd
+    Args:
+        reference_month (str or pd.Period): Mois de référence (ex: '2024-11').
 
-def process_transactions(input_file, output_file):
+    Returns:
+        list: [date du 15, date du dernier jour du mois] (pd.Timestamp).
     """
-    Traite les transactions pour calculer les soldes moyens au 15 et au dernier jour du mois précédent.
-    
+    month = pd.Period(reference_month, freq='M')
+    return [month.start_time + pd.Timedelta(days=SNAPSHOT_DAY - 1), month.end_time.normalize()]
+
+
+def last_complete_month(input_file):
+    """
+    Renvoie le dernier mois complet des transactions : le mois de la dernière transaction si elle
+    tombe le dernier jour du mois, sinon le mois précédent.
+
     Args:
-        input_file (str): Chemin du fichier CSV contenant les données brutes des transactions.
-        output_file (str): Chemin de sauvegarde du fichier résultant.
-        
+        input_file (str): Chemin des transactions brutes (la dernière date est lue dans le manifeste
+                          d'un entrepôt partitionné, sinon dans la colonne transaction_date).
+
     Returns:
-        None: Le fichier est sauvegardé dans le chemin spécifié.
+        pd.Period: Dernier mois complet.
     """
-    # Charger les données
-    transactions = dd.read_csv(input_file)
+    last_date = transactions_date_range(input_file)[1]
+    month = last_date.to_period('M')
+    return month if last_date.normalize() == month.end_time.normalize() else month - 1
 
-    # Conversion de la colonne `transaction_date` en format datetime
-    transactions['transaction_date'] = dd.to_datetime(transactions['transaction_date'])
 
-    # Ajouter des colonnes nécessaires
-    transactions['day_of_month'] = transactions['transaction_date'].dt.day
-    transactions['days_in_month'] = transactions['transaction_date'].dt.days_in_month
+def resolve_reference_month(input_file, reference_month=None):
+    """
+    Renvoie le mois de référence du calcul des bonus/malus.
 
-    # Créer des DataFrames pour nameOrig et nameDest
-    sim_numbers_orig = transactions[['nameOrig', 'transaction_date', 'newbalanceOrig']].rename(
-        columns={'nameOrig': 'SIM_NUMBER', 'newbalanceOrig': 'balance'}
-    )
-    sim_numbers_dest = transactions[['nameDest', 'transaction_date', 'newbalanceDest']].rename(
-        columns={'nameDest': 'SIM_NUMBER', 'newbalanceDest': 'balance'}
-    )
+    Args:
+        input_file (str): Chemin des transactions brutes.
+        reference_month (str or pd.Period, optional): Mois de référence (ex: '2024-11').
+                                                      Par défaut, le dernier mois complet des transactions.
 
-    # Fusionner les deux DataFrames pour obtenir une vue complète
-    transactions_with_sims = dd.concat([sim_numbers_orig, sim_numbers_dest], axis=0)
+    Returns:
+        pd.Period: Mois de référence.
+    """
+    if reference_month is None:
+        return last_complete_month(input_file)
+    return pd.Period(reference_month, freq='M')
+
+
+def _month_bounds(reference_month):
+    """Début (inclus) et fin (exclue) du mois de référence."""
+    month = pd.Period(reference_month, freq='M')
+    return month.start_time, (month + 1).start_time
+
+
+def _month_filters(reference_month):
+    """Filtres de lecture limitant les transactions au mois de référence."""
+    start, end = _month_bounds(reference_month)
+    return [('transaction_date', '>=', start), ('transaction_date', '<', end)]
 
-    # Filtrer uniquement les transactions pour les dates du 15 et du dernier jour du mois
-    transactions_with_sims['day_of_month'] = transactions_with_sims['transaction_date'].dt.day
-    transactions_with_sims['days_in_month'] = transactions_with_sims['transaction_date'].dt.days_in_month
 
-    relevant_transactions = transactions_with_sims[
-        (transactions_with_sims['day_of_month'] == 15) |
-        (transactions_with_sims['day_of_month'] == transactions_with_sims['days_in_month'])
+def _is_snapshot_day(transaction_dates, dates):
+    """Indique les transactions datées de l'un des jours `dates`."""
+    return transaction_dates.dt.normalize().isin(dates)
+
+
+def _unpivot_balances(transactions):
+    """Empile les vues émetteur (nameOrig) et destinataire (nameDest) en (SIM_NUMBER, DATE_OF_THE_DAY, balance)."""
+    return [
+        transactions[[name, 'transaction_date', balance]].rename(columns={
+            name: 'SIM_NUMBER', 'transaction_date': 'DATE_OF_THE_DAY', balance: 'balance'
+        })
+        for name, balance in [('nameOrig', 'newbalanceOrig'), ('nameDest', 'newbalanceDest')]
     ]
 
-    # Ajouter la colonne DATE_OF_THE_DAY pour l'agrégation
-    relevant_transactions['DATE_OF_THE_DAY'] = relevant_transactions['transaction_date']
 
-    # Grouper par SIM_NUMBER et DATE_OF_THE_DAY, puis calculer la moyenne des soldes
-    result = relevant_transactions.groupby(['SIM_NUMBER', 'DATE_OF_THE_DAY'])['balance'].mean().reset_index()
+def _process_transactions_pandas(input_file, reference_month):
+    # Lecture des seules colonnes et lignes du mois utiles (partitions du mois seulement, filtres
+    # poussés dans la lecture Parquet), puis filtre des deux jours de relevé avant l'empilement des deux vues
+    transactions = read_transactions(input_file, TRANSACTION_COLUMNS, *_month_bounds(reference_month))
+    transactions = transactions[
+        _is_snapshot_day(transactions['transaction_date'], snapshot_dates(reference_month)).to_numpy()
+    ]
+    transactions['transaction_date'] = transactions['transaction_date'].dt.normalize()
 
-    # Sauvegarder les résultats
-    result.compute().to_csv(output_file, index=False)
+    balances = pd.concat(_unpivot_balances(transactions), ignore_index=True)
+    return balances.groupby(['SIM_NUMBER', 'DATE_OF_THE_DAY'], as_index=False)['balance'].mean()
 
 
-#process_transactions("/raw/real_transactions_with_dates.csv")
+def _process_transactions_dask(input_file, reference_month):
+    # Même calcul, par partitions : pour des transactions plus volumineuses que la mémoire.
+    # Les chaînes restent de type object, comme avec le moteur pandas.
+    with dask.config.set({'dataframe.convert-string': False}):
+        if _is_csv(input_file):
+            transactions = dd.read_csv(input_file, usecols=TRANSACTION_COLUMNS)
+        else:
+            files = input_file
+            if read_manifest(input_file) is not None:
+                # Entrepôt partitionné : seuls les fichiers du mois de référence sont lus
+                files = select_files(input_file, *_month_bounds(reference_month))
+                if not files:
+                    return pd.DataFrame(columns=['SIM_NUMBER', 'DATE_OF_THE_DAY', 'balance'])
+            transactions = dd.read_parquet(
+                files, columns=TRANSACTION_COLUMNS, filters=_month_filters(reference_month)
+            )
+        transactions['transaction_date'] = dd.to_datetime(transactions['transaction_date'])
+        transactions = transactions[
+            _is_snapshot_day(transactions['transaction_date'], snapshot_dates(reference_month))
+        ]
+        transactions['transaction_date'] = transactions['transaction_date'].dt.normalize()
+
+        balances = dd.concat(_unpivot_balances(transactions), axis=0)
+        result = balances.groupby(['SIM_NUMBER', 'DATE_OF_THE_DAY'])['balance'].mean().reset_index().compute()
+    return result.sort_values(['SIM_NUMBER', 'DATE_OF_THE_DAY'], ignore_index=True)
+
+
+def aggregate_transactions(input_file, reference_month=None, backend='pandas'):
+    """
+    Calcule les soldes moyens de chaque SIM aux deux relevés du mois de référence : le 15 et le
+    dernier jour du mois (28, 29, 30 ou 31).
 
+    Seules les colonnes utiles et les transactions du mois de référence sont lues (projection et
+    filtres poussés dans la lecture Parquet ; pour un entrepôt partitionné par mois, seules les
+    partitions du mois sont ouvertes, d'après le manifeste) ; les transactions sont filtrées sur les deux jours
+    de relevé avant l'empilement des vues émetteur et destinataire.
 
-def update_transactions(transactions_file, clients_file, output_file):
+    Args:
+        input_file (str): Chemin des transactions brutes (entrepôt partitionné ou fichier Parquet
+                          de préférence, ou CSV).
+        reference_month (str or pd.Period, optional): Mois de référence (ex: '2024-11').
+                                                      Par défaut, le dernier mois complet des transactions.
+        backend (str): 'pandas' (par défaut) pour un calcul en mémoire, ou 'dask' pour des
+                       transactions plus volumineuses que la mémoire.
+
+    Raises:
+        ValueError: Si le moteur de calcul est inconnu.
+
+    Returns:
+        pd.DataFrame: Soldes moyens (SIM_NUMBER, DATE_OF_THE_DAY, balance).
+    """
+    if backend not in TRANSACTION_BACKENDS:
+        raise ValueError(f"Moteur de calcul inconnu : {backend}. Moteurs disponibles : {list(TRANSACTION_BACKENDS)}")
+
+    reference_month = resolve_reference_month(input_file, reference_month)
+    if backend == 'dask':
+        return _process_transactions_dask(input_file, reference_month)
+    return _process_transactions_pandas(input_file, reference_month)
+
+
+def process_transactions(input_file, output_file, reference_month=None, backend='pandas'):
     """
-    Met à jour le fichier de transactions avec les SIM_NUMBER présents dans le fichier clients,
-    standardise les dates et calcule les moyennes des soldes.
+    Traite les transactions pour calculer les soldes moyens au 15 et au dernier jour du mois de référence.
 
     Args:
-        transactions_file (str): Chemin du fichier CSV des transactions.
-        clients_file (str): Chemin du fichier CSV des clients finaux.
+        input_file (str): Chemin des transactions brutes (Parquet de préférence, ou CSV).
         output_file (str): Chemin de sauvegarde du fichier résultant.
-        
+        reference_month (str or pd.Period, optional): Mois de référence (par défaut, le dernier mois complet).
+        backend (str): 'pandas' (par défaut) ou 'dask' (voir `aggregate_transactions`).
+
     Returns:
         None: Le fichier est sauvegardé dans le chemin spécifié.
     """
-    # Charger les données existantes
-    transactions_previous_month = pd.read_csv(transactions_file)
-    final_clients = pd.read_csv(clients_file)
+    write_artifact(aggregate_transactions(input_file, reference_month, backend=backend), output_file)
 
-    # Filtrer les transactions en fonction des SIM_NUMBER présents dans final_clients
-    transactions_previous_month = transactions_previous_month[
-        transactions_previous_month['SIM_NUMBER'].isin(final_clients['SIM_NUMBER'])
-    ]
 
-    # Convertir DATE_OF_THE_DAY en datetime pour manipuler les dates
-    transactions_previous_month['DATE_OF_THE_DAY'] = pd.to_datetime(transactions_previous_month['DATE_OF_THE_DAY'])
+#process_transactions("/raw/real_transactions_with_dates.csv")
 
-    # Ajouter une colonne fictive pour les dates standardisées (2024-11-15 et 2024-11-30)
-    transactions_previous_month['Standardized_Date'] = transactions_previous_month['DATE_OF_THE_DAY'].dt.day.map(
-        {15: '2024-11-15', 30: '2024-11-30'}
-    )
 
-    # Supprimer les valeurs manquantes dans la colonne 'balance'
-    transactions_previous_month = transactions_previous_month.dropna(subset=['balance'])
+def client_snapshot_balances(balances, sim_numbers):
+    """
+    Restreint les soldes des relevés aux SIM des clients finaux.
 
-    # Grouper par SIM_NUMBER et Standardized_Date, puis calculer la moyenne
-    transactions_previous_month = (
-        transactions_previous_month.groupby(['SIM_NUMBER', 'Standardized_Date'], as_index=False)['balance']
-        .mean()
-    )
+    Args:
+        balances (pd.DataFrame): Soldes (SIM_NUMBER, DATE_OF_THE_DAY, balance), voir `aggregate_transactions`.
+        sim_numbers (array-like): SIM des clients finaux.
 
-    # Renommer la colonne des dates standardisées pour conserver la structure demandée
-    transactions_previous_month.rename(columns={'Standardized_Date': 'DATE_OF_THE_DAY'}, inplace=True)
+    Returns:
+        pd.DataFrame: Soldes (SIM_NUMBER, DATE_OF_THE_DAY, balance) des clients finaux.
+    """
+    # Garder uniquement les transactions des SIM_NUMBER présents dans final_clients
+    transactions_previous_month = balances[balances['SIM_NUMBER'].isin(pd.Series(sim_numbers).dropna().unique())]
+
+    # Supprimer les valeurs manquantes dans la colonne 'balance'
+    transactions_previous_month = transactions_previous_month.dropna(subset=['balance']).reset_index(drop=True)
 
     # Convertir la colonne DATE_OF_THE_DAY en datetime pour uniformité
     transactions_previous_month['DATE_OF_THE_DAY'] = pd.to_datetime(transactions_previous_month['DATE_OF_THE_DAY'])
+    return transactions_previous_month
+
+
+def pivot_snapshot_balances(transactions_previous_month, reference_month=None):
+    """
+    Place les soldes des deux relevés du mois en colonnes : une ligne par SIM, avec
+    Balance_First (le 15) et Balance_Second (le dernier jour du mois).
+
+    Seules les lignes des deux dates de relevé du mois de référence sont gardées.
+
+    Args:
+        transactions_previous_month (pd.DataFrame): Soldes des relevés (voir `client_snapshot_balances`).
+        reference_month (str or pd.Period, optional): Mois de référence (ex: '2024-11'). Par défaut,
+                                                      le mois des soldes, qui ne doivent en couvrir qu'un.
+
+    Raises:
+        ValueError: Si `reference_month` n'est pas fourni et que les soldes couvrent plusieurs mois.
+
+    Returns:
+        pd.DataFrame: Soldes par SIM (SIM_NUMBER, Balance_First, Balance_Second).
+    """
+    dates = transactions_previous_month['DATE_OF_THE_DAY'].dt.normalize()
+    if reference_month is None:
+        months = dates.dt.to_period('M').dropna().unique()
+        if len(months) > 1:
+            raise ValueError(
+                f"Les soldes couvrent plusieurs mois ({', '.join(str(month) for month in sorted(months))}) : "
+                "précisez le mois de référence."
+            )
+        reference_month = months[0] if len(months) else None
+    if reference_month is not None:
+        transactions_previous_month = transactions_previous_month[dates.isin(snapshot_dates(reference_month))]
+
+    balance_columns = np.where(
+        transactions_previous_month['DATE_OF_THE_DAY'].dt.day == SNAPSHOT_DAY, 'Balance_First', 'Balance_Second'
+    )
+    return (
+        transactions_previous_month.assign(Balance=balance_columns)
+        .pivot(index='SIM_NUMBER', columns='Balance', values='balance')
+        .reindex(columns=['Balance_First', 'Balance_Second'])
+        .rename_axis(columns=None)
+        .reset_index()
+    )
+
+
+def update_transactions(transactions_file, clients_file, output_file):
+    """
+    Met à jour le fichier de transactions avec les SIM_NUMBER présents dans le fichier clients.
+
+    Args:
+        transactions_file (str): Chemin du fichier des transactions (Parquet ou CSV).
+        clients_file (str): Chemin du fichier des clients finaux (Parquet ou CSV).
+        output_file (str): Chemin de sauvegarde du fichier résultant.
+        
+    Returns:
+        None: Le fichier est sauvegardé dans le chemin spécifié.
+    """
+    # Charger uniquement les SIM_NUMBER des clients finaux
+    final_clients = read_artifact(clients_file, columns=['SIM_NUMBER'])
 
-    # Réinitialiser l'index pour finaliser
-    transactions_previous_month.reset_index(drop=True, inplace=True)
+    # Charger uniquement les transactions des SIM_NUMBER présents dans final_clients
+    transactions_previous_month = read_artifact(
+        transactions_file,
+        filters=[('SIM_NUMBER', 'in', final_clients['SIM_NUMBER'].dropna().unique().tolist())]
+    )
 
     # Sauvegarder le fichier mis à jour
-    transactions_previous_month.to_csv(output_file, index=False)
+    write_artifact(client_snapshot_balances(transactions_previous_month, final_clients['SIM_NUMBER']), output_file)
 
 
 
@@ -118,72 +333,115 @@ def update_transactions(transactions_file, clients_file, output_file):
 
 
 
+def _rule_mask(data, conditions, combine):
+    """Évalue des conditions [(colonne, opérateur, valeur), ...] combinées par `combine` (np.logical_and ou np.logical_or)."""
+    masks = [
+        _RULE_OPERATORS[op](data[column].to_numpy(dtype=np.float64), value)
+        for column, op, value in conditions
+    ]
+    return combine.reduce(masks) if masks else np.ones(len(data), dtype=bool)
+
+
+def max_loan_bounds(data, bounds_table=LOAN_BOUNDS_TABLE):
+    """
+    Renvoie le plafond de crédit de chaque client : celui du premier crédit renseigné dans l'ordre
+    de `bounds_table` (Nano, Macro, Advanced puis Cash Roller Over), 0 si aucun ne l'est.
+
+    Args:
+        data (pd.DataFrame): Clients avec leurs colonnes de crédits.
+        bounds_table (list): Bornes (min, max) par crédit, par ordre de priorité.
+
+    Returns:
+        np.ndarray: Plafond de crédit de chaque client.
+    """
+    present = [entry for entry in bounds_table if entry['column'] in data.columns]
+    return np.select(
+        [data[entry['column']].notna().to_numpy() for entry in present],
+        [float(entry['bounds'][1]) for entry in present],
+        default=float(DEFAULT_LOAN_BOUNDS[1])
+    )
+
+
+def evaluate_bonus_malus_rules(data, rules=REPAYMENT_RULES, bounds_table=LOAN_BOUNDS_TABLE):
+    """
+    Évalue la table des règles de remboursement sur tous les clients à la fois.
+
+    Les règles sont testées dans l'ordre : chaque client reçoit le libellé et l'ajustement de la
+    première règle satisfaite, sinon `DEFAULT_REPAYMENT`. L'ajustement est un pourcentage du
+    plafond de crédit (voir `max_loan_bounds`) ajouté à ce plafond. Un solde manquant ne
+    satisfait aucune condition.
+
+    Args:
+        data (pd.DataFrame): Clients avec 'Balance_First', 'Balance_Second' et leurs colonnes de crédits.
+        rules (list): Table des règles (voir `REPAYMENT_RULES`).
+        bounds_table (list): Bornes des crédits par ordre de priorité (voir `LOAN_BOUNDS_TABLE`).
+
+    Returns:
+        tuple: (Repayment_Label, Bonus_Malus) : libellés (pd.Categorical, catégories dans l'ordre
+               des règles) et montants des bonus/malus (np.ndarray).
+    """
+    max_loan = max_loan_bounds(data, bounds_table)
+    conditions = [
+        _rule_mask(data, rule['any'], np.logical_or) if 'any' in rule else _rule_mask(data, rule['all'], np.logical_and)
+        for rule in rules
+    ]
+
+    # Index de la première règle satisfaite (len(rules) pour la règle par défaut)
+    rule_index = np.select(conditions, np.arange(len(rules)), default=len(rules))
+    labels = pd.Categorical.from_codes(
+        rule_index, categories=[rule['label'] for rule in rules] + [DEFAULT_REPAYMENT['label']]
+    )
+
+    bonus_malus = np.select(
+        conditions,
+        [max_loan + max_loan * rule['adjustment_pct'] / 100 for rule in rules],
+        default=float(DEFAULT_REPAYMENT['bonus_malus'])
+    )
+    return labels, bonus_malus
+
+
+def apply_bonus_malus(final_clients, snapshot_balances):
+    """
+    Joint les soldes des deux relevés aux clients finaux et calcule leurs bonus/malus.
+
+    Args:
+        final_clients (pd.DataFrame): Clients finaux.
+        snapshot_balances (pd.DataFrame): Soldes par SIM (SIM_NUMBER, Balance_First, Balance_Second),
+                                          voir `pivot_snapshot_balances`.
+
+    Returns:
+        pd.DataFrame: Clients finaux enrichis des soldes, de Repayment_Label et de Bonus_Malus.
+    """
+    # Fusionner les balances avec final_clients (une seule jointure pour les deux relevés)
+    final_clients = final_clients.merge(snapshot_balances, on='SIM_NUMBER', how='left')
+
+    # Calcul des bonus/malus par évaluation vectorisée des règles
+    final_clients['Repayment_Label'], final_clients['Bonus_Malus'] = evaluate_bonus_malus_rules(final_clients)
+    return final_clients
+
+
 def calculate_bonus_malus(input_file, final_clients_file, output_file):
     """
     Calcule les bonus/malus des clients à partir des transactions et sauvegarde les résultats dans un fichier.
     
     Args:
-        input_file (str): Chemin du fichier CSV contenant les transactions précédentes.
-        final_clients_file (str): Chemin du fichier CSV contenant les informations des clients finaux.
+        input_file (str): Chemin du fichier contenant les transactions précédentes (Parquet ou CSV).
+        final_clients_file (str): Chemin du fichier contenant les informations des clients finaux (Parquet ou CSV).
         output_file (str): Chemin de sauvegarde du fichier résultant.
         
     Returns:
         None: Le fichier est sauvegardé dans le chemin spécifié.
     """
     # Charger les données
-    transactions_previous_month = pd.read_csv(input_file)
-    final_clients = pd.read_csv(final_clients_file)
+    transactions_previous_month = read_artifact(input_file, columns=['SIM_NUMBER', 'DATE_OF_THE_DAY', 'balance'])
+    final_clients = read_artifact(final_clients_file)
 
     # Convertir la colonne DATE_OF_THE_DAY en datetime
     transactions_previous_month['DATE_OF_THE_DAY'] = pd.to_datetime(transactions_previous_month['DATE_OF_THE_DAY'])
 
-    # Filtrer les lignes pour le 15 et le dernier jour
-    balance_15 = transactions_previous_month[
-        transactions_previous_month['DATE_OF_THE_DAY'].dt.day == 15
-    ][['SIM_NUMBER', 'balance']].rename(columns={'balance': 'Balance_First'})
-
-    balance_30 = transactions_previous_month[
-        transactions_previous_month['DATE_OF_THE_DAY'].dt.day == 30
-    ][['SIM_NUMBER', 'balance']].rename(columns={'balance': 'Balance_Second'})
-
-    # Fusionner les balances avec final_clients
-    final_clients = final_clients.merge(balance_15, on='SIM_NUMBER', how='left')
-    final_clients = final_clients.merge(balance_30, on='SIM_NUMBER', how='left')
-
-    # Calcul des bonus/malus
-    def calculate_bonus_malus(row):
-        # Déterminer les bornes de crédit selon le type de crédit
-        min_loan, max_loan = 0, 0
-        if not pd.isna(row.get('Nano_Loan')):
-            min_loan, max_loan = 20, 45
-        elif not pd.isna(row.get('Macro_Loan')):
-            min_loan, max_loan = 25, 250
-        elif not pd.isna(row.get('Advanced_Credit')):
-            min_loan, max_loan = 100, 500
-        elif not pd.isna(row.get('Cash_Roller_Over')):
-            min_loan, max_loan = 100, 500
-
-        # Appliquer les règles de bonus/malus
-        if row['Balance_First'] <= 0 or row['Balance_Second'] <= 0:
-            repayment_label = "Strong ability to borrow"
-            bonus_malus = max_loan + (max_loan * 20 / 100)
-        elif row['Balance_First'] > 0 and row['Balance_Second'] > 0:
-            repayment_label = "Strong repayment capacity"
-            bonus_malus = max_loan - (max_loan * 20 / 100)
-        elif row['Balance_First'] > 0 and row['Balance_Second'] <= 0:
-            repayment_label = "Ability to borrow"
-            bonus_malus = max_loan + (max_loan * 10 / 100)  # 10% par défaut pour ajustement
-        else:
-            repayment_label = "Uncertain"
-            bonus_malus = 0
-
-        return pd.Series([repayment_label, bonus_malus], index=['Repayment_Label', 'Bonus_Malus'])
-
-    # Appliquer la fonction pour calculer les bonus/malus
-    final_clients[['Repayment_Label', 'Bonus_Malus']] = final_clients.apply(calculate_bonus_malus, axis=1)
-
-    # Sauvegarder les résultats
-    final_clients.to_csv(output_file, index=False)
+    # Calculer les bonus/malus et sauvegarder les résultats
+    final_clients = apply_bonus_malus(final_clients, pivot_snapshot_balances(transactions_previous_month))
+    write_artifact(final_clients, output_file)
 
 
 
@@ -194,27 +452,35 @@ def calculate_bonus_malus(input_file, final_clients_file, output_file):
 
 
 
+def add_updated_loans(final_clients):
+    """
+    Ajoute, pour chaque crédit, la colonne du montant mis à jour avec le bonus/malus (ex: Nano_Loan_updated).
+
+    Args:
+        final_clients (pd.DataFrame): Clients avec bonus/malus (voir `apply_bonus_malus`).
+
+    Returns:
+        pd.DataFrame: Clients enrichis des colonnes des crédits mis à jour.
+    """
+    for loan_type in LOAN_COLUMNS:
+        updated_column = f"{loan_type}_updated"
+        final_clients[updated_column] = final_clients[loan_type] + final_clients['Bonus_Malus']
+    return final_clients
+
+
 def update_loans_with_bonus_malus(input_file, output_file):
     """
     Met à jour les colonnes des prêts avec les bonus/malus calculés et sauvegarde le fichier résultant.
 
     Args:
-        input_file (str): Chemin du fichier CSV contenant les clients avec bonus/malus.
+        input_file (str): Chemin du fichier contenant les clients avec bonus/malus (Parquet ou CSV).
         output_file (str): Chemin de sauvegarde du fichier résultant.
 
     Returns:
         None: Le fichier est sauvegardé dans le chemin spécifié.
     """
-    # Charger les données
-    final_clients = pd.read_csv(input_file)
-
-    # Mettre à jour les colonnes des prêts avec les bonus/malus
-    for loan_type in ['Nano_Loan', 'Advanced_Credit', 'Macro_Loan', 'Cash_Roller_Over']:
-        updated_column = f"{loan_type}_updated"
-        final_clients[updated_column] = final_clients[loan_type] + final_clients['Bonus_Malus']
-
-    # Sauvegarder le fichier avec les colonnes mises à jour
-    final_clients.to_csv(output_file, index=False)
+    # Mettre à jour les colonnes des prêts avec les bonus/malus et sauvegarder le fichier
+    write_artifact(add_updated_loans(read_artifact(input_file)), output_file)
 
 
 
@@ -223,39 +489,46 @@ def update_loans_with_bonus_malus(input_file, output_file):
 #)
 
 
+def run_bonus_malus(balances, final_clients):
+    """
+    Enchaîne en mémoire le calcul des bonus/malus, sans fichier intermédiaire : restriction des
+    soldes aux clients finaux, mise en colonnes des deux relevés, jointure unique avec les clients,
+    puis mise à jour des crédits.
+
+    Args:
+        balances (pd.DataFrame): Soldes (SIM_NUMBER, DATE_OF_THE_DAY, balance), voir `aggregate_transactions`.
+        final_clients (pd.DataFrame): Clients finaux (non modifiés).
+
+    Returns:
+        tuple: (transactions_previous_month, final_clients_with_updated_loans) :
+               les soldes des deux relevés et les clients avec bonus/malus et crédits mis à jour.
+    """
+    transactions_previous_month = client_snapshot_balances(balances, final_clients['SIM_NUMBER'])
+    final_clients = apply_bonus_malus(final_clients, pivot_snapshot_balances(transactions_previous_month))
+    return transactions_previous_month, add_updated_loans(final_clients)
+
+
 # Exécutable pour tester indépendamment
 if __name__ == "__main__":
     # Définir les chemins
     base_path = os.getcwd()
 
     # Chemins des fichiers
-    transactions_file = os.path.join(base_path, "data", "raw", "real_transactions_with_dates.csv")
-    final_clients_file = os.path.join(base_path, "data", "processed", "final_clients.csv")
-    transactions_previous_month_file = os.path.join(base_path, "data", "processed", "transactions_previous_month.csv")
-    final_clients_with_bonus_malus_file = os.path.join(base_path, "data", "processed", "final_clients_with_bonus_malus.csv")
-    final_clients_with_updated_loans_file = os.path.join(base_path, "data", "processed", "final_clients_with_updated_loans.csv")
-
-    # Étape 1: Créer le DataFrame des transactions pour le mois précédent
-    process_transactions(transactions_file, transactions_previous_month_file)
-
-    # Étape 2: Mettre à jour les transactions avec les informations des clients finaux
-    update_transactions(
-        transactions_previous_month_file,
-        final_clients_file,
-        transactions_previous_month_file
-    )
+    transactions_file = os.path.join(base_path, "data", "raw", "real_transactions_with_dates.parquet")
+    final_clients_file = os.path.join(base_path, "data", "processed", "final_clients.parquet")
+    transactions_previous_month_file = os.path.join(base_path, "data", "processed", "transactions_previous_month.parquet")
+    final_clients_with_updated_loans_file = os.path.join(base_path, "data", "processed", "final_clients_with_updated_loans.parquet")
 
-    # Étape 3: Calculer le bonus/malus pour les clients
-    calculate_bonus_malus(
-        transactions_previous_month_file, 
-        final_clients_file, 
-        final_clients_with_bonus_malus_file
-    )
+    # Étape 1: Calculer les soldes au 15 et au dernier jour du dernier mois complet
+    reference_month = resolve_reference_month(transactions_file)
+    print(f"Mois de référence : {reference_month}")
+    balances = aggregate_transactions(transactions_file, reference_month)
+
+    # Étape 2: Calculer les bonus/malus et mettre à jour les prêts des clients finaux
+    transactions_previous_month, final_clients = run_bonus_malus(balances, read_artifact(final_clients_file))
+
+    # Sauvegarder les résultats
+    write_artifact(transactions_previous_month, transactions_previous_month_file)
+    write_artifact(final_clients, final_clients_with_updated_loans_file)
 
-    # Étape 4: Mettre à jour les prêts des clients avec le bonus/malus
-    update_loans_with_bonus_malus(
-        final_clients_with_bonus_malus_file, 
-        final_clients_with_updated_loans_file
-    )
-    
     print("Le calcul du bonus/malus a été effectué avec succès et les fichiers sont mis à jour.")
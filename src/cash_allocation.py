@@ -1,5 +1,25 @@
-import pandas as pd
+import numpy as np
 import os
+from src.artifact_store import read_artifact, write_artifact
+from src.profile_codes import WEIGHTED_SCORES, profile_index
+
+# Plage du score pondéré
+MIN_WEIGHTED_SCORE, MAX_WEIGHTED_SCORE = 15, 75
+
+# Bornes (min, max) de chaque crédit, par catégorie de client
+CREDIT_RANGES = {
+    'Individual': {'Nano_Loan': (20, 45), 'Advanced_Credit': (100, 500)},
+    'Business': {'Macro_Loan': (25, 250), 'Cash_Roller_Over': (100, 500)}
+}
+
+# Montant de chaque crédit pour chacun des 3125 index de profil, calculé une fois pour toutes
+_NORMALIZED_SCORES = (WEIGHTED_SCORES - MIN_WEIGHTED_SCORE) / (MAX_WEIGHTED_SCORE - MIN_WEIGHTED_SCORE)
+CREDIT_TABLES = {
+    column: credit_min + _NORMALIZED_SCORES * (credit_max - credit_min)
+    for credits in CREDIT_RANGES.values()
+    for column, (credit_min, credit_max) in credits.items()
+}
+
 
 def calculate_individual_credits(row):
     """
@@ -83,28 +103,51 @@ def calculate_business_credits(row):
     return macro_loan, cash_roller
 
 
+def allocate_credits(data, profile_indices=None):
+    """
+    Calcule en une seule passe vectorisée les quatre crédits (Nano_Loan, Advanced_Credit,
+    Macro_Loan, Cash_Roller_Over), avec les mêmes valeurs que `calculate_individual_credits`
+    et `calculate_business_credits`.
+
+    Les montants sont lus dans `CREDIT_TABLES` à partir de l'index de profil de chaque ligne ;
+    les crédits d'une catégorie valent NaN pour les clients de l'autre catégorie.
+
+    Args:
+        data (pd.DataFrame): Données contenant 'CUST_CATEGORY' et, si `profile_indices` n'est pas
+                             fourni, 'Profile_Code'.
+        profile_indices (np.ndarray, optional): Index de profil de chaque ligne, déjà calculés
+                                                (voir `profile_codes.profile_index`).
+
+    Returns:
+        pd.DataFrame: Données enrichies avec les colonnes des quatre crédits.
+    """
+    if profile_indices is None:
+        profile_indices = profile_index(data['Profile_Code'])
+
+    category = data['CUST_CATEGORY'].to_numpy()
+    for customer_category, credits in CREDIT_RANGES.items():
+        is_category = category == customer_category
+        for column in credits:
+            data[column] = np.where(is_category, CREDIT_TABLES[column][profile_indices], np.nan)
+
+    return data
+
+
 if __name__ == "__main__":
     
     # Définir les chemins des fichiers
     base_path = os.getcwd()
     processed_data_path = os.path.join(base_path, "data", "processed")
-    segmented_data_path = os.path.join(processed_data_path, "segmented_data.csv")
-    cash_allocated_data_path = os.path.join(processed_data_path, "cash_allocated_data.csv")
+    segmented_data_path = os.path.join(processed_data_path, "segmented_data.parquet")
+    cash_allocated_data_path = os.path.join(processed_data_path, "cash_allocated_data.parquet")
 
     # Charger les données segmentées
     print("Chargement des données segmentées...")
-    segmented_data = pd.read_csv(segmented_data_path)
-
-    # Appliquer les fonctions de calcul des crédits
-    print("Calcul des crédits pour les clients individuels...")
-    segmented_data[['Nano_Loan', 'Advanced_Credit']] = segmented_data.apply(
-        calculate_individual_credits, axis=1, result_type='expand'
-    )
+    segmented_data = read_artifact(segmented_data_path)
 
-    print("Calcul des crédits pour les clients Business...")
-    segmented_data[['Macro_Loan', 'Cash_Roller_Over']] = segmented_data.apply(
-        calculate_business_credits, axis=1, result_type='expand'
-    )
+    # Calculer les crédits des clients individuels et Business
+    print("Calcul des crédits pour les clients individuels et Business...")
+    segmented_data = allocate_credits(segmented_data)
 
     # Vérification des colonnes
     print("Vérification des crédits attribués...")
@@ -119,5 +162,5 @@ if __name__ == "__main__":
 
     # Sauvegarder les données avec crédits
     print(f"Sauvegarde des données avec crédits dans {cash_allocated_data_path}...")
-    segmented_data.to_csv(cash_allocated_data_path, index=False)
+    write_artifact(segmented_data, cash_allocated_data_path)
     print("Attribution des crédits terminée avec succès.")
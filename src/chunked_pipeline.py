@@ -0,0 +1,204 @@
+import os
+import shutil
+import tempfile
+import datetime
+import numpy as np
+import pandas as pd
+from src.artifact_store import (
+    artifact_path,
+    read_artifact,
+    iter_artifact,
+    append_artifact,
+    count_artifact_rows,
+    PartitionWriter,
+    filter_rows,
+    remove_artifact
+)
+from src.data_filtering import load_filtered_data
+from src.filter_rules import FILTER_RULES, compile_filter_rules, plan_filters
+from src.scoring_functions import (
+    SERVICE_SCORING_SPEC,
+    SCORING_PERCENTILES,
+    compile_scoring_spec,
+    fit_scoring_calibration_from_chunks,
+    save_scoring_calibration,
+    transform_with_calibration,
+    generate_profile_code
+)
+from src.quantile_sketch import percentiles_from_counts
+from src.segmentation import segment_profiles
+from src.profile_codes import weighted_scores
+from src.cash_allocation import allocate_credits
+from src.multi_sim_management import manage_multi_sim_clients, validate_final_clients
+from src.identity_index import NULL_IDENTITY, identity_hash
+
+# Nombre de lignes lues par bloc : c'est lui qui borne la mémoire utilisée
+DEFAULT_CHUNKSIZE = 200_000
+
+# Erreur de rang des sketches de seuils (0.1% des lignes, quelques milliers de valeurs par colonne)
+DEFAULT_EPSILON = 0.001
+
+
+def partition_by_sim(path, spill_dir, prefix, n_partitions, chunksize=DEFAULT_CHUNKSIZE, filters=None):
+    """
+    Répartit les lignes d'un artefact dans `n_partitions` artefacts selon un hash de SIM_NUMBER,
+    afin que les lignes USER_DATA et KYC d'une même SIM tombent dans la même partition.
+    Chaque partition est un seul fichier Parquet, complété bloc après bloc (voir `PartitionWriter`).
+
+    Args:
+        path (str): Chemin de l'artefact à partitionner (Parquet ou CSV).
+        spill_dir (str): Répertoire temporaire des partitions.
+        prefix (str): Préfixe des fichiers de partition (ex: 'user').
+        n_partitions (int): Nombre de partitions.
+        chunksize (int): Nombre de lignes lues par bloc.
+        filters (list, optional): Filtres [(colonne, opérateur, valeur), ...] : les lignes écartées
+                                  ne sont pas écrites dans les partitions.
+
+    Returns:
+        list: Chemins des partitions (certaines peuvent ne pas exister si vides).
+    """
+    partition_paths = [
+        artifact_path(spill_dir, f"{prefix}_part_{p:05d}") for p in range(n_partitions)
+    ]
+    with PartitionWriter(partition_paths) as writer:
+        for chunk in iter_artifact(path, chunksize):
+            chunk = filter_rows(chunk, filters)
+            partitions = pd.util.hash_pandas_object(chunk['SIM_NUMBER'], index=False).to_numpy() % n_partitions
+            for p, part in chunk.groupby(partitions):
+                writer.write(p, part)
+    return partition_paths
+
+
+def run_chunked_pipeline(user_data_path, kyc_data_path, processed_data_path,
+                         chunksize=DEFAULT_CHUNKSIZE, epsilon=DEFAULT_EPSILON, seed=0, filter_rules=FILTER_RULES):
+    """
+    Exécute les étapes fusion → pré-filtration → scoring → segmentation → attribution des crédits
+    → gestion multi-SIM par blocs de taille bornée, sans jamais charger toute la base en mémoire.
+
+    Les statistiques globales sont obtenues par des pré-passes peu coûteuses :
+    - les seuils de scoring par des sketches de quantiles (erreur de rang d'environ `epsilon`) ;
+    - les percentiles du score pondéré par un comptage exact de ses valeurs.
+
+    Les clients multi-SIM sont traités sans table globale des identités : les lignes avec
+    crédits sont réparties par hash d'identité, de sorte que toutes les SIM d'un client tombent
+    dans la même partition, puis chaque partition est dédupliquée à son tour. La mémoire
+    utilisée dépend donc de la taille des blocs et des partitions, et non du nombre d'abonnés.
+    Les clients de final_clients sont validés (voir `validate_final_clients`) et écrits partition
+    par partition ; la table n'est publiée que si aucun invariant n'est enfreint. En cas d'égalité
+    parfaite entre deux SIM d'un même client, le profil retenu peut différer de l'exécution en
+    mémoire, l'ordre des lignes dépendant du partitionnement.
+
+    Args:
+        user_data_path (str): Chemin de l'artefact USER_DATA (Parquet ou CSV).
+        kyc_data_path (str): Chemin de l'artefact KYC (Parquet ou CSV).
+        processed_data_path (str): Répertoire de sortie (filtered_data, scored_data, cash_allocated_data,
+                                   final_clients et scoring_calibration.json).
+        chunksize (int): Nombre de lignes par bloc.
+        epsilon (float): Erreur de rang des sketches de quantiles.
+        seed (int): Graine des sketches, pour des seuils reproductibles.
+        filter_rules (list): Règles de pré-filtration (voir `FILTER_RULES`).
+
+    Returns:
+        dict: Chemins des fichiers produits.
+
+    Raises:
+        ValueError: Si la table finale ne respecte pas les invariants de `validate_final_clients`.
+    """
+    os.makedirs(processed_data_path, exist_ok=True)
+    outputs = {
+        'filtered': artifact_path(processed_data_path, "filtered_data"),
+        'scored': artifact_path(processed_data_path, "scored_data"),
+        'cash_allocated': artifact_path(processed_data_path, "cash_allocated_data"),
+        'final_clients': artifact_path(processed_data_path, "final_clients"),
+        'calibration': os.path.join(processed_data_path, "scoring_calibration.json")
+    }
+    # Les artefacts sont écrits par ajouts successifs : on repart d'artefacts vides
+    for key in ['filtered', 'scored', 'cash_allocated', 'final_clients']:
+        remove_artifact(outputs[key])
+
+    spill_dir = tempfile.mkdtemp(prefix="chunked_", dir=processed_data_path)
+    final_clients_spill = artifact_path(spill_dir, "final_clients")
+
+    def append_final_clients(block):
+        # Chaque bloc contient toutes les lignes de ses clients : les invariants de la table finale
+        # se vérifient bloc par bloc, avant l'écriture
+        validate_final_clients(block, raise_on_breach=True, verbose=False)
+        append_artifact(block, final_clients_spill)
+
+    try:
+        # Passe 1 : partitionnement de USER_DATA et KYC par SIM_NUMBER, sans les lignes écartées par
+        # les règles de pré-filtration (les règles sur l'âge sont évaluées après la conversion des dates)
+        n_partitions = max(1, int(np.ceil(count_artifact_rows(user_data_path) / chunksize)))
+        print(f"Partitionnement des données en {n_partitions} partitions...")
+        user_filters = plan_filters(compile_filter_rules(filter_rules, 'user_data'))
+        kyc_filters = plan_filters(compile_filter_rules([rule for rule in filter_rules if rule['column'] != 'age'], 'kyc'))
+        user_parts = partition_by_sim(user_data_path, spill_dir, "user", n_partitions, chunksize, user_filters)
+        kyc_parts = partition_by_sim(kyc_data_path, spill_dir, "kyc", n_partitions, chunksize, kyc_filters)
+
+        # Passe 2 : fusion et pré-filtration partition par partition
+        print("Fusion et pré-filtration par partition...")
+        current_date = pd.to_datetime(datetime.datetime.today())
+        for user_part, kyc_part in zip(user_parts, kyc_parts):
+            if not (os.path.exists(user_part) and os.path.exists(kyc_part)):
+                continue
+            filtered_part = load_filtered_data(user_part, kyc_part, current_date=current_date, rules=filter_rules)
+            if filtered_part.empty:
+                continue
+            append_artifact(filtered_part, outputs['filtered'])
+
+        if not os.path.exists(outputs['filtered']):
+            raise ValueError("Aucune ligne ne passe la pré-filtration.")
+
+        # Passe 3 : calibration des seuils de scoring (lecture des seules colonnes notées)
+        print("Calibration des seuils de scoring par sketches de quantiles...")
+        plan = compile_scoring_spec(SERVICE_SCORING_SPEC)
+        calibration = fit_scoring_calibration_from_chunks(
+            iter_artifact(outputs['filtered'], chunksize, columns=plan['percentile_columns']),
+            SERVICE_SCORING_SPEC, epsilon=epsilon, seed=seed
+        )
+        save_scoring_calibration(calibration, outputs['calibration'])
+
+        # Passe 4 : scoring et profils, comptage exact des scores pondérés
+        print("Calcul des scores et des profils par bloc...")
+        weighted_score_counts = pd.Series(dtype=np.int64)
+        for chunk in iter_artifact(outputs['filtered'], chunksize):
+            scored_chunk = generate_profile_code(transform_with_calibration(chunk, calibration))
+            chunk_counts = pd.Series(weighted_scores(scored_chunk['Profile_Code'])).value_counts()
+            weighted_score_counts = weighted_score_counts.add(chunk_counts, fill_value=0)
+            append_artifact(scored_chunk, outputs['scored'])
+
+        segment_percentiles = percentiles_from_counts(weighted_score_counts, SCORING_PERCENTILES)
+
+        # Passe 5 : segmentation, crédits, et répartition des lignes par hash d'identité
+        print("Segmentation et attribution des crédits par bloc...")
+        identity_parts = [
+            artifact_path(spill_dir, f"identity_part_{p:05d}") for p in range(n_partitions)
+        ]
+        with PartitionWriter(identity_parts) as writer:
+            for chunk in iter_artifact(outputs['scored'], chunksize):
+                allocated_chunk = allocate_credits(segment_profiles(chunk, percentiles=segment_percentiles))
+                append_artifact(allocated_chunk, outputs['cash_allocated'])
+
+                # Une SIM sans pièce d'identité complète est toujours un client à SIM unique
+                identity_hashes = identity_hash(allocated_chunk)
+                is_known = identity_hashes != NULL_IDENTITY
+                if not is_known.all():
+                    append_final_clients(allocated_chunk[~is_known])
+                partitions = identity_hashes[is_known] % np.uint64(n_partitions)
+                for p, part in allocated_chunk[is_known].groupby(partitions):
+                    writer.write(p, part)
+
+        # Passe 6 : sélection du meilleur profil des clients multi-SIM, partition d'identité par partition
+        print("Gestion des clients avec plusieurs SIM par partition d'identité...")
+        for identity_part in identity_parts:
+            if os.path.exists(identity_part):
+                append_final_clients(manage_multi_sim_clients(read_artifact(identity_part)))
+
+        # La table finale n'est publiée qu'une fois tous ses blocs validés
+        if os.path.exists(final_clients_spill):
+            os.replace(final_clients_spill, outputs['final_clients'])
+        print("Table finale validée : une ligne et une SIM par client, crédits présents et dans les bornes.")
+    finally:
+        shutil.rmtree(spill_dir, ignore_errors=True)
+
+    return outputs
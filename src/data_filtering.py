@@ -1,42 +1,116 @@
+import datetime
 import pandas as pd
+from src.artifact_store import read_artifact, write_artifact
+from src.data_processing import build_kyc_index, merge_with_kyc_index, prepare_kyc_data
+from src.schema import apply_schema, reader_dtypes
+from src.filter_rules import (
+    FILTER_RULES,
+    compile_filter_rules,
+    plan_filters,
+    apply_filter_rules,
+    load_filter_stats,
+    save_filter_stats
+)
 
-def filter_data(merged_data):
+def filter_data(merged_data, rules=FILTER_RULES):
     """
     Pré-filtre la base de données fusionnée pour obtenir une base propre et fiable.
 
+    Les règles sont évaluées en un seul masque (voir `apply_filter_rules`).
+
     Args:
         merged_data (pd.DataFrame): DataFrame fusionnée contenant les données utilisateur et KYC.
+        rules (list): Règles de pré-filtration (voir `FILTER_RULES`).
 
     Returns:
         pd.DataFrame: DataFrame filtrée selon les critères définis.
     """
-    # Filtre 1 : Utilisateurs actifs dans les 90 derniers jours
-    filtered_data = merged_data[merged_data['HAS_USED_MOB_MONEY_IN_LAST_90_DAYS'] == 1]
+    filtered_data, _ = apply_filter_rules(merged_data, compile_filter_rules(rules))
 
-    # Filtre 2 : Limiter les tranches d'âge à faible risque
-    filtered_data = filtered_data[(filtered_data['age'] >= 21) & (filtered_data['age'] <= 60)]
+    # Réinitialiser les index
+    return filtered_data.reset_index(drop=True)
 
-    # Filtre 3 : Inclure uniquement les clients entièrement conformes au KYC
-    filtered_data = filtered_data[filtered_data['REGISTRATION_STATUS'] == 'Accepted']
 
-    # Réinitialiser les index
-    filtered_data = filtered_data.reset_index(drop=True)
-    
-    return filtered_data
+def print_filter_stats(stats):
+    """
+    Affiche, règle par règle, les lignes évaluées, retenues et rejetées et le temps d'évaluation.
+
+    Args:
+        stats (list): Statistiques renvoyées par `apply_filter_rules`.
+
+    Returns:
+        None
+    """
+    for rule_stats in stats:
+        print(
+            f"Règle {rule_stats['name']} ({rule_stats['table']}) : {rule_stats['passed']} lignes retenues, "
+            f"{rule_stats['rejected']} rejetées sur {rule_stats['evaluated']} ({rule_stats['seconds'] * 1000:.1f} ms)"
+        )
+
+
+def load_filtered_data(user_data_path, kyc_data_path=None, kyc_index=None, current_date=None,
+                       rules=FILTER_RULES, stats_path=None):
+    """
+    Charge USER_DATA et KYC en appliquant les règles de pré-filtration avant la fusion : les
+    lignes écartées ne sont ni chargées ni fusionnées. Même résultat que `filter_data` appliqué
+    à la sortie de `load_and_merge_data`.
+
+    Les règles USER_DATA sont poussées dans la lecture de USER_DATA. Les règles KYC sont évaluées
+    sur l'index KYC, les règles sur l'âge étant traduites en bornes de BIRTH_DATE.
+
+    Si `stats_path` est fourni, les règles de chaque table sont évaluées dans l'ordre de
+    sélectivité observé à l'exécution précédente, puis leurs statistiques (lignes retenues et
+    rejetées, temps) sont affichées et sauvegardées. Les statistiques des règles USER_DATA sont
+    mesurées sur les seules colonnes de ces règles.
+
+    Args:
+        user_data_path (str): Chemin de l'artefact USER_DATA (Parquet ou CSV).
+        kyc_data_path (str, optional): Chemin de l'artefact KYC, lu si `kyc_index` n'est pas fourni.
+        kyc_index (pd.DataFrame, optional): Index KYC construit par `build_kyc_index`.
+        current_date (pd.Timestamp, optional): Date de référence de l'âge et de l'ancienneté. Par défaut, maintenant.
+        rules (list): Règles de pré-filtration (voir `FILTER_RULES`).
+        stats_path (str, optional): Fichier JSON des statistiques par règle (ex: 'data/processed/filter_stats.json').
+
+    Returns:
+        pd.DataFrame: Données fusionnées et filtrées, avec les colonnes 'age' et 'tenure_years'.
+    """
+    if current_date is None:
+        current_date = pd.to_datetime(datetime.datetime.today())
+    previous_stats = load_filter_stats(stats_path) if stats_path else {}
+    user_plan = compile_filter_rules(rules, 'user_data', current_date, previous_stats)
+    kyc_plan = compile_filter_rules(rules, 'kyc', current_date, previous_stats)
+
+    user_stats = []
+    if stats_path and user_plan:
+        rule_columns = list(dict.fromkeys(column for rule in user_plan for column in rule['columns']))
+        _, user_stats = apply_filter_rules(read_artifact(user_data_path, columns=rule_columns), user_plan)
+    user_data_df = apply_schema(
+        read_artifact(user_data_path, filters=plan_filters(user_plan) or None, dtypes=reader_dtypes())
+    )
+
+    if kyc_index is None:
+        kyc_index = build_kyc_index(apply_schema(read_artifact(kyc_data_path, dtypes=reader_dtypes())))
+    kyc_index, kyc_stats = apply_filter_rules(kyc_index, kyc_plan)
+
+    if stats_path:
+        print_filter_stats(user_stats + kyc_stats)
+        save_filter_stats(user_stats + kyc_stats, stats_path)
+
+    filtered_data = prepare_kyc_data(merge_with_kyc_index(user_data_df, kyc_index), current_date=current_date)
+    return filtered_data.reset_index(drop=True)
+
 
 if __name__ == "__main__":
     # Définir les chemins des fichiers
-    merged_data_path = "data/processed/merged_data.csv"
-    filtered_data_path = "data/processed/filtered_data.csv"
-
-    # Charger les données fusionnées
-    print("Chargement des données fusionnées...")
-    merged_data = pd.read_csv(merged_data_path)
+    user_data_path = "data/raw/simulated_USER_DATA_with_dates.parquet"
+    kyc_data_path = "data/raw/simulated_KYC_DATA.parquet"
+    filtered_data_path = "data/processed/filtered_data.parquet"
+    filter_stats_path = "data/processed/filter_stats.json"
 
-    # Appliquer le filtrage
-    print("Application des filtres sur les données...")
-    filtered_data = filter_data(merged_data)
+    # Charger les données en appliquant les filtres avant la fusion
+    print("Chargement et filtrage des données utilisateur et KYC...")
+    filtered_data = load_filtered_data(user_data_path, kyc_data_path, stats_path=filter_stats_path)
 
     # Sauvegarder les résultats
-    filtered_data.to_csv(filtered_data_path, index=False)
-    print(f"Données filtrées sauvegardées dans {filtered_data_path}")
\ No newline at end of file
+    write_artifact(filtered_data, filtered_data_path)
+    print(f"Données filtrées sauvegardées dans {filtered_data_path}")
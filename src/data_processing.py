@@ -1,32 +1,48 @@
 import pandas as pd
 import datetime
+from src.artifact_store import read_artifact, write_artifact
+from src.schema import apply_schema, reader_dtypes
 
-def load_and_merge_data(user_data_path, kyc_data_path):
+# KYC date columns, parsed by `prepare_kyc_data` and `build_kyc_index`
+KYC_DATE_COLUMNS = ['BIRTH_DATE', 'ACQUISITION_DATE']
+
+def prepare_kyc_data(kyc_data_df, current_date=None):
     """
-    Load user data and KYC data, preprocess them, and merge into a single dataframe.
+    Prepare KYC data: parse date columns and derive the age and tenure used for filtering.
 
     Args:
-        user_data_path (str): Path to the user data CSV file.
-        kyc_data_path (str): Path to the KYC data CSV file.
+        kyc_data_df (pd.DataFrame): Raw KYC data.
+        current_date (pd.Timestamp, optional): Reference date for age and tenure. Defaults to now;
+            pass a fixed date when KYC data is processed in several chunks.
 
     Returns:
-        pd.DataFrame: Merged and preprocessed dataframe.
+        pd.DataFrame: KYC data with 'age' and 'tenure_years' columns.
     """
-    # Load the datasets
-    user_data_df = pd.read_csv(user_data_path)
-    kyc_data_df = pd.read_csv(kyc_data_path)
-
     # Ensure date columns are properly formatted
-    kyc_data_df['BIRTH_DATE'] = pd.to_datetime(kyc_data_df['BIRTH_DATE'], errors='coerce')
-    kyc_data_df['ACQUISITION_DATE'] = pd.to_datetime(kyc_data_df['ACQUISITION_DATE'], errors='coerce')
+    for column in KYC_DATE_COLUMNS:
+        kyc_data_df[column] = pd.to_datetime(kyc_data_df[column], errors='coerce')
 
     # Calculate age and tenure for filtering
-    current_date = pd.to_datetime(datetime.datetime.today())
+    if current_date is None:
+        current_date = pd.to_datetime(datetime.datetime.today())
     kyc_data_df['age'] = ((current_date - kyc_data_df['BIRTH_DATE']).dt.days / 365.25).astype(int)
     kyc_data_df['tenure_years'] = ((current_date - kyc_data_df['ACQUISITION_DATE']).dt.days / 365.25).astype(int)
 
-    # Merge the datasets
-    merged_data = pd.merge(
+    return kyc_data_df
+
+
+def merge_user_and_kyc(user_data_df, kyc_data_df):
+    """
+    Merge user data with prepared KYC data on SIM_NUMBER (inner join).
+
+    Args:
+        user_data_df (pd.DataFrame): User data.
+        kyc_data_df (pd.DataFrame): KYC data prepared with `prepare_kyc_data`.
+
+    Returns:
+        pd.DataFrame: Merged dataframe.
+    """
+    return pd.merge(
         user_data_df,
         kyc_data_df,
         left_on='SIM_NUMBER',
@@ -34,20 +50,95 @@ def load_and_merge_data(user_data_path, kyc_data_path):
         how='inner'
     )
 
+
+def build_kyc_index(kyc_data_df):
+    """
+    Build the KYC join index: KYC rows sorted by SIM_NUMBER, so that each SIM is encoded once
+    into an integer join key (its row number in the index).
+
+    The index is persisted by the pipeline and rebuilt only when the KYC data changes; the daily
+    USER_DATA snapshot is then joined against it with `merge_with_kyc_index`. Date columns are
+    parsed once here, so that the index can be filtered on BIRTH_DATE before the join.
+
+    Args:
+        kyc_data_df (pd.DataFrame): Raw KYC data.
+
+    Returns:
+        pd.DataFrame: KYC data sorted by SIM_NUMBER, with a fresh RangeIndex.
+    """
+    kyc_index_df = kyc_data_df.sort_values('SIM_NUMBER', kind='stable', ignore_index=True)
+    for column in KYC_DATE_COLUMNS:
+        if column in kyc_index_df.columns:
+            kyc_index_df[column] = pd.to_datetime(kyc_index_df[column], errors='coerce')
+    return kyc_index_df
+
+
+def merge_with_kyc_index(user_data_df, kyc_index_df):
+    """
+    Inner join of user data with the KYC index on SIM_NUMBER, with the same output as `merge_user_and_kyc`.
+
+    Each user SIM is looked up once in the hash index of the KYC SIMs to get its integer key,
+    and the KYC columns are gathered by key (`take`) instead of running a full merge. If a SIM
+    appears more than once in the KYC index, or if both sides share other columns, the generic
+    merge is used.
+
+    Args:
+        user_data_df (pd.DataFrame): User data.
+        kyc_index_df (pd.DataFrame): KYC index built with `build_kyc_index`.
+
+    Returns:
+        pd.DataFrame: Merged dataframe (user rows in their original order).
+    """
+    kyc_sims = pd.Index(kyc_index_df['SIM_NUMBER'])
+    shared_columns = user_data_df.columns.intersection(kyc_index_df.columns).difference(['SIM_NUMBER'])
+    if not kyc_sims.is_unique or len(shared_columns):
+        return merge_user_and_kyc(user_data_df, kyc_index_df)
+
+    keys = kyc_sims.get_indexer(user_data_df['SIM_NUMBER'])
+    matched = keys >= 0
+    return pd.concat([
+        user_data_df[matched].reset_index(drop=True),
+        kyc_index_df.drop(columns='SIM_NUMBER').take(keys[matched]).reset_index(drop=True)
+    ], axis=1)
+
+
+def load_and_merge_data(user_data_path, kyc_data_path, kyc_index=None):
+    """
+    Load user data and KYC data, preprocess them, and merge into a single dataframe.
+
+    Args:
+        user_data_path (str): Path to the user data file (CSV or Parquet).
+        kyc_data_path (str): Path to the KYC data file (CSV or Parquet).
+        kyc_index (pd.DataFrame, optional): KYC index built with `build_kyc_index`.
+            If given, the KYC file is not read.
+
+    Returns:
+        pd.DataFrame: Merged and preprocessed dataframe.
+    """
+    # Load the datasets directly with the compact dtypes of the schema registry (uint8 flags, float32
+    # unscored amounts, categories): stored in the Parquet files, passed to the reader for CSV
+    user_data_df = apply_schema(read_artifact(user_data_path, dtypes=reader_dtypes()))
+    if kyc_index is None:
+        kyc_index = build_kyc_index(apply_schema(read_artifact(kyc_data_path, dtypes=reader_dtypes())))
+
+    # Merge the datasets, then parse dates and compute age and tenure on the matched rows only
+    merged_data = merge_with_kyc_index(user_data_df, kyc_index)
+    merged_data = prepare_kyc_data(merged_data)
+
     return merged_data
 
 
 # Code exécuté directement si le script est appelé
 if __name__ == "__main__":
     # Chemins des fichiers
-    user_data_path = "data/raw/simulated_USER_DATA_with_dates.csv"
-    kyc_data_path = "data/raw/simulated_KYC_DATA.csv"
+    user_data_path = "data/raw/simulated_USER_DATA_with_dates.parquet"
+    kyc_data_path = "data/raw/simulated_KYC_DATA.parquet"
 
     # Appeler la fonction et générer le fichier fusionné
     merged_data = load_and_merge_data(user_data_path, kyc_data_path)
     
     # Sauvegarder les résultats dans processed/
-    output_path = "data/processed/merged_data.csv"
-    merged_data.to_csv(output_path, index=False)
+    output_path = "data/processed/merged_data.parquet"
+    write_artifact(merged_data, output_path)
 
     print(f"Merged data saved to {output_path}")
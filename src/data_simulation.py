@@ -1,185 +1,355 @@
 import os
-import pandas as pd
 import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 from faker import Faker
-import random
+from src.artifact_store import remove_artifact
+from src.schema import apply_schema
+from src.transactions_store import write_transactions_store
+
+# Graine par défaut de la simulation : une même graine donne les mêmes données
+DEFAULT_SEED = 123
+
+# Nombre de transactions échantillonnées dans le journal PaySim
+N_TRANSACTIONS = 1000000
+
+# Nombre de tirages Faker par vocabulaire. Les valeurs fréquentes chez Faker y apparaissent
+# plusieurs fois, de sorte qu'un tirage uniforme dans le vocabulaire respecte ses pondérations.
+VOCABULARY_SIZE = 5000
+
+# Colonnes KYC tirées d'un vocabulaire Faker (colonne -> fournisseur Faker)
+FAKER_VOCABULARIES = {
+    'REGION': 'state',
+    'TOWN': 'city',
+    'TERRITORY': 'state_abbr',
+    'FIRST_NAME': 'first_name',
+    'LAST_NAME': 'last_name',
+    'NATIONALITY': 'country'
+}
 
-# Initialiser Faker pour générer des données aléatoires
-fake = Faker()
 
-def simulate_data(output_path):
+def build_vocabularies(seed=DEFAULT_SEED, size=VOCABULARY_SIZE):
+    """
+    Construit, une fois pour toutes, les vocabulaires Faker des colonnes KYC textuelles.
+
+    Args:
+        seed (int): Graine de Faker.
+        size (int): Nombre de tirages par vocabulaire.
+
+    Returns:
+        dict: Vocabulaire (np.ndarray de chaînes) de chaque colonne de `FAKER_VOCABULARIES`.
+    """
+    fake = Faker()
+    fake.seed_instance(seed)
+    return {
+        column: np.array([getattr(fake, provider)() for _ in range(size)], dtype=object)
+        for column, provider in FAKER_VOCABULARIES.items()
+    }
+
+
+def sample_vocabulary(vocabulary, size, rng):
+    """Tire `size` valeurs d'un vocabulaire par un tableau d'indices."""
+    return vocabulary[rng.integers(0, len(vocabulary), size=size)]
+
+
+def simulate_id_numbers(size, rng):
+    """
+    Génère des numéros de pièce d'identité au format de `Faker.ssn()` (AAA-GG-SSSS) à partir
+    de tableaux d'entiers : zone 001-899 sauf 666, groupe 01-99, série 0001-9999.
+
+    Args:
+        size (int): Nombre de numéros.
+        rng (np.random.Generator): Générateur aléatoire.
+
+    Returns:
+        np.ndarray: Numéros (chaînes).
+    """
+    area = rng.integers(1, 899, size=size)
+    area += area >= 666
+    group = rng.integers(1, 100, size=size)
+    serial = rng.integers(1, 10000, size=size)
+
+    # Chaque chiffre est écrit directement dans un tableau d'octets de 11 caractères par numéro
+    chars = np.full((size, 11), ord('-'), dtype=np.uint8)
+    for values, start, width in [(area, 0, 3), (group, 4, 2), (serial, 7, 4)]:
+        for position in range(width):
+            chars[:, start + width - 1 - position] = ord('0') + (values // 10 ** position) % 10
+    return chars.view('S11').ravel().astype(str).astype(object)
+
+
+def _yyyymmdd(dates):
+    """Formate des dates en chaînes AAAAMMJJ."""
+    dates = pd.DatetimeIndex(dates)
+    return (dates.year * 10000 + dates.month * 100 + dates.day).astype(str).to_numpy(dtype=object)
+
+
+def simulate_user_data(sim_numbers, transaction_dates, rng, today=None):
+    """
+    Simule les données d'usage (USER_DATA) d'une liste de SIM.
+
+    Args:
+        sim_numbers (array-like): SIM des abonnés.
+        transaction_dates (array-like): Dates des transactions, parmi lesquelles DATE_OF_THE_DAY est tirée.
+        rng (np.random.Generator): Générateur aléatoire.
+        today (pd.Timestamp, optional): Date de référence de LAST_EVENT_DATE. Par défaut, aujourd'hui.
+
+    Returns:
+        pd.DataFrame: Données USER_DATA, une ligne par SIM.
+    """
+    num_customers = len(sim_numbers)
+    today = pd.to_datetime('today') if today is None else today
+    transaction_dates = np.asarray(transaction_dates, dtype='datetime64[ns]')
+
+    return pd.DataFrame({
+        'DATE_OF_THE_DAY': _yyyymmdd(rng.choice(transaction_dates, size=num_customers)),
+        'SIM_NUMBER': sim_numbers,
+        'HAS_USED_MOB_MONEY_IN_LAST_30_DAYS': rng.integers(0, 2, size=num_customers),
+        'HAS_USED_MOB_MONEY_IN_LAST_7_DAYS': rng.integers(0, 2, size=num_customers),
+        'HAS_USED_MOB_MONEY_IN_LAST_90_DAYS': rng.integers(0, 2, size=num_customers),
+        'PAID_DATA_VOLUME': rng.uniform(0, 5000, size=num_customers).round(2),
+        'PAID_VOICE_TRAFFIC': rng.uniform(0, 2000, size=num_customers).round(2),
+        'HAS_USED_MOB_MONEY_IN_LAST_1_DAY': rng.integers(0, 2, size=num_customers),
+        'VOICE_REVENUE': rng.uniform(0, 500, size=num_customers).round(2),
+        'DATA_REVENUE': rng.uniform(0, 300, size=num_customers).round(2),
+        'SMS_REVENUE': rng.uniform(0, 100, size=num_customers).round(2),
+        'DIGITAL_REVENUE': rng.uniform(0, 200, size=num_customers).round(2),
+        'MOB_MONEY_REVENUE': rng.uniform(0, 1000, size=num_customers).round(2),
+        'FREE_VOICE_TRAFFIC': rng.uniform(0, 1000, size=num_customers).round(2),
+        'FREE_DATA_VOLUME': rng.uniform(0, 10000, size=num_customers).round(2),
+        'VOICE_TRAFFIC_ONNET': rng.uniform(0, 500, size=num_customers).round(2),
+        'VOICE_TRAFFIC_OFFNET': rng.uniform(0, 500, size=num_customers).round(2),
+        'NB_CALLS_EMITTED_ONNET': rng.integers(0, 50, size=num_customers),
+        'NB_CALLS_RECEIVED_ONNET': rng.integers(0, 50, size=num_customers),
+        'NB_CALLS_EMITTED_OFFNET': rng.integers(0, 50, size=num_customers),
+        'NB_CALLS_RECEIVED_OFFNET': rng.integers(0, 50, size=num_customers),
+        'IS_RGS_1': rng.integers(0, 2, size=num_customers),
+        'IS_RGS_7': rng.integers(0, 2, size=num_customers),
+        'IS_RGS_30': rng.integers(0, 2, size=num_customers),
+        'IS_RGS_90': rng.integers(0, 2, size=num_customers),
+        'NB_CALLS_EMITTED_INTERNATIONAL': rng.integers(0, 10, size=num_customers),
+        'NB_CALLS_RECEIVED_INTERNATIONAL': rng.integers(0, 10, size=num_customers),
+        'VOICE_OUTGOING_TRAFFIC_INTERNATIONAL': rng.uniform(0, 200, size=num_customers).round(2),
+        'VOICE_INCOMING_TRAFFIC_INTERNATIONAL': rng.uniform(0, 200, size=num_customers).round(2),
+        'VOICE_OUTGOING_TRAFFIC_ONNET': rng.uniform(0, 500, size=num_customers).round(2),
+        'VOICE_INCOMING_TRAFFIC_ONNET': rng.uniform(0, 500, size=num_customers).round(2),
+        'VOICE_OUTGOING_TRAFFIC_OFFNET': rng.uniform(0, 500, size=num_customers).round(2),
+        'VOICE_INCOMING_TRAFFIC_OFFNET': rng.uniform(0, 500, size=num_customers).round(2),
+        'NB_VOICE_PACKAGES_SUBSCRIPTIONS': rng.integers(0, 10, size=num_customers),
+        'NB_DATA_PACKAGES_SUBSCRIPTIONS': rng.integers(0, 10, size=num_customers),
+        'VOICE_PACKAGES_REVENUE': rng.uniform(0, 200, size=num_customers).round(2),
+        'NB_SMS_SENT_ONNET': rng.integers(0, 50, size=num_customers),
+        'NB_SMS_SENT_OFFNET': rng.integers(0, 50, size=num_customers),
+        'NB_SMS_RECEIVED_ONNET': rng.integers(0, 50, size=num_customers),
+        'NB_SMS_RECEIVED_OFFNET': rng.integers(0, 50, size=num_customers),
+        'NB_SMS_SENT_INTERNATIONAL': rng.integers(0, 10, size=num_customers),
+        'NB_SMS_RECEIVED_INTERNATIONAL': rng.integers(0, 10, size=num_customers),
+        'NB_SMS_PACKAGES_SUBSCRIPTIONS': rng.integers(0, 10, size=num_customers),
+        'SMS_PACKAGE_REVENUE': rng.uniform(0, 100, size=num_customers).round(2),
+        'NB_VOICE_PACKAGES_SUBS_VIA_MOB_MONEY': rng.integers(0, 5, size=num_customers),
+        'NB_VOICE_PACKAGES_SUBS_VIA_POS': rng.integers(0, 5, size=num_customers),
+        'NB_VOICE_PACKAGES_SUBS_VIA_MAIN_ACCOUNT': rng.integers(0, 5, size=num_customers),
+        'NB_DATA_package_SUBS_VIA_MOB_MONEY': rng.integers(0, 5, size=num_customers),
+        'NB_DATA_package_SUBS_VIA_POS': rng.integers(0, 5, size=num_customers),
+        'NB_DATA_package_SUBS_VIA_MAIN_ACCOUNT': rng.integers(0, 5, size=num_customers),
+        'NB_SMS_package_SUBS_VIA_MOB_MONEY': rng.integers(0, 5, size=num_customers),
+        'NB_SMS_package_SUBS_VIA_POS': rng.integers(0, 5, size=num_customers),
+        'NB_SMS_package_SUBS_VIA_MAIN_ACCOUNT': rng.integers(0, 5, size=num_customers),
+        'NB_MIXED_package_SUBS_VIA_MOB_MONEY': rng.integers(0, 5, size=num_customers),
+        'NB_MIXED_package_SUBS_VIA_POS': rng.integers(0, 5, size=num_customers),
+        'NB_MIXED_package_SUBS_VIA_MAIN_ACCOUNT': rng.integers(0, 5, size=num_customers),
+        'IS_SMARTPHONE_USER': rng.integers(0, 2, size=num_customers),
+        'LAST_EVENT_DATE': today - pd.to_timedelta(rng.integers(1, 365, size=num_customers), unit='d'),
+        'LAST_EVENT_TYPE': rng.choice(['Payment', 'Transfer', 'Cash_Out', 'Debit'], size=num_customers),
+        'IS_DATA_RGS1': rng.integers(0, 2, size=num_customers),
+        'IS_DATA_RGS7': rng.integers(0, 2, size=num_customers),
+        'IS_DATA_RGS30': rng.integers(0, 2, size=num_customers),
+        'IS_DATA_RGS90': rng.integers(0, 2, size=num_customers),
+        'MAIN_ACCOUNT_AMOUNT': rng.uniform(0, 10000, size=num_customers).round(2),
+        'EXTRA_TIME_LOAN_AMOUNT_RENT': rng.uniform(0, 500, size=num_customers).round(2),
+        'EXTRA_TIME_LOAN_AMOUNT_TO_PAY_BACK': rng.uniform(0, 500, size=num_customers).round(2),
+        'REFILL_MAIN_AMOUNT': rng.uniform(0, 1000, size=num_customers).round(2),
+        'REFILL_mobile_money_ACCOUNT': rng.uniform(0, 1000, size=num_customers).round(2),
+        'TOTAL_SPENT_MAIN_ACCOUNT': rng.uniform(0, 5000, size=num_customers).round(2),
+        'TOTAL_SPENT_MOB_MONEY_ACCOUNT': rng.uniform(0, 5000, size=num_customers).round(2),
+        'NB_package_GIFTS_SENT': rng.integers(0, 10, size=num_customers),
+        'NB_package_GIFTS_RECEIVED': rng.integers(0, 10, size=num_customers),
+        'AMOUNT_package_GIFTS_SENT': rng.uniform(0, 1000, size=num_customers).round(2),
+        'AMOUNT_package_GIFTS_RECEIVED': rng.uniform(0, 1000, size=num_customers).round(2),
+        'MOB_MONEY_ACCOUNT_AMOUNT': rng.uniform(0, 10000, size=num_customers).round(2),
+        'TOTAL_LOADING_MONEY_IN_MOB_MONEY': rng.uniform(0, 5000, size=num_customers).round(2),
+        'TOTAL_CASHOUT_MOB_MONEY_ACCOUNT': rng.uniform(0, 5000, size=num_customers).round(2),
+        'TOTAL_CASHOUT_MOB_MONEY_FOR_package_PURCHASE': rng.uniform(0, 2000, size=num_customers).round(2),
+        'TOTAL_CASHOUT_MOB_MONEY_TRANSFER_MONEY': rng.uniform(0, 3000, size=num_customers).round(2)
+    })
+
+
+def simulate_kyc_data(sim_numbers, transaction_dates, rng, vocabularies, today=None):
+    """
+    Simule les données KYC d'une liste de SIM, sans appel à Faker par ligne : les colonnes
+    textuelles sont tirées des vocabulaires de `build_vocabularies` et les numéros de pièce
+    d'identité sont construits à partir de tableaux d'entiers.
+
+    Args:
+        sim_numbers (array-like): SIM des abonnés.
+        transaction_dates (array-like): Dates des transactions, qui encadrent les dates d'activation.
+        rng (np.random.Generator): Générateur aléatoire.
+        vocabularies (dict): Vocabulaires des colonnes textuelles (voir `build_vocabularies`).
+        today (pd.Timestamp, optional): Date de référence de BIRTH_DATE et ID_EXPIRY_DATE. Par défaut, aujourd'hui.
+
+    Returns:
+        pd.DataFrame: Données KYC, une ligne par SIM.
+    """
+    num_customers = len(sim_numbers)
+    today = pd.to_datetime('today') if today is None else today
+    transaction_dates = np.asarray(transaction_dates, dtype='datetime64[ns]')
+
+    # Ensure consistent dates: Use transaction_date range from the Transactions Dataset
+    start_transaction_date = pd.Timestamp(transaction_dates.min())
+
+    # Generate acquisition dates before first event dates, and first event dates within the transaction date range
+    acquisition_dates = start_transaction_date - pd.to_timedelta(rng.integers(30, 365, size=num_customers), unit='d')
+    first_event_dates = rng.choice(transaction_dates, size=num_customers)
+
+    return pd.DataFrame({
+        'SIM_NUMBER': sim_numbers,
+        # Acquisition date happens before the first event date
+        'ACQUISITION_DATE': acquisition_dates,
+        'SIM_ACTIVATION_COMPLETION_TIME': rng.integers(1, 48, size=num_customers),  # Time in hours
+        'CUST_CATEGORY': rng.choice(['Individual', 'Business'], size=num_customers), # Revoir en fonction du Montant dans son Mobile Money
+        'REGION': sample_vocabulary(vocabularies['REGION'], num_customers, rng),
+        'TOWN': sample_vocabulary(vocabularies['TOWN'], num_customers, rng),
+        'TERRITORY': sample_vocabulary(vocabularies['TERRITORY'], num_customers, rng),
+        # First event date should align with transaction dates, slightly before or after acquisition
+        'FIRST_EVENT_DATE': first_event_dates,
+        'FIRST_NAME': sample_vocabulary(vocabularies['FIRST_NAME'], num_customers, rng),
+        'LAST_NAME': sample_vocabulary(vocabularies['LAST_NAME'], num_customers, rng),
+        'GENDER': rng.choice(['Male', 'Female'], size=num_customers),
+        'BIRTH_DATE': today - pd.to_timedelta(rng.integers(18*365, 65*365, size=num_customers), unit='d'), # Majorité : 21 ans
+        'NATIONALITY': sample_vocabulary(vocabularies['NATIONALITY'], num_customers, rng),
+        'ID_TYPE': rng.choice(['National ID', 'Passport', 'Driver\'s License'], size=num_customers),
+        'ID_NUMBER': simulate_id_numbers(num_customers, rng),
+        'ID_EXPIRY_DATE': today + pd.to_timedelta(rng.integers(365, 3650, size=num_customers), unit='d'),
+        'HAS_SIM_NUM_PARENT': rng.integers(0, 2, size=num_customers),
+        'REGISTRATION_STATUS': rng.choice(['Accepted', 'Not Accepted'], size=num_customers),
+        'REGISTRATION_TYPE': rng.choice(['New', 'Existing'], size=num_customers),
+        'LANG': rng.choice(['French', 'English'], size=num_customers),
+        'IS_MOB_MONEY_MERCHANT': rng.integers(0, 2, size=num_customers),
+        'IS_MOB_MONEY_USER': rng.integers(0, 2, size=num_customers),
+        'DEVICE_TYPE': rng.choice(['Smartphone', 'Feature phone'], size=num_customers)
+    })
+
+
+def _shard_paths(path, n_shards):
+    """Chemins des parts Parquet : le fichier lui-même pour une seule part, sinon un répertoire de parts."""
+    if n_shards == 1:
+        return [path]
+    return [os.path.join(path, f"part-{shard:05d}.parquet") for shard in range(n_shards)]
+
+
+def _simulate_shard(sim_numbers, transaction_dates, seed_sequence, vocabularies, today, user_data_path, kyc_data_path):
+    """
+    Simule et sauvegarde USER_DATA et KYC d'une part des abonnés (exécuté dans un processus du pool).
+
+    Le générateur de la part est créé à partir de sa propre `SeedSequence` : le résultat ne
+    dépend ni de l'ordre d'exécution des parts ni du nombre de processus.
+    """
+    rng = np.random.default_rng(seed_sequence)
+    # Écrites avec les types compacts du registre, les parts sont relues sans conversion
+    user_data = apply_schema(simulate_user_data(sim_numbers, transaction_dates, rng, today))
+    user_data.to_parquet(user_data_path, index=False)
+    kyc_data = apply_schema(simulate_kyc_data(sim_numbers, transaction_dates, rng, vocabularies, today))
+    kyc_data.to_parquet(kyc_data_path, index=False)
+    return len(sim_numbers)
+
+
+def simulate_data(output_path, seed=DEFAULT_SEED, n_shards=1, max_workers=None, today=None,
+                  n_transactions=N_TRANSACTIONS):
     """
     Simule les données de transactions, d'utilisateur (USER_DATA) et de KYC.
 
+    Les SIM sont réparties en `n_shards` parts simulées en parallèle, chacune dans un processus
+    avec son propre flux aléatoire (`SeedSequence(seed).spawn`). Avec plusieurs parts, USER_DATA
+    et KYC sont écrits en répertoires de parts Parquet (une part par processus, sans copie CSV).
+    Pour une graine, un nombre de parts et une date de référence donnés, les fichiers sont
+    identiques d'une exécution à l'autre.
+
     Args:
         output_path (str): Chemin du répertoire où les fichiers simulés seront sauvegardés.
+        seed (int): Graine de la simulation : une même graine donne les mêmes données.
+        n_shards (int): Nombre de parts simulées en parallèle.
+        max_workers (int, optional): Nombre de processus. Par défaut, le nombre de cœurs
+                                     (1 : les parts sont simulées dans le processus courant).
+        today (pd.Timestamp, optional): Date de référence des dates relatives (naissance, expiration,
+                                        dernier événement). Par défaut, aujourd'hui à minuit.
+        n_transactions (int): Nombre de transactions échantillonnées dans le journal PaySim.
 
     Returns:
         list: Liste des chemins des fichiers générés.
     """
     # Assurez-vous que le chemin de sortie existe
     os.makedirs(output_path, exist_ok=True)
+    today = pd.Timestamp('today').normalize() if today is None else pd.Timestamp(today)
 
     ####################################### Transactions Data ######################################
     print("Simulation des données de transactions...")
     
     # Charger le dataset réel (simulé ici avec des sous-échantillons)
     transactions_path = os.path.join(output_path, "PS_20174392719_1491204439457_log.csv")
-    transactions_df = pd.read_csv(transactions_path).sample(n=1000000, random_state=123)
+    transactions_df = pd.read_csv(transactions_path).sample(n=n_transactions, random_state=seed)
     
     # Ajouter une colonne transaction_date basée sur 'step'
     start_date = pd.to_datetime('2023-01-01')
     transactions_df['transaction_date'] = start_date + pd.to_timedelta(transactions_df['step'], unit='d')
     
-    # Sauvegarder le dataset de transactions avec les nouvelles dates
+    # Sauvegarder le dataset de transactions avec les nouvelles dates (CSV, et Parquet partitionné
+    # par année et par mois avec un manifeste des bornes de date et de SIM de chaque fichier)
     transactions_with_dates_csv = os.path.join(output_path, "real_transactions_with_dates.csv")
     transactions_with_dates_parquet = os.path.join(output_path, "real_transactions_with_dates.parquet")
     transactions_df.to_csv(transactions_with_dates_csv, index=False)
-    transactions_df.to_parquet(transactions_with_dates_parquet, index=False)
+    write_transactions_store(transactions_df, transactions_with_dates_parquet)
 
     # Extraire les SIM uniques (nameOrig et nameDest)
     unique_customers = pd.unique(transactions_df[['nameOrig', 'nameDest']].values.ravel('K'))
+    transaction_dates = transactions_df['transaction_date'].to_numpy()
+
+    ################################### USER_DATA et KYC Data ######################################
+    print(f"Simulation des données utilisateur (USER_DATA) et KYC en {n_shards} part(s)...")
 
-    ######################################### USER_DATA ###########################################
-    print("Simulation des données utilisateur (USER_DATA)...")
-    
-    # Nombre total de clients uniques
-    num_customers = len(unique_customers)
-
-    # Générer les données USER_DATA
-    user_data = pd.DataFrame({
-        'DATE_OF_THE_DAY': np.random.choice(transactions_df['transaction_date'].dt.strftime('%Y%m%d'), size=num_customers),
-        'SIM_NUMBER': unique_customers,
-        'HAS_USED_MOB_MONEY_IN_LAST_30_DAYS': np.random.randint(0, 2, size=num_customers),
-        'HAS_USED_MOB_MONEY_IN_LAST_7_DAYS': np.random.randint(0, 2, size=num_customers),
-        'HAS_USED_MOB_MONEY_IN_LAST_90_DAYS': np.random.randint(0, 2, size=num_customers),
-        'PAID_DATA_VOLUME': np.random.uniform(0, 5000, size=num_customers).round(2),
-        'PAID_VOICE_TRAFFIC': np.random.uniform(0, 2000, size=num_customers).round(2),
-        'HAS_USED_MOB_MONEY_IN_LAST_1_DAY': np.random.randint(0, 2, size=num_customers),
-        'VOICE_REVENUE': np.random.uniform(0, 500, size=num_customers).round(2),
-        'DATA_REVENUE': np.random.uniform(0, 300, size=num_customers).round(2),
-        'SMS_REVENUE': np.random.uniform(0, 100, size=num_customers).round(2),
-        'DIGITAL_REVENUE': np.random.uniform(0, 200, size=num_customers).round(2),
-        'MOB_MONEY_REVENUE': np.random.uniform(0, 1000, size=num_customers).round(2),
-        'FREE_VOICE_TRAFFIC': np.random.uniform(0, 1000, size=num_customers).round(2),
-        'FREE_DATA_VOLUME': np.random.uniform(0, 10000, size=num_customers).round(2),
-        'VOICE_TRAFFIC_ONNET': np.random.uniform(0, 500, size=num_customers).round(2),
-        'VOICE_TRAFFIC_OFFNET': np.random.uniform(0, 500, size=num_customers).round(2),
-        'NB_CALLS_EMITTED_ONNET': np.random.randint(0, 50, size=num_customers),
-        'NB_CALLS_RECEIVED_ONNET': np.random.randint(0, 50, size=num_customers),
-        'NB_CALLS_EMITTED_OFFNET': np.random.randint(0, 50, size=num_customers),
-        'NB_CALLS_RECEIVED_OFFNET': np.random.randint(0, 50, size=num_customers),
-        'IS_RGS_1': np.random.randint(0, 2, size=num_customers),
-        'IS_RGS_7': np.random.randint(0, 2, size=num_customers),
-        'IS_RGS_30': np.random.randint(0, 2, size=num_customers),
-        'IS_RGS_90': np.random.randint(0, 2, size=num_customers),
-        'NB_CALLS_EMITTED_INTERNATIONAL': np.random.randint(0, 10, size=num_customers),
-        'NB_CALLS_RECEIVED_INTERNATIONAL': np.random.randint(0, 10, size=num_customers),
-        'VOICE_OUTGOING_TRAFFIC_INTERNATIONAL': np.random.uniform(0, 200, size=num_customers).round(2),
-        'VOICE_INCOMING_TRAFFIC_INTERNATIONAL': np.random.uniform(0, 200, size=num_customers).round(2),
-        'VOICE_OUTGOING_TRAFFIC_ONNET': np.random.uniform(0, 500, size=num_customers).round(2),
-        'VOICE_INCOMING_TRAFFIC_ONNET': np.random.uniform(0, 500, size=num_customers).round(2),
-        'VOICE_OUTGOING_TRAFFIC_OFFNET': np.random.uniform(0, 500, size=num_customers).round(2),
-        'VOICE_INCOMING_TRAFFIC_OFFNET': np.random.uniform(0, 500, size=num_customers).round(2),
-        'NB_VOICE_PACKAGES_SUBSCRIPTIONS': np.random.randint(0, 10, size=num_customers),
-        'NB_DATA_PACKAGES_SUBSCRIPTIONS': np.random.randint(0, 10, size=num_customers),
-        'VOICE_PACKAGES_REVENUE': np.random.uniform(0, 200, size=num_customers).round(2),
-        'NB_SMS_SENT_ONNET': np.random.randint(0, 50, size=num_customers),
-        'NB_SMS_SENT_OFFNET': np.random.randint(0, 50, size=num_customers),
-        'NB_SMS_RECEIVED_ONNET': np.random.randint(0, 50, size=num_customers),
-        'NB_SMS_RECEIVED_OFFNET': np.random.randint(0, 50, size=num_customers),
-        'NB_SMS_SENT_INTERNATIONAL': np.random.randint(0, 10, size=num_customers),
-        'NB_SMS_RECEIVED_INTERNATIONAL': np.random.randint(0, 10, size=num_customers),
-        'NB_SMS_PACKAGES_SUBSCRIPTIONS': np.random.randint(0, 10, size=num_customers),
-        'SMS_PACKAGE_REVENUE': np.random.uniform(0, 100, size=num_customers).round(2),
-        'NB_VOICE_PACKAGES_SUBS_VIA_MOB_MONEY': np.random.randint(0, 5, size=num_customers),
-        'NB_VOICE_PACKAGES_SUBS_VIA_POS': np.random.randint(0, 5, size=num_customers),
-        'NB_VOICE_PACKAGES_SUBS_VIA_MAIN_ACCOUNT': np.random.randint(0, 5, size=num_customers),
-        'NB_DATA_package_SUBS_VIA_MOB_MONEY': np.random.randint(0, 5, size=num_customers),
-        'NB_DATA_package_SUBS_VIA_POS': np.random.randint(0, 5, size=num_customers),
-        'NB_DATA_package_SUBS_VIA_MAIN_ACCOUNT': np.random.randint(0, 5, size=num_customers),
-        'NB_SMS_package_SUBS_VIA_MOB_MONEY': np.random.randint(0, 5, size=num_customers),
-        'NB_SMS_package_SUBS_VIA_POS': np.random.randint(0, 5, size=num_customers),
-        'NB_SMS_package_SUBS_VIA_MAIN_ACCOUNT': np.random.randint(0, 5, size=num_customers),
-        'NB_MIXED_package_SUBS_VIA_MOB_MONEY': np.random.randint(0, 5, size=num_customers),
-        'NB_MIXED_package_SUBS_VIA_POS': np.random.randint(0, 5, size=num_customers),
-        'NB_MIXED_package_SUBS_VIA_MAIN_ACCOUNT': np.random.randint(0, 5, size=num_customers),
-        'IS_SMARTPHONE_USER': np.random.randint(0, 2, size=num_customers),
-        'LAST_EVENT_DATE': pd.to_datetime('today') - pd.to_timedelta(np.random.randint(1, 365, size=num_customers), unit='d'),
-        'LAST_EVENT_TYPE': np.random.choice(['Payment', 'Transfer', 'Cash_Out', 'Debit'], size=num_customers),
-        'IS_DATA_RGS1': np.random.randint(0, 2, size=num_customers),
-        'IS_DATA_RGS7': np.random.randint(0, 2, size=num_customers),
-        'IS_DATA_RGS30': np.random.randint(0, 2, size=num_customers),
-        'IS_DATA_RGS90': np.random.randint(0, 2, size=num_customers),
-        'MAIN_ACCOUNT_AMOUNT': np.random.uniform(0, 10000, size=num_customers).round(2),
-        'EXTRA_TIME_LOAN_AMOUNT_RENT': np.random.uniform(0, 500, size=num_customers).round(2),
-        'EXTRA_TIME_LOAN_AMOUNT_TO_PAY_BACK': np.random.uniform(0, 500, size=num_customers).round(2),
-        'REFILL_MAIN_AMOUNT': np.random.uniform(0, 1000, size=num_customers).round(2),
-        'REFILL_mobile_money_ACCOUNT': np.random.uniform(0, 1000, size=num_customers).round(2),
-        'TOTAL_SPENT_MAIN_ACCOUNT': np.random.uniform(0, 5000, size=num_customers).round(2),
-        'TOTAL_SPENT_MOB_MONEY_ACCOUNT': np.random.uniform(0, 5000, size=num_customers).round(2),
-        'NB_package_GIFTS_SENT': np.random.randint(0, 10, size=num_customers),
-        'NB_package_GIFTS_RECEIVED': np.random.randint(0, 10, size=num_customers),
-        'AMOUNT_package_GIFTS_SENT': np.random.uniform(0, 1000, size=num_customers).round(2),
-        'AMOUNT_package_GIFTS_RECEIVED': np.random.uniform(0, 1000, size=num_customers).round(2),
-        'MOB_MONEY_ACCOUNT_AMOUNT': np.random.uniform(0, 10000, size=num_customers).round(2),
-        'TOTAL_LOADING_MONEY_IN_MOB_MONEY': np.random.uniform(0, 5000, size=num_customers).round(2),
-        'TOTAL_CASHOUT_MOB_MONEY_ACCOUNT': np.random.uniform(0, 5000, size=num_customers).round(2),
-        'TOTAL_CASHOUT_MOB_MONEY_FOR_package_PURCHASE': np.random.uniform(0, 2000, size=num_customers).round(2),
-        'TOTAL_CASHOUT_MOB_MONEY_TRANSFER_MONEY': np.random.uniform(0, 3000, size=num_customers).round(2)
-    })
-    
     user_data_csv = os.path.join(output_path, "simulated_USER_DATA_with_dates.csv")
     user_data_parquet = os.path.join(output_path, "simulated_USER_DATA_with_dates.parquet")
-    user_data.to_csv(user_data_csv, index=False)
-    user_data.to_parquet(user_data_parquet, index=False)
-
-    ######################################### KYC Data ###########################################
-    print("Simulation des données KYC...")
-    
-    # Générer les données KYC
+    kyc_data_csv = os.path.join(output_path, "simulated_KYC_DATA.csv")
+    kyc_data_parquet = os.path.join(output_path, "simulated_KYC_DATA.parquet")
+    for path in [user_data_csv, user_data_parquet, kyc_data_csv, kyc_data_parquet]:
+        remove_artifact(path)
+    if n_shards > 1:
+        os.makedirs(user_data_parquet)
+        os.makedirs(kyc_data_parquet)
 
-    # Ensure consistent dates: Use transaction_date range from the Transactions Dataset
-    transaction_dates = pd.to_datetime(transactions_df['transaction_date'])
-    start_transaction_date = transaction_dates.min()
-    end_transaction_date = transaction_dates.max()
+    shards = zip(
+        np.array_split(unique_customers, n_shards),
+        np.random.SeedSequence(seed).spawn(n_shards),
+        _shard_paths(user_data_parquet, n_shards),
+        _shard_paths(kyc_data_parquet, n_shards)
+    )
+    vocabularies = build_vocabularies(seed)
+    tasks = [
+        (sim_numbers, transaction_dates, seed_sequence, vocabularies, today, user_path, kyc_path)
+        for sim_numbers, seed_sequence, user_path, kyc_path in shards
+    ]
+    if n_shards == 1 or max_workers == 1:
+        for task in tasks:
+            _simulate_shard(*task)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(_simulate_shard, *zip(*tasks)))
 
-    # Generate acquisition dates before first event dates, and first event dates within the transaction date range
-    acquisition_dates = start_transaction_date - pd.to_timedelta(np.random.randint(30, 365, size=num_customers), unit='d')
-    first_event_dates = np.random.choice(transaction_dates, size=num_customers)
+    if n_shards > 1:
+        print("Simulation terminée.")
+        return [transactions_with_dates_csv, transactions_with_dates_parquet, user_data_parquet, kyc_data_parquet]
 
-    kyc_data = pd.DataFrame({
-        'SIM_NUMBER': unique_customers,
-        # Acquisition date happens before the first event date
-        'ACQUISITION_DATE': acquisition_dates,
-        'SIM_ACTIVATION_COMPLETION_TIME': np.random.randint(1, 48, size=num_customers),  # Time in hours
-        'CUST_CATEGORY': np.random.choice(['Individual', 'Business'], size=num_customers), # Revoir en fonction du Montant dans son Mobile Money
-        'REGION': [fake.state() for _ in range(num_customers)],
-        'TOWN': [fake.city() for _ in range(num_customers)],
-        'TERRITORY': [fake.state_abbr() for _ in range(num_customers)],
-        # First event date should align with transaction dates, slightly before or after acquisition
-        'FIRST_EVENT_DATE': first_event_dates,
-        'FIRST_NAME': [fake.first_name() for _ in range(num_customers)],
-        'LAST_NAME': [fake.last_name() for _ in range(num_customers)],
-        'GENDER': np.random.choice(['Male', 'Female'], size=num_customers),
-        'BIRTH_DATE': pd.to_datetime('today') - pd.to_timedelta(np.random.randint(18*365, 65*365, size=num_customers), unit='d'), # Majorité : 21 ans
-        'NATIONALITY': [fake.country() for _ in range(num_customers)],
-        'ID_TYPE': np.random.choice(['National ID', 'Passport', 'Driver\'s License'], size=num_customers),
-        'ID_NUMBER': [fake.ssn() for _ in range(num_customers)],
-        'ID_EXPIRY_DATE': pd.to_datetime('today') + pd.to_timedelta(np.random.randint(365, 3650, size=num_customers), unit='d'),
-        'HAS_SIM_NUM_PARENT': np.random.randint(0, 2, size=num_customers),
-        'REGISTRATION_STATUS': np.random.choice(['Accepted', 'Not Accepted'], size=num_customers),
-        'REGISTRATION_TYPE': np.random.choice(['New', 'Existing'], size=num_customers),
-        'LANG': np.random.choice(['French', 'English'], size=num_customers),
-        'IS_MOB_MONEY_MERCHANT': np.random.randint(0, 2, size=num_customers),
-        'IS_MOB_MONEY_USER': np.random.randint(0, 2, size=num_customers),
-        'DEVICE_TYPE': np.random.choice(['Smartphone', 'Feature phone'], size=num_customers)
-    })
-    
-    kyc_data_csv = os.path.join(output_path, "simulated_KYC_DATA.csv")
-    kyc_data_parquet = os.path.join(output_path, "simulated_KYC_DATA.parquet")
-    kyc_data.to_csv(kyc_data_csv, index=False)
-    kyc_data.to_parquet(kyc_data_parquet, index=False)
+    # Copies CSV, seulement pour une simulation en une part
+    pd.read_parquet(user_data_parquet).to_csv(user_data_csv, index=False)
+    pd.read_parquet(kyc_data_parquet).to_csv(kyc_data_csv, index=False)
 
     print("Simulation terminée.")
     
@@ -0,0 +1,269 @@
+import os
+import json
+import math
+import time
+import numpy as np
+import pandas as pd
+from src.artifact_store import filter_mask
+
+# Versions des fichiers de règles et de statistiques
+FILTER_RULES_FORMAT_VERSION = 1
+FILTER_STATS_FORMAT_VERSION = 1
+
+# Tables sur lesquelles portent les règles, filtrées avant la fusion
+RULE_TABLES = ['user_data', 'kyc']
+
+# Opérateurs des règles : ceux de `filter_mask`, plus 'between' (bornes [min, max] incluses)
+RULE_OPERATORS = ['==', '!=', '<', '<=', '>', '>=', 'in', 'not in', 'between']
+
+# Opérateurs acceptés sur l'âge, traduits en bornes de BIRTH_DATE avant le calcul de l'âge
+AGE_OPERATORS = ['==', '<', '<=', '>', '>=', 'between']
+
+########## Règles de pré-filtration ##########
+# Chaque règle porte sur une colonne d'une table (USER_DATA ou KYC) ; 'age' désigne l'âge en
+# années révolues, calculé à partir de BIRTH_DATE. Les règles sont combinées par un ET.
+# Le même format est lu par `load_filter_rules` dans un fichier JSON {"rules": [...]}.
+FILTER_RULES = [
+    {
+        'name': 'active_90_days',
+        'table': 'user_data',
+        'column': 'HAS_USED_MOB_MONEY_IN_LAST_90_DAYS',
+        'op': '==',
+        'value': 1
+    },
+    {
+        'name': 'age_range',
+        'table': 'kyc',
+        'column': 'age',
+        'op': 'between',
+        'value': [21, 60]
+    },
+    {
+        'name': 'kyc_accepted',
+        'table': 'kyc',
+        'column': 'REGISTRATION_STATUS',
+        'op': '==',
+        'value': 'Accepted'
+    }
+]
+
+
+def validate_filter_rules(rules):
+    """
+    Vérifie que des règles de pré-filtration sont complètes et utilisables.
+
+    Args:
+        rules (list): Règles (voir `FILTER_RULES`).
+
+    Raises:
+        ValueError: Si une règle est incomplète, porte sur une table ou un opérateur inconnu,
+                    ou si deux règles ont le même nom.
+
+    Returns:
+        list: Les mêmes règles.
+    """
+    names = set()
+    for rule in rules:
+        missing = [key for key in ['name', 'table', 'column', 'op', 'value'] if key not in rule]
+        if missing:
+            raise ValueError(f"Règle de filtrage incomplète {rule} : clés manquantes {missing}.")
+        if rule['name'] in names:
+            raise ValueError(f"Règle de filtrage en double : {rule['name']}.")
+        names.add(rule['name'])
+        if rule['table'] not in RULE_TABLES:
+            raise ValueError(f"Table inconnue pour la règle {rule['name']} : {rule['table']} (attendue : {RULE_TABLES}).")
+        if rule['op'] not in RULE_OPERATORS:
+            raise ValueError(f"Opérateur non supporté pour la règle {rule['name']} : {rule['op']}.")
+        if rule['column'] == 'age' and rule['op'] not in AGE_OPERATORS:
+            raise ValueError(f"Opérateur non supporté sur l'âge pour la règle {rule['name']} : {rule['op']}.")
+        if rule['op'] == 'between' and len(rule['value']) != 2:
+            raise ValueError(f"La règle {rule['name']} attend deux bornes [min, max].")
+    return rules
+
+
+def load_filter_rules(path):
+    """
+    Charge des règles de pré-filtration depuis un fichier JSON {"format_version": 1, "rules": [...]}.
+
+    Args:
+        path (str): Chemin du fichier de règles.
+
+    Raises:
+        ValueError: Si la version du format n'est pas supportée ou si une règle est invalide.
+
+    Returns:
+        list: Règles, dans l'ordre du fichier.
+    """
+    with open(path, encoding='utf-8') as f:
+        config = json.load(f)
+
+    if config.get('format_version') != FILTER_RULES_FORMAT_VERSION:
+        raise ValueError(
+            f"Version du fichier de règles non supportée : {config.get('format_version')} "
+            f"(attendue : {FILTER_RULES_FORMAT_VERSION})."
+        )
+    return validate_filter_rules(config['rules'])
+
+
+def _age_predicates(op, value, current_date):
+    """
+    Traduit une condition sur l'âge en bornes de BIRTH_DATE.
+
+    L'âge de `prepare_kyc_data` vaut int(jours / 365.25) : il est au moins a si et seulement si
+    la naissance date d'au moins ceil(a × 365.25) jours, et au plus b si elle date de moins de
+    ceil((b + 1) × 365.25) jours.
+    """
+    def born_before(age):
+        return ('BIRTH_DATE', '<=', current_date - pd.Timedelta(days=math.ceil(age * 365.25)))
+
+    def born_after(age):
+        return ('BIRTH_DATE', '>', current_date - pd.Timedelta(days=math.ceil((age + 1) * 365.25)))
+
+    if op == 'between':
+        min_age, max_age = value
+    else:
+        # Âges entiers : > a équivaut à >= a + 1, < b à <= b - 1
+        min_age = value + 1 if op == '>' else value if op in ['==', '>='] else None
+        max_age = value - 1 if op == '<' else value if op in ['==', '<='] else None
+    predicates = []
+    if min_age is not None:
+        predicates.append(born_before(min_age))
+    if max_age is not None:
+        predicates.append(born_after(max_age))
+    return predicates
+
+
+def _rule_predicates(rule, current_date=None):
+    """Filtres [(colonne, opérateur, valeur), ...] d'une règle ; l'âge est traduit si `current_date` est fourni."""
+    if rule['column'] == 'age' and current_date is not None:
+        return _age_predicates(rule['op'], rule['value'], current_date)
+    if rule['op'] == 'between':
+        return [(rule['column'], '>=', rule['value'][0]), (rule['column'], '<=', rule['value'][1])]
+    return [(rule['column'], rule['op'], rule['value'])]
+
+
+def _rule_rank(rule_stats):
+    """
+    Rang d'une règle d'après sa dernière exécution : coût par ligne divisé par la part de lignes
+    rejetées. Évaluer les règles par rang croissant (les moins chères et les plus sélectives
+    d'abord) minimise le coût total d'une conjonction. Sans statistique, le rang est nul.
+    """
+    if not rule_stats or not rule_stats['evaluated']:
+        return 0.0
+    rejected = rule_stats['rejected'] / rule_stats['evaluated']
+    if rejected == 0:
+        return math.inf
+    return rule_stats['seconds'] / rule_stats['evaluated'] / rejected
+
+
+def compile_filter_rules(rules=FILTER_RULES, table=None, current_date=None, stats=None):
+    """
+    Compile des règles en un plan d'évaluation : filtres de chaque règle, triés par sélectivité observée.
+
+    Args:
+        rules (list): Règles (voir `FILTER_RULES`).
+        table (str, optional): Ne garder que les règles de cette table ('user_data' ou 'kyc').
+        current_date (pd.Timestamp, optional): Date de référence de l'âge. Si elle est fournie, les
+                                               règles sur 'age' portent sur BIRTH_DATE (données KYC
+                                               brutes) ; sinon, sur la colonne 'age' (données fusionnées).
+        stats (dict, optional): Statistiques de la dernière exécution par règle (voir `load_filter_stats`).
+                                Sans statistiques, l'ordre des règles est conservé.
+
+    Returns:
+        list: Règles compilées {'name', 'table', 'columns', 'predicates'}, dans l'ordre d'évaluation.
+    """
+    stats = stats or {}
+    plan = []
+    for rule in validate_filter_rules(rules):
+        if table is not None and rule['table'] != table:
+            continue
+        predicates = _rule_predicates(rule, current_date)
+        plan.append({
+            'name': rule['name'],
+            'table': rule['table'],
+            'columns': list(dict.fromkeys(column for column, _, _ in predicates)),
+            'predicates': predicates
+        })
+    return sorted(plan, key=lambda rule: _rule_rank(stats.get(rule['name'])))
+
+
+def plan_filters(plan):
+    """
+    Filtres de toutes les règles d'un plan, à pousser dans la lecture d'un artefact (`read_artifact`).
+
+    Args:
+        plan (list): Plan renvoyé par `compile_filter_rules`.
+
+    Returns:
+        list: Filtres [(colonne, opérateur, valeur), ...].
+    """
+    return [predicate for rule in plan for predicate in rule['predicates']]
+
+
+def apply_filter_rules(data, plan):
+    """
+    Évalue un plan de règles en un seul masque, chaque règle n'étant évaluée que sur les lignes
+    retenues par les précédentes : les lignes ne sont copiées qu'une fois, à la fin.
+
+    Args:
+        data (pd.DataFrame): Données à filtrer.
+        plan (list): Plan renvoyé par `compile_filter_rules`.
+
+    Returns:
+        tuple: (lignes retenues (pd.DataFrame), statistiques par règle dans l'ordre d'évaluation :
+               'name', 'table', 'evaluated', 'passed', 'rejected' et 'seconds').
+    """
+    rows = np.arange(len(data))
+    stats = []
+    for rule in plan:
+        start = time.perf_counter()
+        columns = data[rule['columns']]
+        if len(rows) < len(data):
+            columns = columns.take(rows)
+        passed = filter_mask(columns, rule['predicates']).to_numpy()
+        evaluated = len(rows)
+        rows = rows[passed]
+        stats.append({
+            'name': rule['name'],
+            'table': rule['table'],
+            'evaluated': evaluated,
+            'passed': len(rows),
+            'rejected': evaluated - len(rows),
+            'seconds': time.perf_counter() - start
+        })
+    filtered_data = data if len(rows) == len(data) else data.take(rows)
+    return filtered_data, stats
+
+
+def save_filter_stats(stats, path):
+    """
+    Sauvegarde les statistiques par règle d'une exécution au format JSON.
+
+    Args:
+        stats (list): Statistiques renvoyées par `apply_filter_rules`.
+        path (str): Chemin du fichier JSON à écrire.
+
+    Returns:
+        None
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'format_version': FILTER_STATS_FORMAT_VERSION, 'rules': stats}, f, indent=2)
+
+
+def load_filter_stats(path):
+    """
+    Charge les statistiques de la dernière exécution, pour ordonner les règles.
+
+    Args:
+        path (str): Chemin du fichier JSON de statistiques.
+
+    Returns:
+        dict: Statistiques par nom de règle ; vide si le fichier n'existe pas ou a une autre version.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        saved = json.load(f)
+    if saved.get('format_version') != FILTER_STATS_FORMAT_VERSION:
+        return {}
+    return {rule_stats['name']: rule_stats for rule_stats in saved['rules']}
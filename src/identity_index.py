@@ -0,0 +1,288 @@
+import os
+import glob
+import numpy as np
+import pandas as pd
+from src.artifact_store import read_artifact, write_artifact
+
+# Colonnes définissant l'identité d'un client
+IDENTITY_COLUMNS = ['ID_TYPE', 'ID_NUMBER']
+
+# Hash réservé aux SIM sans pièce d'identité (ID_TYPE ou ID_NUMBER manquant)
+NULL_IDENTITY = np.uint64(0)
+
+
+def identity_hash(data):
+    """
+    Calcule un hash 64 bits de l'identité (ID_TYPE, ID_NUMBER) de chaque ligne.
+
+    Les colonnes sont hachées sous forme de chaînes, pour que le hash ne dépende pas du type
+    de stockage (ex: ID_NUMBER lu comme entier depuis un CSV ou comme chaîne depuis Parquet).
+
+    Args:
+        data (pd.DataFrame): Données contenant 'ID_TYPE' et 'ID_NUMBER'.
+
+    Returns:
+        np.ndarray: Hash de chaque ligne (uint64), `NULL_IDENTITY` si l'identité est incomplète.
+    """
+    identities = data[IDENTITY_COLUMNS]
+    hashes = pd.util.hash_pandas_object(identities.astype(str), index=False).to_numpy(dtype=np.uint64)
+    hashes[identities.isna().any(axis=1).to_numpy()] = NULL_IDENTITY
+    return hashes
+
+
+class IdentityIndex:
+    """
+    Index persistant identité ↔ SIM, pour détecter les clients multi-SIM sans regrouper toute la base.
+
+    Chaque SIM est associée au hash 64 bits de l'identité (ID_TYPE, ID_NUMBER) de son
+    enregistrement KYC ; le nombre de SIM de chaque identité est tenu à jour à chaque ajout.
+    Les recherches par SIM passent par une table de hachage (O(1) par SIM). Les SIM d'une
+    identité (`sims`) sont lues dans une vue triée par hash d'identité, par recherche
+    dichotomique (O(log n) par identité) ; cette vue est reconstruite après chaque `upsert`.
+    L'index est mis à jour par `upsert` avec les nouveaux enregistrements KYC (ex: le delta du
+    jour), sans relire les enregistrements déjà indexés.
+
+    Les mises à jour n'ajoutent ou ne modifient que des SIM : une SIM retirée du KYC n'est jamais
+    supprimée de l'index et reste comptée parmi les SIM de son identité.
+
+    Args:
+        sim_numbers (array-like, optional): SIM déjà indexées.
+        identity_hashes (array-like, optional): Hash d'identité de chacune de ces SIM.
+    """
+
+    def __init__(self, sim_numbers=None, identity_hashes=None):
+        sim_numbers = [] if sim_numbers is None else sim_numbers
+        identity_hashes = [] if identity_hashes is None else identity_hashes
+        self._identities = pd.Series(
+            np.asarray(identity_hashes, dtype=np.uint64), index=pd.Index(sim_numbers, name='SIM_NUMBER')
+        )
+        known = self._identities[self._identities != NULL_IDENTITY]
+        self._sim_counts = known.value_counts()
+        self._by_identity = None
+
+    def __len__(self):
+        return len(self._identities)
+
+    def upsert(self, kyc_records):
+        """
+        Ajoute ou met à jour des enregistrements KYC (un enregistrement par SIM, le dernier l'emporte).
+
+        Args:
+            kyc_records (pd.DataFrame): Enregistrements contenant 'SIM_NUMBER', 'ID_TYPE' et 'ID_NUMBER'.
+
+        Returns:
+            IdentityIndex: L'index lui-même.
+        """
+        records = kyc_records.drop_duplicates(subset='SIM_NUMBER', keep='last')
+        sim_numbers = records['SIM_NUMBER'].to_numpy()
+        new_hashes = identity_hash(records)
+
+        positions = self._identities.index.get_indexer(sim_numbers)
+        is_known = positions >= 0
+        old_hashes = self._identities.to_numpy()[positions[is_known]]
+
+        # Seules les SIM nouvelles ou dont l'identité a changé modifient les comptages
+        is_changed = old_hashes != new_hashes[is_known]
+        removed = old_hashes[is_changed]
+        added = np.concatenate([new_hashes[is_known][is_changed], new_hashes[~is_known]])
+        self._sim_counts = self._sim_counts.sub(
+            pd.Series(removed[removed != NULL_IDENTITY]).value_counts(), fill_value=0
+        ).add(
+            pd.Series(added[added != NULL_IDENTITY]).value_counts(), fill_value=0
+        )
+        self._sim_counts = self._sim_counts[self._sim_counts > 0].astype(np.int64)
+        self._sim_counts.index = self._sim_counts.index.astype(np.uint64)
+
+        identities = self._identities.to_numpy().copy()
+        identities[positions[is_known]] = new_hashes[is_known]
+        index = self._identities.index
+        if not is_known.all():
+            new_sims = sim_numbers[~is_known]
+            index = pd.Index(
+                np.concatenate([index.to_numpy(), new_sims]) if len(index) else new_sims, name='SIM_NUMBER'
+            )
+            identities = np.concatenate([identities, new_hashes[~is_known]])
+        self._identities = pd.Series(identities, index=index)
+        self._by_identity = None
+        return self
+
+    def lookup(self, sim_numbers):
+        """
+        Renvoie le hash d'identité de chaque SIM.
+
+        Args:
+            sim_numbers (array-like): SIM à rechercher.
+
+        Raises:
+            KeyError: Si une SIM n'est pas indexée (l'index doit être mis à jour avec le KYC).
+
+        Returns:
+            np.ndarray: Hash d'identité de chaque SIM (uint64).
+        """
+        positions = self._identities.index.get_indexer(np.asarray(sim_numbers))
+        if (positions < 0).any():
+            missing = np.asarray(sim_numbers)[positions < 0]
+            raise KeyError(f"{len(missing)} SIM absentes de l'index d'identités (ex: {missing[:5].tolist()}).")
+        return self._identities.to_numpy()[positions]
+
+    def sim_counts(self, sim_numbers):
+        """
+        Renvoie, pour chaque SIM, le nombre de SIM indexées avec la même identité.
+
+        Args:
+            sim_numbers (array-like): SIM à rechercher.
+
+        Returns:
+            np.ndarray: Nombre de SIM de l'identité de chaque SIM (0 si l'identité est incomplète).
+        """
+        hashes = self.lookup(sim_numbers)
+        positions = self._sim_counts.index.get_indexer(hashes)
+        return np.where(positions >= 0, self._sim_counts.to_numpy()[positions], 0)
+
+    def sims(self, identity_hashes):
+        """
+        Renvoie les SIM indexées de chaque identité.
+
+        Args:
+            identity_hashes (array-like): Hash d'identité à rechercher (voir `identity_hash`).
+
+        Returns:
+            list: Pour chaque hash, tableau (np.ndarray) des SIM de cette identité, vide si
+                  l'identité n'est pas indexée.
+        """
+        if self._by_identity is None:
+            order = np.argsort(self._identities.to_numpy(), kind='stable')
+            self._by_identity = (self._identities.to_numpy()[order], self._identities.index.to_numpy()[order])
+        sorted_hashes, sorted_sims = self._by_identity
+
+        hashes = np.asarray(identity_hashes, dtype=np.uint64)
+        starts = np.searchsorted(sorted_hashes, hashes, side='left')
+        ends = np.searchsorted(sorted_hashes, hashes, side='right')
+        return [sorted_sims[start:end] for start, end in zip(starts, ends)]
+
+    def save(self, path):
+        """
+        Sauvegarde l'index (une ligne par SIM : SIM_NUMBER, IDENTITY_HASH).
+
+        Args:
+            path (str): Chemin de l'artefact (ex: 'data/processed/identity_index.parquet').
+
+        Returns:
+            None
+        """
+        write_artifact(self.to_frame(), path)
+
+    def to_frame(self):
+        """Renvoie l'index sous forme de DataFrame (SIM_NUMBER, IDENTITY_HASH)."""
+        return pd.DataFrame({
+            'SIM_NUMBER': self._identities.index.to_numpy(),
+            'IDENTITY_HASH': self._identities.to_numpy()
+        })
+
+    @classmethod
+    def load(cls, path):
+        """
+        Charge un index sauvegardé par `save`, ou renvoie un index vide si le fichier n'existe pas.
+
+        Args:
+            path (str): Chemin de l'artefact.
+
+        Returns:
+            IdentityIndex: Index chargé.
+        """
+        if not os.path.exists(path):
+            return cls()
+        return cls.from_frame(read_artifact(path))
+
+    @classmethod
+    def from_frame(cls, table):
+        """
+        Reconstruit un index à partir de sa forme tabulaire (voir `to_frame`).
+
+        Args:
+            table (pd.DataFrame): Colonnes SIM_NUMBER et IDENTITY_HASH.
+
+        Returns:
+            IdentityIndex: Index reconstruit.
+        """
+        return cls(table['SIM_NUMBER'].to_numpy(), table['IDENTITY_HASH'].to_numpy(dtype=np.uint64))
+
+
+def kyc_part_signatures(kyc_data_path):
+    """
+    Signature (taille, date de modification) de chaque fichier d'un artefact KYC, sans le lire.
+
+    Args:
+        kyc_data_path (str): Chemin de l'artefact KYC (un fichier unique ou un répertoire de parts).
+
+    Returns:
+        pd.DataFrame: Une ligne par fichier : PART (chemin relatif à l'artefact), SIZE et MTIME_NS.
+    """
+    if os.path.isdir(kyc_data_path):
+        extension = os.path.splitext(os.path.normpath(kyc_data_path))[1]
+        files = sorted(glob.glob(os.path.join(kyc_data_path, '**', f'*{extension}'), recursive=True))
+    else:
+        files = [kyc_data_path]
+    return pd.DataFrame({
+        'PART': [os.path.relpath(f, kyc_data_path) if f != kyc_data_path else '' for f in files],
+        'SIZE': np.array([os.path.getsize(f) for f in files], dtype=np.int64),
+        'MTIME_NS': np.array([os.stat(f).st_mtime_ns for f in files], dtype=np.int64)
+    })
+
+
+def upsert_kyc_changes(identity_index, kyc_data_path, indexed_parts=None):
+    """
+    Met à jour l'index avec les seuls fichiers KYC nouveaux ou modifiés depuis la dernière mise à jour.
+
+    Les fichiers d'un artefact KYC partitionné dont la taille et la date de modification n'ont
+    pas changé ne sont ni relus ni hachés à nouveau : ajouter le delta du jour comme nouvelle part
+    du répertoire KYC ne coûte que la lecture de ce delta. Un fichier KYC unique modifié est relu
+    en entier.
+
+    Args:
+        identity_index (IdentityIndex): Index à mettre à jour.
+        kyc_data_path (str): Chemin de l'artefact KYC.
+        indexed_parts (pd.DataFrame, optional): Signatures des fichiers déjà indexés, renvoyées par
+                                                l'appel précédent. Si None, tous les fichiers sont lus.
+
+    Returns:
+        pd.DataFrame: Signatures des fichiers KYC désormais indexés (voir `kyc_part_signatures`).
+    """
+    parts = kyc_part_signatures(kyc_data_path)
+    is_changed = np.ones(len(parts), dtype=bool)
+    if indexed_parts is not None:
+        is_changed = parts.merge(indexed_parts, on=['PART', 'SIZE', 'MTIME_NS'], how='left', indicator=True)[
+            '_merge'
+        ].eq('left_only').to_numpy()
+
+    for part in parts['PART'][is_changed]:
+        part_path = os.path.join(kyc_data_path, part) if part else kyc_data_path
+        identity_index.upsert(read_artifact(part_path, columns=['SIM_NUMBER'] + IDENTITY_COLUMNS))
+    print(f"Index d'identités : {is_changed.sum()} fichier(s) KYC nouveau(x) ou modifié(s) sur {len(parts)}.")
+    return parts
+
+
+def update_identity_index(kyc_data_path, index_path):
+    """
+    Met à jour l'index d'identités sauvegardé avec un fichier KYC (complet ou delta).
+
+    Args:
+        kyc_data_path (str): Chemin des enregistrements KYC.
+        index_path (str): Chemin de l'index (créé s'il n'existe pas).
+
+    Returns:
+        IdentityIndex: Index mis à jour.
+    """
+    identity_index = IdentityIndex.load(index_path)
+    identity_index.upsert(read_artifact(kyc_data_path, columns=['SIM_NUMBER'] + IDENTITY_COLUMNS))
+    identity_index.save(index_path)
+    return identity_index
+
+
+if __name__ == "__main__":
+    # Mise à jour de l'index avec le fichier KYC
+    kyc_data_path = "data/raw/simulated_KYC_DATA.parquet"
+    index_path = "data/processed/identity_index.parquet"
+
+    identity_index = update_identity_index(kyc_data_path, index_path)
+    print(f"Index d'identités mis à jour : {len(identity_index)} SIM indexées dans {index_path}")
@@ -1,169 +1,370 @@
 import os
-import pandas as pd
-from src.data_simulation import simulate_data
-from src.data_processing import load_and_merge_data
-from src.data_filtering import filter_data
+import sys
+from src.artifact_store import artifact_path, read_artifact, write_artifact
+from src.data_simulation import simulate_data, DEFAULT_SEED
+from src.data_processing import build_kyc_index, load_and_merge_data
+from src.schema import apply_schema, reader_dtypes
+from src.data_filtering import load_filtered_data
+from src.filter_rules import FILTER_RULES, load_filter_rules
 from src.scoring_and_profiling import calculate_all_scores, generate_profile_code
 from src.segmentation import segment_profiles
-from src.cash_allocation import calculate_individual_credits, calculate_business_credits
+from src.cash_allocation import allocate_credits
 from src.multi_sim_management import manage_multi_sim_clients, validate_final_clients
-from src.bonus_malus_calculation import process_transactions, update_transactions, calculate_bonus_malus, update_loans_with_bonus_malus
+from src.identity_index import IdentityIndex, upsert_kyc_changes
+from src.bonus_malus_calculation import (
+    LOAN_COLUMNS,
+    resolve_reference_month,
+    aggregate_transactions,
+    run_bonus_malus
+)
+from src.chunked_pipeline import run_chunked_pipeline, DEFAULT_CHUNKSIZE
+from src.pipeline_runner import run_pipeline
 
-def main():
-    # Définir les chemins des fichiers
-    base_path = os.getcwd()
-    raw_data_path = os.path.join(base_path, "data", "raw")
-    processed_data_path = os.path.join(base_path, "data", "processed")
-    
-    user_data_path = os.path.join(raw_data_path, "simulated_USER_DATA_with_dates.csv")
-    kyc_data_path = os.path.join(raw_data_path, "simulated_KYC_DATA.csv")
-    merged_data_path = os.path.join(processed_data_path, "merged_data.csv")
-    filtered_data_path = os.path.join(processed_data_path, "filtered_data.csv")
-    scored_data_path = os.path.join(processed_data_path, "scored_data.csv")
-    segmented_data_path = os.path.join(processed_data_path, "segmented_data.csv")
-    cash_allocated_data_path = os.path.join(processed_data_path, "cash_allocated_data.csv")
-    final_clients_path = os.path.join(processed_data_path, "final_clients.csv")
-
-    transactions_file = os.path.join(raw_data_path, "real_transactions_with_dates.csv")
-    final_clients_file = os.path.join(processed_data_path, "final_clients.csv")
-    transactions_previous_month_file = os.path.join(processed_data_path, "transactions_previous_month.csv")
-    final_clients_with_bonus_malus_file = os.path.join(processed_data_path, "final_clients_with_bonus_malus.csv")
-    final_clients_with_updated_loans_file = os.path.join(processed_data_path, "final_clients_with_updated_loans.csv")
-    
-    # Étape 1 : Simulation des données
-    print("Étape 1 : Simulation des données...")
-    simulate_data(raw_data_path)
+
+########## Étapes du pipeline ##########
+def _simulation_stage(inputs, paths, config):
+    raw_data_path = os.path.dirname(paths['user_data'])
+    simulate_data(raw_data_path, seed=config['seed'], n_shards=config['n_shards'])
     print(f"Données simulées sauvegardées dans {raw_data_path}")
-    
-    # Étape 2 : Fusion des données
-    print("Étape 2 : Fusion des données...")
-    merged_data = load_and_merge_data(user_data_path, kyc_data_path)
-    merged_data.to_csv(merged_data_path, index=False)
-    print(f"Fichier fusionné sauvegardé dans {merged_data_path}")
-    
-    # Étape 3 : 
-    print("Étape 3 : Veuillez exécuter le Notebook EDA dans notebooks/EDA_merged_data.ipynb.")
-
-    # Étape 4 : Pré-filtration des données clients
-    print("Étape 4 : Pré-filtration des données clients...")
-    filtered_data = filter_data(merged_data)
-    filtered_data.to_csv(filtered_data_path, index=False)
-    print(f"Fichier filtré sauvegardé dans {filtered_data_path}")
-
-    # Étape 5 : Rappel pour l'EDA sur filtered_data
-    print("Étape 5 : Veuillez exécuter le Notebook EDA dans notebooks/EDA_filtered_data.ipynb.")
-    
-    # Étape 6 : Scoring et génération des profils
-    try:
-        print("Étape 6 : Calcul des scores et génération des profils...")
-        filtered_data = calculate_all_scores(filtered_data)
-        scored_data = generate_profile_code(filtered_data)
-
-        # Sauvegarde des données scorées
-        scored_data.to_csv(scored_data_path, index=False)
-        print(f"Fichier scoré sauvegardé dans {scored_data_path}")
-
-    except Exception as e:
-        print(f"Erreur lors de l'étape 6 : {e}")
-        print("Veuillez vérifier scoring_and_profiling.py pour diagnostiquer le problème.")
-
-    # Étape 7 : Analyse exploratoire des résultats de scoring et de profiling
-    print("Étape 7 : Veuillez exécuter le Notebook EDA dans notebooks/EDA_scored_data.ipynb.")
-
-    # Étape 8 : Segmentation des profils
-    print("Étape 8 : Segmentation des profils...")
-    try:
-        scored_data = pd.read_csv(scored_data_path)
-        segmented_data = segment_profiles(scored_data)
-        segmented_data.to_csv(segmented_data_path, index=False)
-        print(f"Données segmentées sauvegardées dans {segmented_data_path}")
-    except Exception as e:
-        print(f"Erreur lors de l'étape 8 : {e}")
-        print("Veuillez vérifier segmentation.py pour diagnostiquer le problème.")
-
-    # Étape 9 : Analyse des segments
-    print("Étape 9 : Veuillez exécuter le Notebook EDA dans notebooks/EDA_segments.ipynb.")
-
-    # Étape 10 : Attribution des crédits
-    print("Étape 10 : Attribution des crédits...")
-    try:
-        segmented_data = pd.read_csv(segmented_data_path)
-
-        # Appliquer les fonctions d'attribution
-        segmented_data[['Nano_Loan', 'Advanced_Credit']] = segmented_data.apply(
-            calculate_individual_credits, axis=1, result_type='expand'
-        )
-        segmented_data[['Macro_Loan', 'Cash_Roller_Over']] = segmented_data.apply(
-            calculate_business_credits, axis=1, result_type='expand'
-        )
 
-        # Sauvegarder les résultats
-        segmented_data.to_csv(cash_allocated_data_path, index=False)
-        print(f"Données avec crédits sauvegardées dans {cash_allocated_data_path}")
-    except Exception as e:
-        print(f"Erreur lors de l'étape 10 : {e}")
-        print("Veuillez vérifier cash_allocation.py pour diagnostiquer le problème.")
-
-    # Étape 11 : Analyse des crédits alloués
-    print("Étape 11 : Veuillez exécuter le Notebook EDA dans notebooks/EDA_cash_allocated.ipynb.")
-
-
-    # Étape 12 : Gestion des clients avec plusieurs SIM
-    print("Étape 12 : Gestion des clients avec plusieurs SIM...")
-    try:
-        cash_allocated_data = pd.read_csv(cash_allocated_data_path)
-        final_clients = manage_multi_sim_clients(cash_allocated_data)
-        validate_final_clients(final_clients)
-        final_clients.to_csv(final_clients_path, index=False)
-        print(f"Données finales sauvegardées dans {final_clients_path}")
-    except Exception as e:
-        print(f"Erreur lors de l'étape 12 : {e}")
-        print("Veuillez vérifier multi_sim_management.py pour diagnostiquer le problème.")
-
-    
-    # Étape 13 : Implémentation des bonus/malus
-    try:
-        print("Étape 13 : Implémentation des bonus/malus...")
-
-        # Étape a: Créer le DataFrame des transactions pour le mois précédent
-        print("Traitement des transactions pour le mois précédent...")
-        process_transactions(transactions_file, transactions_previous_month_file)
-
-        # Étape b: Mise à jour des transactions avec les informations des clients finaux
-        print("Mise à jour des transactions avec les données des clients finaux...")
-        update_transactions(
-            transactions_previous_month_file,
-            final_clients_file,
-            transactions_previous_month_file
-        )
 
-        # Étape c: Calcul des bonus/malus
-        print("Calcul des bonus/malus pour les clients...")
-        calculate_bonus_malus(
-            transactions_previous_month_file,
-            final_clients_file,
-            final_clients_with_bonus_malus_file
-        )
+def _kyc_index_stage(inputs, paths, config):
+    return {'kyc_index': build_kyc_index(apply_schema(read_artifact(paths['kyc_data'], dtypes=reader_dtypes())))}
+
+
+def _merge_stage(inputs, paths, config):
+    return {'merged': load_and_merge_data(paths['user_data'], paths['kyc_data'], kyc_index=inputs['kyc_index'])}
+
+
+def _filter_stage(inputs, paths, config):
+    # Les filtres sont appliqués à la lecture de USER_DATA et à l'index KYC, avant la fusion
+    return {'filtered': load_filtered_data(
+        paths['user_data'], kyc_index=inputs['kyc_index'], rules=config['rules'], stats_path=paths['filter_stats']
+    )}
+
+
+def _scoring_stage(inputs, paths, config):
+    filtered_data = calculate_all_scores(inputs['filtered'])
+    return {'scored': generate_profile_code(filtered_data)}
+
+
+def _segmentation_stage(inputs, paths, config):
+    return {'segmented': segment_profiles(inputs['scored'], method=config['method'])}
+
+
+def _cash_allocation_stage(inputs, paths, config):
+    return {'cash_allocated': allocate_credits(inputs['segmented'])}
+
+
+def _multi_sim_stage(inputs, paths, config):
+    # L'index de l'exécution précédente n'est mis à jour qu'avec les fichiers KYC nouveaux ou
+    # modifiés depuis ; sans index précédent, il est construit à partir de tout le KYC.
+    # Les SIM retirées du KYC ne sont jamais supprimées de l'index.
+    identity_index, indexed_parts = IdentityIndex(), None
+    if os.path.exists(paths['identity_index']) and os.path.exists(paths['identity_index_parts']):
+        identity_index = IdentityIndex.from_frame(inputs['identity_index'])
+        indexed_parts = inputs['identity_index_parts']
+    indexed_parts = upsert_kyc_changes(identity_index, paths['kyc_data'], indexed_parts)
+
+    final_clients = manage_multi_sim_clients(inputs['cash_allocated'], identity_index)
+    # Une table finale qui ne respecte pas les invariants arrête le pipeline avant les bonus/malus
+    validate_final_clients(final_clients, identity_index, raise_on_breach=True)
+    return {
+        'final_clients': final_clients,
+        'identity_index': identity_index.to_frame(),
+        'identity_index_parts': indexed_parts
+    }
+
 
-        # Étape d: Mise à jour des prêts des clients avec le bonus/malus
-        print("Mise à jour des prêts des clients avec le bonus/malus...")
-        update_loans_with_bonus_malus(
-            final_clients_with_bonus_malus_file,
-            final_clients_with_updated_loans_file
+def _chunked_stage(inputs, paths, config):
+    print(f"Exécution par blocs de {config['chunksize']} lignes...")
+    run_chunked_pipeline(
+        paths['user_data'], paths['kyc_data'], os.path.dirname(paths['final_clients']),
+        chunksize=config['chunksize'], filter_rules=config['rules']
+    )
+    print(f"Données finales sauvegardées dans {paths['final_clients']}")
+
+
+def _bonus_malus_stage(inputs, paths, config):
+    # Étape a: Calculer les soldes au 15 et au dernier jour du mois de référence (ce mois seulement)
+    reference_month = resolve_reference_month(paths['transactions'], config['reference_month'])
+    print(f"Traitement des transactions du mois de référence {reference_month}...")
+    balances = aggregate_transactions(paths['transactions'], reference_month, backend=config['backend'])
+
+    # Étape b: Calcul des bonus/malus et mise à jour des prêts, en mémoire
+    print("Calcul des bonus/malus et mise à jour des prêts des clients...")
+    transactions_previous_month, final_clients = run_bonus_malus(balances, inputs['final_clients'])
+
+    outputs = {'final_clients_with_updated_loans': final_clients}
+    if config['checkpoints']:
+        outputs['transactions_previous_month'] = transactions_previous_month
+        outputs['final_clients_with_bonus_malus'] = final_clients.drop(
+            columns=[f"{loan_type}_updated" for loan_type in LOAN_COLUMNS]
         )
+    return outputs
+
+
+def build_pipeline_stages(chunked=False, chunksize=DEFAULT_CHUNKSIZE, segmentation_method='percentile',
+                          transactions_backend='pandas', bonus_malus_checkpoints=False, reference_month=None,
+                          seed=DEFAULT_SEED, simulation_shards=1, merged_checkpoint=False, filter_rules=FILTER_RULES):
+    """
+    Décrit les étapes du pipeline, leurs entrées et leurs sorties (voir `run_pipeline`).
+
+    Args:
+        chunked (bool): Si True, les étapes 2 à 12 sont remplacées par une exécution par blocs.
+        chunksize (int): Nombre de lignes par bloc en mode chunked.
+        segmentation_method (str): Méthode de segmentation ('percentile' ou 'equal_frequency').
+        transactions_backend (str): Moteur de traitement des transactions ('pandas' ou 'dask').
+        bonus_malus_checkpoints (bool): Si True, l'étape 13 sauvegarde aussi ses résultats intermédiaires
+                                        (transactions_previous_month et final_clients_with_bonus_malus).
+        reference_month (str, optional): Mois des relevés de solde du calcul des bonus/malus (ex: '2024-11').
+                                         Par défaut, le dernier mois complet des transactions.
+        seed (int): Graine de la simulation des données.
+        simulation_shards (int): Nombre de parts de la simulation, simulées en parallèle.
+        merged_checkpoint (bool): Si True, la base fusionnée complète (merged_data) est aussi sauvegardée.
+                                  Sinon, seules les lignes retenues par la pré-filtration sont fusionnées.
+        filter_rules (list): Règles de pré-filtration (voir `FILTER_RULES`).
+
+    Raises:
+        ValueError: Si la segmentation 'equal_frequency' est demandée en mode chunked.
+
+    Returns:
+        list: Étapes du pipeline, dans l'ordre d'exécution.
+    """
+    if chunked and segmentation_method != 'percentile':
+        # Les rangs exacts demandent toute la population : le mode chunked découpe par percentiles
+        raise ValueError("Le mode chunked ne supporte que la segmentation 'percentile'.")
+
+    simulation = [{
+        'name': 'simulation', 'step': 1, 'description': "Simulation des données",
+        'inputs': ['paysim'], 'outputs': ['user_data', 'kyc_data', 'transactions'],
+        'run': _simulation_stage, 'in_memory': False, 'config': {'seed': seed, 'n_shards': simulation_shards},
+        'code': ['src.data_simulation', 'src.transactions_store']
+    }]
+
+    if chunked:
+        core = [{
+            'name': 'chunked', 'step': '2 à 12', 'description': "Exécution par blocs",
+            'inputs': ['user_data', 'kyc_data'], 'outputs': ['filtered', 'scored', 'cash_allocated', 'final_clients'],
+            'run': _chunked_stage, 'in_memory': False, 'config': {'chunksize': chunksize, 'rules': filter_rules},
+            'code': [
+                'src.chunked_pipeline', 'src.quantile_sketch', 'src.data_processing', 'src.schema', 'src.data_filtering',
+                'src.filter_rules', 'src.scoring_functions', 'src.profile_codes', 'src.segmentation',
+                'src.cash_allocation', 'src.multi_sim_management'
+            ]
+        }]
+    else:
+        # La base fusionnée complète n'est écrite que sur demande : la pré-filtration lit directement
+        # USER_DATA et l'index KYC
+        merge = [{
+            'name': 'merge', 'step': 2, 'description': "Fusion des données",
+            'inputs': ['user_data', 'kyc_index'], 'outputs': ['merged'],
+            'run': _merge_stage, 'code': ['src.data_processing', 'src.schema'],
+            'messages': {'merged': "Fichier fusionné sauvegardé dans {path}"},
+            'notebook': "Étape 3 : Veuillez exécuter le Notebook EDA dans notebooks/EDA_merged_data.ipynb."
+        }] if merged_checkpoint else []
+
+        core = [
+            {
+                'name': 'kyc_index', 'step': '2a', 'description': "Indexation des données KYC par SIM",
+                'inputs': ['kyc_data'], 'outputs': ['kyc_index'],
+                'run': _kyc_index_stage, 'code': ['src.data_processing', 'src.schema'],
+                'messages': {'kyc_index': "Index KYC sauvegardé dans {path}"}
+            }
+        ] + merge + [
+            {
+                'name': 'filter', 'step': 4, 'description': "Pré-filtration des données clients",
+                'inputs': ['user_data', 'kyc_index'], 'outputs': ['filtered'],
+                'run': _filter_stage, 'code': ['src.data_filtering', 'src.filter_rules', 'src.data_processing', 'src.schema'],
+                'config': {'rules': filter_rules},
+                'messages': {'filtered': "Fichier filtré sauvegardé dans {path}"},
+                'notebook': "Étape 5 : Veuillez exécuter le Notebook EDA dans notebooks/EDA_filtered_data.ipynb."
+            },
+            {
+                'name': 'scoring', 'step': 6, 'description': "Calcul des scores et génération des profils",
+                'inputs': ['filtered'], 'outputs': ['scored'],
+                'run': _scoring_stage, 'code': ['src.scoring_and_profiling', 'src.scoring_functions', 'src.profile_codes'],
+                'messages': {'scored': "Fichier scoré sauvegardé dans {path}"},
+                'notebook': "Étape 7 : Veuillez exécuter le Notebook EDA dans notebooks/EDA_scored_data.ipynb.",
+                'error_hint': "Veuillez vérifier scoring_and_profiling.py pour diagnostiquer le problème."
+            },
+            {
+                'name': 'segmentation', 'step': 8, 'description': "Segmentation des profils",
+                'inputs': ['scored'], 'outputs': ['segmented'],
+                'run': _segmentation_stage, 'code': ['src.segmentation', 'src.profile_codes'],
+                'config': {'method': segmentation_method},
+                'messages': {'segmented': "Données segmentées sauvegardées dans {path}"},
+                'notebook': "Étape 9 : Veuillez exécuter le Notebook EDA dans notebooks/EDA_segments.ipynb.",
+                'error_hint': "Veuillez vérifier segmentation.py pour diagnostiquer le problème."
+            },
+            {
+                'name': 'cash_allocation', 'step': 10, 'description': "Attribution des crédits",
+                'inputs': ['segmented'], 'outputs': ['cash_allocated'],
+                'run': _cash_allocation_stage, 'code': ['src.cash_allocation', 'src.profile_codes'],
+                'messages': {'cash_allocated': "Données avec crédits sauvegardées dans {path}"},
+                'notebook': "Étape 11 : Veuillez exécuter le Notebook EDA dans notebooks/EDA_cash_allocated.ipynb.",
+                'error_hint': "Veuillez vérifier cash_allocation.py pour diagnostiquer le problème."
+            },
+            {
+                'name': 'multi_sim', 'step': 12, 'description': "Gestion des clients avec plusieurs SIM",
+                # L'index et ses fichiers KYC indexés sont relus de l'exécution précédente (absents à la première)
+                'inputs': ['cash_allocated', 'kyc_data', 'identity_index', 'identity_index_parts'],
+                'outputs': ['final_clients', 'identity_index', 'identity_index_parts'],
+                'run': _multi_sim_stage, 'code': ['src.multi_sim_management', 'src.identity_index'],
+                'messages': {
+                    'final_clients': "Données finales sauvegardées dans {path}",
+                    'identity_index': "Index d'identités sauvegardé dans {path}"
+                },
+                'error_hint': "Veuillez vérifier multi_sim_management.py pour diagnostiquer le problème."
+            }
+        ]
 
-        print(f"Fichiers mis à jour avec succès dans {processed_data_path}.")
+    # Les fichiers intermédiaires du calcul des bonus/malus ne sont écrits que sur demande
+    bonus_malus_outputs = ['final_clients_with_updated_loans']
+    if bonus_malus_checkpoints:
+        bonus_malus_outputs = ['transactions_previous_month', 'final_clients_with_bonus_malus'] + bonus_malus_outputs
 
-    except Exception as e:
-        print(f"Erreur lors de l'étape 13 : {e}")
+    bonus_malus = [{
+        'name': 'bonus_malus', 'step': 13, 'description': "Implémentation des bonus/malus",
+        'inputs': ['transactions', 'final_clients'], 'outputs': bonus_malus_outputs,
+        'run': _bonus_malus_stage, 'code': ['src.bonus_malus_calculation', 'src.transactions_store'],
+        'config': {
+            'backend': transactions_backend,
+            'checkpoints': bonus_malus_checkpoints,
+            'reference_month': reference_month
+        },
+        'messages': {
+            'transactions_previous_month': "Soldes du mois précédent sauvegardés dans {path}",
+            'final_clients_with_bonus_malus': "Données avec bonus/malus sauvegardées dans {path}",
+            'final_clients_with_updated_loans': "Données avec prêts mis à jour sauvegardées dans {path}"
+        },
+        'notebook': "Étape 14 : Veuillez exécuter le Notebook EDA dans notebooks/EDA_bonus_malus_updated_loans.ipynb.",
+        'error_hint': "Veuillez vérifier bonus_malus_calculation.py pour diagnostiquer le problème."
+    }]
 
-    
-    # Étape 14 : Rappel pour l'analyse exploratoire des Bonus/Malus et des Montants de Crédits Mis à Jour
-    print("Étape 14 : Veuillez exécuter le Notebook EDA dans notebooks/EDA_bonus_malus_updated_loans.ipynb.")
+    return simulation + core + bonus_malus
 
 
+def main(chunked=False, chunksize=DEFAULT_CHUNKSIZE, export_csv=False, use_cache=True,
+         segmentation_method='percentile', transactions_backend='pandas', bonus_malus_checkpoints=False,
+         reference_month=None, seed=DEFAULT_SEED, simulation_shards=1, merged_checkpoint=False,
+         filter_rules_path=None):
+    """
+    Exécute l'ensemble du pipeline.
+
+    Les étapes dont le code, la configuration et les entrées n'ont pas changé depuis la dernière
+    exécution sont sautées : leurs sorties sont reprises de data/processed. Modifier par exemple
+    bonus_malus_calculation.py ne relance que l'étape 13.
+
+    Args:
+        chunked (bool): Si True, les étapes 2 à 12 sont exécutées par blocs de `chunksize` lignes,
+                        de sorte que la mémoire utilisée dépend de la taille des blocs et non du
+                        nombre d'abonnés.
+        chunksize (int): Nombre de lignes par bloc en mode chunked.
+        export_csv (bool): Si True, les résultats finaux sont aussi exportés en CSV.
+                           Les fichiers intermédiaires sont toujours sauvegardés en Parquet.
+        use_cache (bool): Si False, toutes les étapes sont recalculées.
+        segmentation_method (str): 'percentile' (par défaut) ou 'equal_frequency' pour des segments
+                                   de même taille malgré les ex aequo du score pondéré.
+        transactions_backend (str): 'pandas' (par défaut) ou 'dask' pour traiter des transactions
+                                    plus volumineuses que la mémoire.
+        bonus_malus_checkpoints (bool): Si True, les résultats intermédiaires de l'étape 13
+                                        (transactions_previous_month et final_clients_with_bonus_malus)
+                                        sont aussi sauvegardés.
+        reference_month (str, optional): Mois des relevés de solde du calcul des bonus/malus (ex: '2024-11').
+                                         Par défaut, le dernier mois complet des transactions.
+        seed (int): Graine de la simulation des données (étape 1) : une même graine donne les mêmes données.
+        simulation_shards (int): Nombre de parts de la simulation des données, chacune simulée dans
+                                 un processus avec son propre flux aléatoire. Les données ne dépendent
+                                 que de la graine et du nombre de parts.
+        merged_checkpoint (bool): Si True, la base fusionnée complète (merged_data) est aussi sauvegardée,
+                                  pour le Notebook EDA_merged_data. Sinon, les filtres de l'étape 4 sont
+                                  appliqués à la lecture des données, avant la fusion.
+        filter_rules_path (str, optional): Fichier JSON des règles de pré-filtration (voir `load_filter_rules`).
+                                           Par défaut, les règles de `FILTER_RULES`. Les statistiques
+                                           de chaque règle sont sauvegardées dans data/processed/filter_stats.json.
+
+    Returns:
+        None
+    """
+    # Définir les chemins des fichiers
+    base_path = os.getcwd()
+    raw_data_path = os.path.join(base_path, "data", "raw")
+    processed_data_path = os.path.join(base_path, "data", "processed")
+
+    paths = {
+        'paysim': os.path.join(raw_data_path, "PS_20174392719_1491204439457_log.csv"),
+        'user_data': artifact_path(raw_data_path, "simulated_USER_DATA_with_dates"),
+        'kyc_data': artifact_path(raw_data_path, "simulated_KYC_DATA"),
+        'transactions': artifact_path(raw_data_path, "real_transactions_with_dates"),
+        'kyc_index': artifact_path(processed_data_path, "kyc_index"),
+        'merged': artifact_path(processed_data_path, "merged_data"),
+        'filtered': artifact_path(processed_data_path, "filtered_data"),
+        'scored': artifact_path(processed_data_path, "scored_data"),
+        'segmented': artifact_path(processed_data_path, "segmented_data"),
+        'cash_allocated': artifact_path(processed_data_path, "cash_allocated_data"),
+        'final_clients': artifact_path(processed_data_path, "final_clients"),
+        'identity_index': artifact_path(processed_data_path, "identity_index"),
+        'identity_index_parts': artifact_path(processed_data_path, "identity_index_parts"),
+        'transactions_previous_month': artifact_path(processed_data_path, "transactions_previous_month"),
+        'final_clients_with_bonus_malus': artifact_path(processed_data_path, "final_clients_with_bonus_malus"),
+        'final_clients_with_updated_loans': artifact_path(processed_data_path, "final_clients_with_updated_loans"),
+        'filter_stats': os.path.join(processed_data_path, "filter_stats.json")
+    }
+    cache_path = os.path.join(processed_data_path, "stage_cache.json") if use_cache else None
+
+    filter_rules = load_filter_rules(filter_rules_path) if filter_rules_path else FILTER_RULES
+    stages = build_pipeline_stages(chunked, chunksize, segmentation_method, transactions_backend,
+                                   bonus_malus_checkpoints, reference_month, seed, simulation_shards,
+                                   merged_checkpoint, filter_rules)
+    run_pipeline(stages, paths, cache_path=cache_path)
+
+    # Export CSV optionnel des résultats finaux
+    if export_csv:
+        produced = {name for stage in stages for name in stage['outputs']}
+        for name in ['final_clients', 'final_clients_with_bonus_malus', 'final_clients_with_updated_loans']:
+            if name not in produced:
+                continue
+            csv_path = os.path.splitext(paths[name])[0] + ".csv"
+            write_artifact(read_artifact(paths[name]), csv_path)
+            print(f"Export CSV sauvegardé dans {csv_path}")
 
     print("Pipeline exécuté avec succès !")
 
 if __name__ == "__main__":
-    main()
+    # Utiliser "--chunked" pour exécuter le pipeline par blocs,
+    # "--export-csv" pour exporter aussi les résultats finaux en CSV,
+    # "--no-cache" pour recalculer toutes les étapes,
+    # "--equal-frequency" pour des segments de même taille,
+    # "--dask" pour traiter les transactions avec Dask,
+    # "--bonus-malus-checkpoints" pour sauvegarder les résultats intermédiaires de l'étape 13,
+    # "--reference-month=AAAA-MM" pour choisir le mois des relevés de solde,
+    # "--seed=N" pour choisir la graine de la simulation des données,
+    # "--simulation-shards=N" pour simuler les données en N parts parallèles,
+    # "--chunksize=N" pour choisir le nombre de lignes par bloc en mode chunked,
+    # "--merged-checkpoint" pour sauvegarder aussi la base fusionnée complète
+    # et "--filter-rules=fichier.json" pour charger les règles de pré-filtration
+    main(
+        chunked="--chunked" in sys.argv,
+        export_csv="--export-csv" in sys.argv,
+        use_cache="--no-cache" not in sys.argv,
+        segmentation_method="equal_frequency" if "--equal-frequency" in sys.argv else "percentile",
+        transactions_backend="dask" if "--dask" in sys.argv else "pandas",
+        bonus_malus_checkpoints="--bonus-malus-checkpoints" in sys.argv,
+        reference_month=next(
+            (arg.split("=", 1)[1] for arg in sys.argv if arg.startswith("--reference-month=")), None
+        ),
+        seed=int(next(
+            (arg.split("=", 1)[1] for arg in sys.argv if arg.startswith("--seed=")), DEFAULT_SEED
+        )),
+        simulation_shards=int(next(
+            (arg.split("=", 1)[1] for arg in sys.argv if arg.startswith("--simulation-shards=")), 1
+        )),
+        chunksize=int(next(
+            (arg.split("=", 1)[1] for arg in sys.argv if arg.startswith("--chunksize=")), DEFAULT_CHUNKSIZE
+        )),
+        merged_checkpoint="--merged-checkpoint" in sys.argv,
+        filter_rules_path=next(
+            (arg.split("=", 1)[1] for arg in sys.argv if arg.startswith("--filter-rules=")), None
+        )
+    )
@@ -1,5 +1,39 @@
+import numpy as np
 import pandas as pd
 import os
+from src.artifact_store import read_artifact, write_artifact
+from src.identity_index import NULL_IDENTITY, identity_hash, update_identity_index
+from src.cash_allocation import CREDIT_RANGES
+
+# Rang de chaque segment, du plus faible au plus fort
+SEGMENT_RANKS = {'Very Low': 1, 'Low': 2, 'Medium': 3, 'High': 4, 'Very High': 5}
+
+# Colonnes de crédits comparées pour choisir le meilleur profil
+CREDIT_COLUMNS = ['Nano_Loan', 'Advanced_Credit', 'Macro_Loan', 'Cash_Roller_Over']
+
+# Nombre d'exemples en infraction conservés par contrôle dans le rapport de validation
+VALIDATION_SAMPLE_SIZE = 5
+
+# Messages de validation (contrôle réussi, contrôle en échec) de chaque invariant
+VALIDATION_MESSAGES = {
+    'unique_client': (
+        "Toutes les lignes de final_clients représentent des clients uniques.",
+        "{n} clients ont plusieurs lignes dans final_clients, par exemple :"
+    ),
+    'single_sim': (
+        "Chaque client dans final_clients est associé à une seule SIM.",
+        "{n} clients sont associés à plusieurs SIMs dans final_clients, par exemple :"
+    ),
+    'required_credits': (
+        "Chaque client dans final_clients a tous les crédits de sa catégorie.",
+        "{n} lignes de final_clients ont un crédit manquant pour leur catégorie, par exemple :"
+    ),
+    'credit_bounds': (
+        "Tous les crédits de final_clients sont dans les bornes de leur produit.",
+        "{n} lignes de final_clients ont un crédit hors des bornes de son produit, par exemple :"
+    )
+}
+
 
 def identify_multi_sim_clients(data):
     """
@@ -12,7 +46,7 @@ def identify_multi_sim_clients(data):
         pd.DataFrame: Clients ayant plus d'une carte SIM avec leurs informations.
     """
     multi_sim_clients = (
-        data.groupby(['ID_TYPE', 'ID_NUMBER'])['SIM_NUMBER']
+        data.groupby(['ID_TYPE', 'ID_NUMBER'], observed=True)['SIM_NUMBER']
         .nunique()
         .reset_index()
         .rename(columns={'SIM_NUMBER': 'SIM_COUNT'})
@@ -20,92 +54,188 @@ def identify_multi_sim_clients(data):
     return multi_sim_clients[multi_sim_clients['SIM_COUNT'] > 1]
 
 
-def select_best_profile(group):
+def rank_profiles(data):
     """
-    Sélectionne le meilleur profil pour un client ayant plusieurs SIM.
+    Calcule les critères de choix du meilleur profil d'un client : le rang du segment
+    et le crédit maximal parmi les quatre crédits.
 
     Args:
-        group (pd.DataFrame): Sous-ensemble de données pour un client.
+        data (pd.DataFrame): Données contenant 'Segment' et les colonnes de crédits.
 
     Returns:
-        pd.Series: Ligne représentant le meilleur profil pour le client.
+        tuple: (Segment_Score, Max_Credit) sous forme de pd.Series alignées sur `data`.
     """
-    group = group.copy()
-    segment_mapping = {'Very Low': 1, 'Low': 2, 'Medium': 3, 'High': 4, 'Very High': 5}
-    group['Segment_Score'] = group['Segment'].map(segment_mapping)
-    group['Max_Credit'] = group[['Nano_Loan', 'Advanced_Credit', 'Macro_Loan', 'Cash_Roller_Over']].max(axis=1)
-    group = group.sort_values(['Segment_Score', 'Max_Credit'], ascending=[False, False])
-    return group.iloc[0]
+    segment_score = data['Segment'].astype(object).map(SEGMENT_RANKS)
+    max_credit = data[CREDIT_COLUMNS].max(axis=1)
+    return segment_score, max_credit
+
 
+def _multi_sim_mask(identity_hashes, sim_numbers):
+    """Indique les lignes dont l'identité (hash) est associée à plusieurs SIM distinctes dans les lignes données."""
+    pairs = pd.DataFrame({'IDENTITY_HASH': identity_hashes, 'SIM_NUMBER': sim_numbers})
+    pairs = pairs[pairs['IDENTITY_HASH'] != NULL_IDENTITY].drop_duplicates()
+    sim_counts = pairs['IDENTITY_HASH'].value_counts()
+    return np.isin(identity_hashes, sim_counts.index[sim_counts > 1].to_numpy(dtype=np.uint64))
 
-def manage_multi_sim_clients(data):
+
+def manage_multi_sim_clients(data, identity_index=None):
     """
     Gère les clients avec plusieurs SIM en conservant uniquement le meilleur profil.
 
+    Le meilleur profil est celui du segment le plus élevé, puis du crédit maximal le plus élevé ;
+    en cas d'égalité parfaite, la première ligne du client dans `data` est retenue. Les clients
+    sont traités en une seule passe : un tri stable global suivi d'une déduplication, sans
+    traitement Python par client.
+
+    Avec un index d'identités, les clients multi-SIM sont trouvés sans regrouper toute la base :
+    seules les SIM dont l'identité compte plusieurs SIM dans l'index sont examinées, puis
+    regroupées pour ne garder que les identités ayant plusieurs SIM dans `data`.
+
     Args:
         data (pd.DataFrame): DataFrame contenant les colonnes nécessaires pour la gestion des clients.
+        identity_index (IdentityIndex, optional): Index d'identités à jour pour toutes les SIM de `data`.
+
+    Raises:
+        KeyError: Si une SIM de `data` est absente de l'index d'identités.
 
     Returns:
-        pd.DataFrame: DataFrame finale avec une seule ligne par client.
+        pd.DataFrame: DataFrame finale avec une seule ligne par client : d'abord les clients à SIM
+                      unique (dans l'ordre de `data`), puis les meilleurs profils des clients
+                      multi-SIM (triés par pièce d'identité).
     """
-    # Identifier les clients avec plusieurs SIM
-    multi_sim_clients = identify_multi_sim_clients(data)
-
-    # Extraire les détails des clients multi-SIM
-    multi_sim_details = data.merge(
-        multi_sim_clients[['ID_TYPE', 'ID_NUMBER']],
-        on=['ID_TYPE', 'ID_NUMBER'],
-        how='inner'
-    )
+    identity_columns = ['ID_TYPE', 'ID_NUMBER']
 
-    # Appliquer la sélection du meilleur profil
-    best_profiles = multi_sim_details.groupby(['ID_TYPE', 'ID_NUMBER']).apply(select_best_profile).reset_index(drop=True)
+    if identity_index is None:
+        # Nombre de SIM de chaque client (NaN pour les pièces d'identité manquantes)
+        sim_count = data.groupby(identity_columns, observed=True)['SIM_NUMBER'].transform('nunique')
+        is_multi_sim = (sim_count > 1).to_numpy()
+    else:
+        # Candidats : identités ayant plusieurs SIM dans l'index, vérifiées sur les seules lignes de `data`
+        sim_numbers = data['SIM_NUMBER'].to_numpy()
+        is_multi_sim = identity_index.sim_counts(sim_numbers) > 1
+        candidates = np.flatnonzero(is_multi_sim)
+        is_multi_sim[candidates] = _multi_sim_mask(
+            identity_index.lookup(sim_numbers[candidates]), sim_numbers[candidates]
+        )
 
     # Identifier les clients à SIM unique
-    single_sim_clients = data.merge(
-        multi_sim_clients[['ID_TYPE', 'ID_NUMBER']],
-        on=['ID_TYPE', 'ID_NUMBER'],
-        how='left',
-        indicator=True
-    )
-    single_sim_clients = single_sim_clients[single_sim_clients['_merge'] == 'left_only'].drop(columns=['_merge'])
+    single_sim_clients = data[~is_multi_sim]
+
+    # Tri stable par client puis par profil décroissant : la première ligne de chaque client est la meilleure
+    multi_sim_details = data[is_multi_sim].reset_index(drop=True)
+    segment_score, max_credit = rank_profiles(multi_sim_details)
+    order = multi_sim_details.assign(Segment_Score=segment_score, Max_Credit=max_credit).sort_values(
+        identity_columns + ['Segment_Score', 'Max_Credit'],
+        ascending=[True, True, False, False],
+        kind='stable'
+    ).index
+    best_profiles = multi_sim_details.iloc[order].drop_duplicates(subset=identity_columns, keep='first')
 
     # Combiner les données pour créer la DataFrame finale
-    final_clients = pd.concat([single_sim_clients, best_profiles], ignore_index=True)
-    final_clients.drop(columns=['Segment_Score', 'Max_Credit'], inplace=True)
+    return pd.concat([single_sim_clients, best_profiles], ignore_index=True)
+
 
-    return final_clients
+def _identity_samples(data, codes, offenders, counts, count_column, n_samples):
+    """Exemples de clients en infraction : pièce d'identité et nombre de lignes ou de SIM."""
+    is_offender = np.zeros(len(data), dtype=bool)
+    is_offender[codes >= 0] = offenders[codes[codes >= 0]]
+    first_rows = ~pd.Series(codes).duplicated().to_numpy()
+    positions = np.flatnonzero(is_offender & first_rows)[:n_samples]
+    samples = data.iloc[positions][['ID_TYPE', 'ID_NUMBER']].assign(**{count_column: counts[codes[positions]]})
+    return samples.to_dict('records')
 
 
-def validate_final_clients(data):
+def validate_final_clients(data, identity_index=None, raise_on_breach=False, n_samples=VALIDATION_SAMPLE_SIZE,
+                           verbose=True):
     """
-    Valide que chaque client est unique et associé à une seule SIM.
+    Valide en une seule passe les invariants de la table finale des clients :
+    - 'unique_client' : une seule ligne par client (ID_TYPE, ID_NUMBER) ;
+    - 'single_sim' : une seule SIM par client ;
+    - 'required_credits' : pas de crédit manquant parmi ceux de la catégorie du client ;
+    - 'credit_bounds' : chaque crédit dans les bornes de son produit (`CREDIT_RANGES`).
+
+    Les clients sont repérés par le hash 64 bits de leur pièce d'identité (lu dans l'index
+    d'identités s'il est fourni) : les deux contrôles par client se font sur un seul encodage
+    des hash, sans regroupement sur les colonnes d'identité.
 
     Args:
         data (pd.DataFrame): DataFrame finale des clients.
+        identity_index (IdentityIndex, optional): Index d'identités à jour pour toutes les SIM de `data`.
+        raise_on_breach (bool): Si True, lève une erreur dès qu'un invariant n'est pas respecté.
+        n_samples (int): Nombre maximal d'exemples en infraction conservés par contrôle.
+        verbose (bool): Si False, seules les infractions sont affichées (ex: validation bloc par bloc).
+
+    Raises:
+        ValueError: Si `raise_on_breach` est True et qu'un invariant n'est pas respecté.
 
     Returns:
-        None
+        dict: Rapport de validation {'n_rows', 'valid', 'checks': {contrôle: {'n_breaches', 'samples'}}}.
     """
-    # Vérifier l'unicité des ID_NUMBER par ID_TYPE
-    unique_clients = data.groupby(['ID_TYPE', 'ID_NUMBER']).size()
-    non_unique_clients = unique_clients[unique_clients > 1]
-
-    if not non_unique_clients.empty:
-        print("Les clients suivants ont plusieurs lignes dans final_clients :")
-        print(non_unique_clients)
+    if identity_index is not None:
+        identity_hashes = identity_index.lookup(data['SIM_NUMBER'].to_numpy())
     else:
-        print("Toutes les lignes de final_clients représentent des clients uniques.")
+        identity_hashes = identity_hash(data)
 
-    # Vérifier qu'il n'y a qu'une seule SIM par client
-    multiple_sims = data.groupby(['ID_TYPE', 'ID_NUMBER'])['SIM_NUMBER'].nunique()
-    non_unique_sims = multiple_sims[multiple_sims > 1]
+    # Encodage des clients (-1 pour les pièces d'identité manquantes) et des SIM
+    codes, identities = pd.factorize(identity_hashes)
+    codes[identity_hashes == NULL_IDENTITY] = -1
+    sim_codes, sims = pd.factorize(data['SIM_NUMBER'])
+    known = codes >= 0
+    # Une SIM manquante (code -1) ne compte pas parmi les SIM du client
+    has_sim = known & (sim_codes >= 0)
 
-    if not non_unique_sims.empty:
-        print("Les clients suivants sont associés à plusieurs SIMs dans final_clients :")
-        print(non_unique_sims)
-    else:
-        print("Chaque client dans final_clients est associé à une seule SIM.")
+    # Nombre de lignes et de SIM distinctes par client
+    rows_per_client = np.bincount(codes[known], minlength=len(identities))
+    client_sim_pairs = pd.unique(codes[has_sim].astype(np.int64) * max(len(sims), 1) + sim_codes[has_sim])
+    sims_per_client = np.bincount(client_sim_pairs // max(len(sims), 1), minlength=len(identities))
+
+    checks = {
+        'unique_client': {
+            'n_breaches': int((rows_per_client > 1).sum()),
+            'samples': _identity_samples(data, codes, rows_per_client > 1, rows_per_client, 'ROW_COUNT', n_samples)
+        },
+        'single_sim': {
+            'n_breaches': int((sims_per_client > 1).sum()),
+            'samples': _identity_samples(data, codes, sims_per_client > 1, sims_per_client, 'SIM_COUNT', n_samples)
+        }
+    }
+
+    # Crédits de la catégorie de chaque client : présents et dans les bornes du produit
+    category = data['CUST_CATEGORY'].to_numpy()
+    missing = np.zeros(len(data), dtype=bool)
+    out_of_bounds = np.zeros(len(data), dtype=bool)
+    for customer_category, credits in CREDIT_RANGES.items():
+        is_category = category == customer_category
+        for column, (credit_min, credit_max) in credits.items():
+            values = data[column].to_numpy(dtype=np.float64)
+            missing |= is_category & np.isnan(values)
+            out_of_bounds |= (values < credit_min) | (values > credit_max)
+
+    credit_columns = ['SIM_NUMBER', 'CUST_CATEGORY'] + CREDIT_COLUMNS
+    for name, is_breach in [('required_credits', missing), ('credit_bounds', out_of_bounds)]:
+        checks[name] = {
+            'n_breaches': int(is_breach.sum()),
+            'samples': data.loc[is_breach, credit_columns].head(n_samples).to_dict('records')
+        }
+
+    report = {
+        'n_rows': len(data),
+        'valid': all(check['n_breaches'] == 0 for check in checks.values()),
+        'checks': checks
+    }
+
+    for name, check in checks.items():
+        if check['n_breaches']:
+            print(VALIDATION_MESSAGES[name][1].format(n=check['n_breaches']))
+            print(pd.DataFrame(check['samples']))
+        elif verbose:
+            print(VALIDATION_MESSAGES[name][0])
+
+    if raise_on_breach and not report['valid']:
+        breaches = {name: check['n_breaches'] for name, check in checks.items() if check['n_breaches']}
+        raise ValueError(f"La validation de final_clients a échoué : {breaches}")
+
+    return report
 
 
 if __name__ == "__main__":
@@ -113,20 +243,25 @@ if __name__ == "__main__":
     # Définir les chemins des fichiers
     base_path = os.getcwd()
     processed_data_path = os.path.join(base_path, "data", "processed")
-    cash_allocated_data_path = os.path.join(processed_data_path, "cash_allocated_data.csv")
-    final_clients_path = os.path.join(processed_data_path, "final_clients.csv")
+    cash_allocated_data_path = os.path.join(processed_data_path, "cash_allocated_data.parquet")
+    final_clients_path = os.path.join(processed_data_path, "final_clients.parquet")
+    identity_index_path = os.path.join(processed_data_path, "identity_index.parquet")
+    kyc_data_path = os.path.join(base_path, "data", "raw", "simulated_KYC_DATA.parquet")
 
     # Charger les données de crédits alloués
     print("Chargement des données avec crédits alloués...")
-    cash_allocated_data = pd.read_csv(cash_allocated_data_path)
+    cash_allocated_data = read_artifact(cash_allocated_data_path)
+
+    # Mettre à jour l'index d'identités avec les enregistrements KYC
+    identity_index = update_identity_index(kyc_data_path, identity_index_path)
 
     # Gérer les clients avec plusieurs SIM
-    final_clients = manage_multi_sim_clients(cash_allocated_data)
+    final_clients = manage_multi_sim_clients(cash_allocated_data, identity_index)
 
     # Valider les résultats
-    validate_final_clients(final_clients)
+    validate_final_clients(final_clients, identity_index)
 
     # Sauvegarder les données finales
     print(f"Sauvegarde des clients finaux dans {final_clients_path}...")
-    final_clients.to_csv(final_clients_path, index=False)
+    write_artifact(final_clients, final_clients_path)
     print("Gestion des clients multi-SIM terminée avec succès.")
@@ -0,0 +1,327 @@
+import os
+import json
+import glob
+import hashlib
+import inspect
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+from src.artifact_store import read_artifact, write_artifact
+
+# Version du format du fichier de cache des étapes
+STAGE_CACHE_FORMAT_VERSION = 1
+
+
+class CheckpointWriter:
+    """
+    Sauvegarde les artefacts intermédiaires du pipeline sur un thread d'arrière-plan.
+
+    Les étapes se transmettent leurs DataFrames en mémoire ; chaque point de contrôle est
+    copié puis écrit sur disque pendant que l'étape suivante calcule. Les écritures sont
+    faites dans l'ordre de soumission, par un seul thread. Une erreur d'écriture est
+    remontée par `wait` (ou à la sortie du bloc `with`).
+
+    Args:
+        max_pending (int): Nombre maximal d'écritures en attente. Au-delà, `submit` attend la
+                           fin de la plus ancienne, ce qui borne la mémoire prise par les copies.
+    """
+
+    def __init__(self, max_pending=2):
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkpoint")
+        self._pending = []
+
+    def submit(self, data, path, message=None):
+        """
+        Programme l'écriture d'un point de contrôle.
+
+        Les étapes suivantes ajoutent des colonnes à leurs données d'entrée, voire les modifient :
+        la copie garantit que le fichier écrit correspond à l'état des données au moment de l'appel.
+
+        Args:
+            data (pd.DataFrame): Données à sauvegarder.
+            path (str): Chemin de l'artefact.
+            message (str, optional): Message affiché une fois l'écriture terminée.
+
+        Returns:
+            concurrent.futures.Future: Écriture programmée.
+        """
+        while len(self._pending) >= self.max_pending:
+            self._pending.pop(0).result()
+        future = self._executor.submit(self._write, data.copy(), path, message)
+        self._pending.append(future)
+        return future
+
+    @staticmethod
+    def _write(data, path, message):
+        write_artifact(data, path)
+        if message:
+            print(message)
+
+    def wait(self):
+        """
+        Attend la fin de toutes les écritures programmées.
+
+        Raises:
+            Exception: La première erreur survenue lors d'une écriture.
+
+        Returns:
+            None
+        """
+        pending, self._pending = self._pending, []
+        for future in pending:
+            future.result()
+
+    def close(self):
+        """Attend les écritures en cours puis arrête le thread d'écriture."""
+        try:
+            self.wait()
+        finally:
+            self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            # Ne pas masquer l'erreur de l'étape par une éventuelle erreur d'écriture
+            self._executor.shutdown(wait=True)
+        return False
+
+
+########## Cache des étapes ##########
+def _artifact_files(path):
+    """Liste les fichiers d'un artefact (un fichier unique ou un répertoire de parts)."""
+    if os.path.isdir(path):
+        return sorted(f for f in glob.glob(os.path.join(path, '**', '*'), recursive=True) if os.path.isfile(f))
+    return [path]
+
+
+def _stat_signature(path):
+    """Signature (taille, date de modification) d'un artefact, sans lire son contenu."""
+    return [[os.path.relpath(f, path) if f != path else '', os.path.getsize(f), os.stat(f).st_mtime_ns]
+            for f in _artifact_files(path)]
+
+
+def _code_fingerprint(stage):
+    """Hash du code d'une étape : sa fonction et les modules dont elle dépend."""
+    digest = hashlib.sha256(inspect.getsource(stage['run']).encode())
+    for module_name in stage.get('code', []):
+        with open(importlib.import_module(module_name).__file__, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class StageCache:
+    """
+    Registre des empreintes des étapes déjà exécutées, sauvegardé en JSON.
+
+    L'empreinte d'une étape combine le hash de son code, sa configuration et le hash du
+    contenu de ses entrées. Le hash d'un fichier n'est recalculé que si sa taille ou sa
+    date de modification a changé depuis la dernière exécution.
+
+    Args:
+        path (str): Chemin du fichier de cache (ex: 'data/processed/stage_cache.json').
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._state = {'format_version': STAGE_CACHE_FORMAT_VERSION, 'stages': {}, 'files': {}}
+        if os.path.exists(path):
+            with open(path) as f:
+                state = json.load(f)
+            # Un cache d'un autre format est ignoré : toutes les étapes seront recalculées
+            if state.get('format_version') == STAGE_CACHE_FORMAT_VERSION:
+                self._state = state
+
+    def file_hash(self, path):
+        """
+        Hash du contenu d'un artefact, mémorisé tant que sa signature (taille, date) ne change pas.
+
+        Args:
+            path (str): Chemin de l'artefact.
+
+        Returns:
+            str: Hash SHA-256 du contenu.
+        """
+        signature = _stat_signature(path)
+        known = self._state['files'].get(path)
+        if known and known['signature'] == signature:
+            return known['sha256']
+
+        digest = hashlib.sha256()
+        for file_path in _artifact_files(path):
+            with open(file_path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+        self._state['files'][path] = {'signature': signature, 'sha256': digest.hexdigest()}
+        return digest.hexdigest()
+
+    def fingerprint(self, stage, paths):
+        """
+        Empreinte d'une étape à partir de son code, de sa configuration et de ses entrées.
+
+        Args:
+            stage (dict): Définition de l'étape.
+            paths (dict): Chemins des artefacts, indexés par nom.
+
+        Returns:
+            str: Empreinte de l'étape.
+        """
+        description = {
+            'code': _code_fingerprint(stage),
+            'config': stage.get('config', {}),
+            'inputs': {name: self.file_hash(paths[name]) for name in stage['inputs']}
+        }
+        return hashlib.sha256(json.dumps(description, sort_keys=True, default=str).encode()).hexdigest()
+
+    def is_fresh(self, stage, paths):
+        """
+        Indique si les sorties d'une étape sont à jour : même empreinte que lors de leur
+        production, et sorties présentes et de contenu inchangé depuis.
+
+        Args:
+            stage (dict): Définition de l'étape.
+            paths (dict): Chemins des artefacts, indexés par nom.
+
+        Returns:
+            bool: True si l'étape peut être sautée.
+        """
+        record = self._state['stages'].get(stage['name'])
+        if record is None:
+            return False
+        for name in stage['outputs']:
+            if not os.path.exists(paths[name]) or record['outputs'].get(name) != self.file_hash(paths[name]):
+                return False
+        if any(not os.path.exists(paths[name]) for name in stage['inputs']):
+            return False
+        return record['fingerprint'] == self.fingerprint(stage, paths)
+
+    def invalidate(self, stage):
+        """Oublie l'empreinte d'une étape avant de la recalculer (une exécution interrompue ne sera pas réutilisée)."""
+        self._state['stages'].pop(stage['name'], None)
+        self.save()
+
+    def record(self, stage, paths):
+        """Enregistre l'empreinte d'une étape dont toutes les sorties sont écrites."""
+        self._state['stages'][stage['name']] = {
+            'fingerprint': self.fingerprint(stage, paths),
+            'outputs': {name: self.file_hash(paths[name]) for name in stage['outputs']}
+        }
+        self.save()
+
+    def save(self):
+        """Sauvegarde le cache sur disque."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, 'w') as f:
+            json.dump(self._state, f, indent=2)
+
+
+class _StageInputs:
+    """Entrées d'une étape : les DataFrames déjà en mémoire, sinon chargés depuis le disque au premier accès."""
+
+    def __init__(self, names, in_memory, paths):
+        self._names = names
+        self._in_memory = in_memory
+        self._paths = paths
+
+    def __getitem__(self, name):
+        if name not in self._names:
+            raise KeyError(f"'{name}' n'est pas une entrée déclarée de l'étape.")
+        if name not in self._in_memory:
+            self._in_memory[name] = read_artifact(self._paths[name])
+        return self._in_memory[name]
+
+
+def run_pipeline(stages, paths, cache_path=None):
+    """
+    Exécute un graphe d'étapes dans l'ordre, en sautant celles dont les sorties sont à jour.
+
+    Chaque étape est un dictionnaire :
+    - 'name' : nom de l'étape ;
+    - 'step' / 'description' : numéro et libellé affichés (ex: 2, "Fusion des données") ;
+    - 'inputs' / 'outputs' : noms des artefacts lus et produits (clés de `paths`) ;
+    - 'run' : fonction run(inputs, paths, config) ;
+    - 'in_memory' (défaut True) : run reçoit ses entrées en DataFrames et renvoie ses sorties
+      {nom: DataFrame}, écrites en arrière-plan ; sinon run lit et écrit elle-même les fichiers.
+      Les entrées ne sont chargées depuis le disque qu'au premier accès à inputs[nom] ;
+    - 'code' : modules dont le code fait partie de l'empreinte ;
+    - 'config' : paramètres qui font partie de l'empreinte ;
+    - 'messages' : messages affichés après l'écriture de chaque sortie ({nom: texte avec {path}}) ;
+    - 'notebook' : rappel affiché après l'étape ;
+    - 'error_hint' : message affiché en cas d'erreur.
+
+    Une étape est recalculée si son code, sa configuration ou le contenu de ses entrées a changé,
+    si l'une de ses sorties manque ou a été modifiée, ou si une étape dont elle dépend a été
+    recalculée. Les sorties des étapes sautées ne sont chargées que si une étape recalculée en a besoin.
+
+    Args:
+        stages (list): Étapes, dans un ordre compatible avec leurs dépendances.
+        paths (dict): Chemins des artefacts, indexés par nom.
+        cache_path (str, optional): Fichier de cache des empreintes. Si None, tout est recalculé.
+
+    Returns:
+        list: Noms des étapes recalculées.
+    """
+    cache = StageCache(cache_path) if cache_path else None
+    producers = {name: stage['name'] for stage in stages for name in stage['outputs']}
+    # Nombre d'étapes restantes qui lisent chaque artefact, pour libérer la mémoire au plus tôt
+    remaining_readers = {}
+    for stage in stages:
+        for name in stage['inputs']:
+            remaining_readers[name] = remaining_readers.get(name, 0) + 1
+
+    in_memory = {}
+    executed = []
+    to_record = []
+
+    def record_pending():
+        checkpoints.wait()
+        if cache:
+            for done in to_record:
+                cache.record(done, paths)
+        to_record.clear()
+
+    with CheckpointWriter() as checkpoints:
+        for stage in stages:
+            label = f"Étape {stage['step']} : {stage['description']}"
+            upstream_executed = any(producers.get(name) in executed for name in stage['inputs'])
+
+            if cache and not upstream_executed and cache.is_fresh(stage, paths):
+                print(f"{label} : à jour, sorties reprises du cache.")
+            else:
+                print(f"{label}...")
+                if cache:
+                    cache.invalidate(stage)
+                try:
+                    if stage.get('in_memory', True):
+                        inputs = _StageInputs(stage['inputs'], in_memory, paths)
+                        outputs = stage['run'](inputs, paths, stage.get('config', {}))
+                        for name in stage['outputs']:
+                            in_memory[name] = outputs[name]
+                            message = stage.get('messages', {}).get(name)
+                            checkpoints.submit(outputs[name], paths[name], message and message.format(path=paths[name]))
+                    else:
+                        # Les fichiers d'entrée doivent être écrits avant une étape qui les relit
+                        record_pending()
+                        stage['run']({}, paths, stage.get('config', {}))
+                except Exception as e:
+                    print(f"Erreur lors de l'étape {stage['step']} : {e}")
+                    if stage.get('error_hint'):
+                        print(stage['error_hint'])
+                    raise
+                executed.append(stage['name'])
+                to_record.append(stage)
+
+            for name in stage['inputs']:
+                remaining_readers[name] -= 1
+                if remaining_readers[name] == 0:
+                    in_memory.pop(name, None)
+
+            if stage.get('notebook'):
+                print(stage['notebook'])
+
+        record_pending()
+
+    return executed
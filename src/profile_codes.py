@@ -0,0 +1,152 @@
+import itertools
+import numpy as np
+import pandas as pd
+
+# Colonnes de score formant les cinq chiffres de Profile_Code, dans l'ordre
+PROFILE_SCORE_COLUMNS = [
+    'Mobile_Money_Score',
+    'Data_Service_Score',
+    'Voice_Service_Score',
+    'SMS_Service_Score',
+    'Digital_Service_Score'
+]
+
+# Poids de chaque service dans le score pondéré, dans l'ordre des chiffres de Profile_Code
+PROFILE_WEIGHTS = {
+    'Mobile Money': 5,
+    'Data': 4,
+    'Voice': 3,
+    'SMS': 2,
+    'Digital': 1
+}
+
+# Chaque chiffre est un score de 1 à 5 : il existe 5^5 = 3125 codes possibles
+MIN_SCORE, MAX_SCORE = 1, 5
+N_PROFILE_CODES = (MAX_SCORE - MIN_SCORE + 1) ** len(PROFILE_SCORE_COLUMNS)
+
+# Tous les codes, du plus petit ('11111') au plus grand ('55555'). La position d'un code dans
+# cette liste est son écriture en base 5 (chiffres diminués de 1) : c'est l'index de profil.
+PROFILE_CODES = [
+    ''.join(digits)
+    for digits in itertools.product('12345', repeat=len(PROFILE_SCORE_COLUMNS))
+]
+
+# Type de la colonne Profile_Code : un catégoriel sur les 3125 codes (index stocké sur 2 octets)
+PROFILE_CODE_DTYPE = pd.CategoricalDtype(PROFILE_CODES)
+
+# Vecteur des poids, dans l'ordre de PROFILE_SCORE_COLUMNS
+PROFILE_WEIGHT_VECTOR = np.array(list(PROFILE_WEIGHTS.values()), dtype=np.int64)
+
+# Chiffres et score pondéré de chaque index de profil (tables de correspondance)
+PROFILE_DIGITS = np.array([[int(digit) for digit in code] for code in PROFILE_CODES], dtype=np.int64)
+WEIGHTED_SCORES = PROFILE_DIGITS @ PROFILE_WEIGHT_VECTOR
+
+
+def _is_profile_code_dtype(profile_codes):
+    """Indique si les codes sont déjà stockés sous la forme catégorielle `PROFILE_CODE_DTYPE`."""
+    return getattr(profile_codes, 'dtype', None) == PROFILE_CODE_DTYPE
+
+
+def profile_index_from_scores(scores):
+    """
+    Calcule l'index de profil (0 à 3124) à partir des cinq scores par service.
+
+    Args:
+        scores (np.ndarray): Matrice (n, 5) des scores Mobile Money, Data, Voice, SMS et Digital.
+
+    Raises:
+        ValueError: Si un score n'est pas compris entre 1 et 5.
+
+    Returns:
+        np.ndarray: Index de profil de chaque ligne (int16).
+    """
+    scores = np.asarray(scores, dtype=np.int64)
+    if ((scores < MIN_SCORE) | (scores > MAX_SCORE)).any():
+        raise ValueError("Chaque score doit être compris entre 1 et 5 pour former un Profile_Code.")
+    base = MAX_SCORE - MIN_SCORE + 1
+    positions = base ** np.arange(scores.shape[1] - 1, -1, -1)
+    return ((scores - MIN_SCORE) @ positions).astype(np.int16)
+
+
+def decode_profile_codes(profile_codes):
+    """
+    Décode des Profile_Code à cinq chiffres en une matrice de scores, sans boucle Python.
+
+    Args:
+        profile_codes (array-like): Codes de profil (ex: ['34251', '55112']).
+
+    Raises:
+        ValueError: Si un code ne contient pas au moins cinq chiffres.
+
+    Returns:
+        np.ndarray: Matrice (n, 5) des scores Mobile Money, Data, Voice, SMS et Digital.
+    """
+    if _is_profile_code_dtype(profile_codes):
+        return PROFILE_DIGITS[profile_index(profile_codes)]
+
+    codes = pd.Series(profile_codes).astype(str).to_numpy(dtype='U5')
+    # Chaque caractère d'une chaîne numpy 'U5' occupe un entier 32 bits (son code Unicode)
+    digits = codes.view(np.uint32).reshape(len(codes), 5).astype(np.int64) - ord('0')
+    if ((digits < 0) | (digits > 9)).any():
+        raise ValueError("Chaque Profile_Code doit commencer par cinq chiffres.")
+    return digits
+
+
+def profile_index(profile_codes):
+    """
+    Renvoie l'index de profil (0 à 3124) de chaque Profile_Code.
+
+    Pour une colonne de type `PROFILE_CODE_DTYPE`, l'index est directement le code de la
+    catégorie ; les autres formes (chaînes, entiers) sont décodées.
+
+    Args:
+        profile_codes (array-like): Codes de profil.
+
+    Returns:
+        np.ndarray: Index de profil de chaque ligne (int16).
+    """
+    if _is_profile_code_dtype(profile_codes):
+        codes = np.asarray(pd.Series(profile_codes).cat.codes)
+        if (codes < 0).any():
+            raise ValueError("Profile_Code manquant : impossible de calculer l'index de profil.")
+        return codes.astype(np.int16)
+    return profile_index_from_scores(decode_profile_codes(profile_codes))
+
+
+def encode_profile_codes(scores):
+    """
+    Construit la colonne Profile_Code (catégorielle) à partir des cinq scores par service.
+
+    Args:
+        scores (pd.DataFrame or np.ndarray): Scores par service, dans l'ordre de `PROFILE_SCORE_COLUMNS`.
+
+    Returns:
+        pd.Categorical: Codes de profil ; leurs valeurs sont les chaînes à cinq chiffres (ex: '34251').
+    """
+    return pd.Categorical.from_codes(profile_index_from_scores(scores), dtype=PROFILE_CODE_DTYPE)
+
+
+def weighted_scores(profile_codes):
+    """
+    Renvoie le score pondéré de chaque Profile_Code par lecture dans la table `WEIGHTED_SCORES`.
+
+    Args:
+        profile_codes (array-like): Codes de profil.
+
+    Returns:
+        np.ndarray: Scores pondérés, compris entre 15 et 75.
+    """
+    return WEIGHTED_SCORES[profile_index(profile_codes)]
+
+
+def weighted_scores_from_scores(scores):
+    """
+    Calcule le score pondéré de chaque ligne par un produit matrice-vecteur sur les scores par service.
+
+    Args:
+        scores (pd.DataFrame or np.ndarray): Scores par service, dans l'ordre de `PROFILE_SCORE_COLUMNS`.
+
+    Returns:
+        np.ndarray: Scores pondérés, compris entre 15 et 75.
+    """
+    return np.asarray(scores, dtype=np.int64) @ PROFILE_WEIGHT_VECTOR
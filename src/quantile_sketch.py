@@ -0,0 +1,223 @@
+import math
+import numpy as np
+
+# Facteur de décroissance des capacités entre deux niveaux consécutifs (valeur usuelle de KLL)
+_CAPACITY_DECAY = 2 / 3
+
+
+def _interpolate(lower_values, upper_values, fraction):
+    """Interpolation linéaire écrite comme dans `np.percentile`, pour des résultats identiques au bit près."""
+    diff = upper_values - lower_values
+    return np.where(
+        fraction >= 0.5,
+        upper_values - diff * (1 - fraction),
+        lower_values + diff * fraction
+    )
+
+
+class KLLSketch:
+    """
+    Résumé approximatif et fusionnable de la distribution d'une colonne (sketch de type KLL).
+
+    Les valeurs sont ingérées par lots ; la mémoire utilisée ne dépend que de la précision
+    demandée, et non du nombre de valeurs vues. Deux sketches construits sur des partitions
+    différentes peuvent être fusionnés avec `merge`.
+
+    Tant qu'aucun compactage n'a eu lieu (peu de valeurs), les percentiles renvoyés sont
+    exactement ceux de `np.percentile`.
+
+    Args:
+        epsilon (float): Erreur de rang normalisée visée (ex: 0.01 pour ±1% des lignes).
+        seed (int, optional): Graine du générateur aléatoire utilisé lors des compactages.
+    """
+
+    def __init__(self, epsilon=0.01, seed=None):
+        if not 0 < epsilon < 1:
+            raise ValueError("epsilon doit être strictement compris entre 0 et 1.")
+        self.epsilon = epsilon
+        self.k = max(8, int(math.ceil(2.0 / epsilon)))
+        self.n = 0
+        self._levels = [np.empty(0, dtype=np.float64)]
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        """
+        Ajoute un lot de valeurs au sketch (les valeurs manquantes sont ignorées).
+
+        Args:
+            values (array-like): Valeurs à ingérer.
+
+        Returns:
+            KLLSketch: Le sketch lui-même.
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+
+        self.n += len(values)
+        self._levels[0] = np.concatenate([self._levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """
+        Fusionne un autre sketch de même précision dans celui-ci.
+
+        Args:
+            other (KLLSketch): Sketch construit sur une autre partition des données.
+
+        Raises:
+            ValueError: Si les deux sketches n'ont pas la même précision.
+
+        Returns:
+            KLLSketch: Le sketch lui-même.
+        """
+        if other.k != self.k:
+            raise ValueError("Impossible de fusionner des sketches de précisions différentes.")
+
+        while len(self._levels) < len(other._levels):
+            self._levels.append(np.empty(0, dtype=np.float64))
+        for h, level in enumerate(other._levels):
+            self._levels[h] = np.concatenate([self._levels[h], level])
+
+        self.n += other.n
+        self._compress()
+        return self
+
+    def percentiles(self, q):
+        """
+        Estime les percentiles demandés, avec la même interpolation linéaire que `np.percentile`.
+
+        Args:
+            q (list): Percentiles à estimer, entre 0 et 100.
+
+        Raises:
+            ValueError: Si le sketch est vide.
+
+        Returns:
+            np.ndarray: Valeurs estimées des percentiles.
+        """
+        if self.n == 0:
+            raise ValueError("Le sketch est vide : aucun percentile ne peut être estimé.")
+
+        items = np.concatenate(self._levels)
+        weights = np.concatenate([
+            np.full(len(level), 2 ** h, dtype=np.int64) for h, level in enumerate(self._levels)
+        ])
+        order = np.argsort(items, kind='stable')
+        items = items[order]
+        # Chaque élément i couvre les rangs [cumulative[i] - poids, cumulative[i] - 1]
+        cumulative = np.cumsum(weights[order])
+        total = cumulative[-1]
+
+        ranks = np.asarray(q, dtype=np.float64) / 100 * (total - 1)
+        lower = np.floor(ranks)
+        fraction = ranks - lower
+        lower_values = items[np.searchsorted(cumulative, lower, side='right')]
+        upper_values = items[np.searchsorted(cumulative, np.minimum(lower + 1, total - 1), side='right')]
+        return _interpolate(lower_values, upper_values, fraction)
+
+    def _capacity(self, h):
+        """Capacité du niveau h : les niveaux les plus hauts (les plus lourds) sont les plus grands."""
+        depth = len(self._levels) - 1 - h
+        return max(2, int(math.ceil(self.k * _CAPACITY_DECAY ** depth)))
+
+    def _compress(self):
+        """Compacte les niveaux qui dépassent leur capacité en promouvant une valeur sur deux."""
+        h = 0
+        while h < len(self._levels):
+            if len(self._levels[h]) > self._capacity(h):
+                if h + 1 == len(self._levels):
+                    self._levels.append(np.empty(0, dtype=np.float64))
+
+                level = np.sort(self._levels[h])
+                # Un nombre impair de valeurs laisse la plus petite au niveau courant
+                kept = level[:len(level) % 2]
+                level = level[len(level) % 2:]
+                promoted = level[self._rng.integers(2)::2]
+
+                self._levels[h] = kept
+                self._levels[h + 1] = np.concatenate([self._levels[h + 1], promoted])
+            h += 1
+
+
+def sketch_columns(chunks, columns, epsilon=0.01, seed=None):
+    """
+    Construit un sketch par colonne en ingérant les données bloc par bloc.
+
+    Args:
+        chunks (iterable): Blocs de données (pd.DataFrame), par exemple `pd.read_csv(..., chunksize=...)`.
+        columns (list): Colonnes à résumer.
+        epsilon (float): Erreur de rang normalisée visée.
+        seed (int, optional): Graine des compactages.
+
+    Returns:
+        dict: Dictionnaire {colonne: KLLSketch}.
+    """
+    sketches = {col: KLLSketch(epsilon=epsilon, seed=seed) for col in columns}
+    for chunk in chunks:
+        for col in columns:
+            sketches[col].update(chunk[col].to_numpy(dtype=np.float64, na_value=np.nan))
+    return sketches
+
+
+def merge_column_sketches(partition_sketches):
+    """
+    Fusionne les sketches par colonne calculés sur plusieurs partitions (par exemple en parallèle).
+
+    Args:
+        partition_sketches (list): Liste de dictionnaires {colonne: KLLSketch}, un par partition.
+
+    Returns:
+        dict: Dictionnaire {colonne: KLLSketch} couvrant toutes les partitions.
+    """
+    merged = {}
+    for sketches in partition_sketches:
+        for col, sketch in sketches.items():
+            if col in merged:
+                merged[col].merge(sketch)
+            else:
+                merged[col] = sketch
+    return merged
+
+
+def sketch_percentile_cutpoints(sketches, percentiles):
+    """
+    Renvoie les seuils de percentiles estimés pour chaque colonne.
+
+    Args:
+        sketches (dict): Dictionnaire {colonne: KLLSketch}.
+        percentiles (list): Percentiles à estimer (ex: [20, 40, 60, 80]).
+
+    Returns:
+        dict: Dictionnaire {colonne: np.ndarray des seuils}.
+    """
+    return {col: sketch.percentiles(percentiles) for col, sketch in sketches.items()}
+
+
+def percentiles_from_counts(counts, percentiles):
+    """
+    Calcule exactement des percentiles à partir d'un comptage des valeurs distinctes.
+
+    Utile pour les colonnes à faible cardinalité (ex: 'Weighted_Score'), dont les comptages
+    s'additionnent d'un bloc à l'autre sans perte de précision.
+
+    Args:
+        counts (pd.Series): Nombre d'occurrences indexé par valeur.
+        percentiles (list): Percentiles à calculer, entre 0 et 100.
+
+    Returns:
+        np.ndarray: Valeurs identiques à `np.percentile` sur les données dépliées.
+    """
+    counts = counts[counts > 0].sort_index()
+    values = counts.index.to_numpy(dtype=np.float64)
+    cumulative = np.cumsum(counts.to_numpy(dtype=np.int64))
+    total = cumulative[-1]
+
+    ranks = np.asarray(percentiles, dtype=np.float64) / 100 * (total - 1)
+    lower = np.floor(ranks)
+    fraction = ranks - lower
+    lower_values = values[np.searchsorted(cumulative, lower, side='right')]
+    upper_values = values[np.searchsorted(cumulative, np.minimum(lower + 1, total - 1), side='right')]
+    return _interpolate(lower_values, upper_values, fraction)
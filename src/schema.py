@@ -0,0 +1,159 @@
+import numpy as np
+import pandas as pd
+from src.scoring_functions import SERVICE_SCORING_SPEC
+
+# Valeurs des colonnes énumérées, dans l'ordre lexical : un tri sur la colonne catégorielle donne le même
+# ordre que sur les chaînes (les valeurs inattendues sont ajoutées aux catégories au chargement)
+LAST_EVENT_TYPES = ['Cash_Out', 'Debit', 'Payment', 'Transfer']
+CUST_CATEGORIES = ['Business', 'Individual']
+GENDERS = ['Female', 'Male']
+ID_TYPES = ["Driver's License", 'National ID', 'Passport']
+REGISTRATION_STATUSES = ['Accepted', 'Not Accepted']
+REGISTRATION_TYPES = ['Existing', 'New']
+LANGUAGES = ['English', 'French']
+DEVICE_TYPES = ['Feature phone', 'Smartphone']
+
+# Indicateurs 0/1
+FLAG_COLUMNS = [
+    'HAS_USED_MOB_MONEY_IN_LAST_1_DAY', 'HAS_USED_MOB_MONEY_IN_LAST_7_DAYS',
+    'HAS_USED_MOB_MONEY_IN_LAST_30_DAYS', 'HAS_USED_MOB_MONEY_IN_LAST_90_DAYS',
+    'IS_RGS_1', 'IS_RGS_7', 'IS_RGS_30', 'IS_RGS_90',
+    'IS_DATA_RGS1', 'IS_DATA_RGS7', 'IS_DATA_RGS30', 'IS_DATA_RGS90',
+    'IS_SMARTPHONE_USER', 'HAS_SIM_NUM_PARENT', 'IS_MOB_MONEY_MERCHANT', 'IS_MOB_MONEY_USER'
+]
+
+# Nombres d'appels, de SMS, de souscriptions et d'heures
+COUNT_COLUMNS = [
+    'NB_CALLS_EMITTED_ONNET', 'NB_CALLS_RECEIVED_ONNET', 'NB_CALLS_EMITTED_OFFNET', 'NB_CALLS_RECEIVED_OFFNET',
+    'NB_CALLS_EMITTED_INTERNATIONAL', 'NB_CALLS_RECEIVED_INTERNATIONAL',
+    'NB_VOICE_PACKAGES_SUBSCRIPTIONS', 'NB_DATA_PACKAGES_SUBSCRIPTIONS', 'NB_SMS_PACKAGES_SUBSCRIPTIONS',
+    'NB_SMS_SENT_ONNET', 'NB_SMS_SENT_OFFNET', 'NB_SMS_RECEIVED_ONNET', 'NB_SMS_RECEIVED_OFFNET',
+    'NB_SMS_SENT_INTERNATIONAL', 'NB_SMS_RECEIVED_INTERNATIONAL',
+    'NB_VOICE_PACKAGES_SUBS_VIA_MOB_MONEY', 'NB_VOICE_PACKAGES_SUBS_VIA_POS', 'NB_VOICE_PACKAGES_SUBS_VIA_MAIN_ACCOUNT',
+    'NB_DATA_package_SUBS_VIA_MOB_MONEY', 'NB_DATA_package_SUBS_VIA_POS', 'NB_DATA_package_SUBS_VIA_MAIN_ACCOUNT',
+    'NB_SMS_package_SUBS_VIA_MOB_MONEY', 'NB_SMS_package_SUBS_VIA_POS', 'NB_SMS_package_SUBS_VIA_MAIN_ACCOUNT',
+    'NB_MIXED_package_SUBS_VIA_MOB_MONEY', 'NB_MIXED_package_SUBS_VIA_POS', 'NB_MIXED_package_SUBS_VIA_MAIN_ACCOUNT',
+    'NB_package_GIFTS_SENT', 'NB_package_GIFTS_RECEIVED', 'SIM_ACTIVATION_COMPLETION_TIME'
+]
+
+# Montants, volumes et durées de trafic
+AMOUNT_COLUMNS = [
+    'PAID_DATA_VOLUME', 'PAID_VOICE_TRAFFIC', 'FREE_VOICE_TRAFFIC', 'FREE_DATA_VOLUME',
+    'VOICE_REVENUE', 'DATA_REVENUE', 'SMS_REVENUE', 'DIGITAL_REVENUE', 'MOB_MONEY_REVENUE',
+    'VOICE_TRAFFIC_ONNET', 'VOICE_TRAFFIC_OFFNET',
+    'VOICE_OUTGOING_TRAFFIC_INTERNATIONAL', 'VOICE_INCOMING_TRAFFIC_INTERNATIONAL',
+    'VOICE_OUTGOING_TRAFFIC_ONNET', 'VOICE_INCOMING_TRAFFIC_ONNET',
+    'VOICE_OUTGOING_TRAFFIC_OFFNET', 'VOICE_INCOMING_TRAFFIC_OFFNET',
+    'VOICE_PACKAGES_REVENUE', 'SMS_PACKAGE_REVENUE', 'MAIN_ACCOUNT_AMOUNT',
+    'EXTRA_TIME_LOAN_AMOUNT_RENT', 'EXTRA_TIME_LOAN_AMOUNT_TO_PAY_BACK',
+    'REFILL_MAIN_AMOUNT', 'REFILL_mobile_money_ACCOUNT', 'TOTAL_SPENT_MAIN_ACCOUNT', 'TOTAL_SPENT_MOB_MONEY_ACCOUNT',
+    'AMOUNT_package_GIFTS_SENT', 'AMOUNT_package_GIFTS_RECEIVED', 'MOB_MONEY_ACCOUNT_AMOUNT',
+    'TOTAL_LOADING_MONEY_IN_MOB_MONEY', 'TOTAL_CASHOUT_MOB_MONEY_ACCOUNT',
+    'TOTAL_CASHOUT_MOB_MONEY_FOR_package_PURCHASE', 'TOTAL_CASHOUT_MOB_MONEY_TRANSFER_MONEY'
+]
+
+# Montants notés par percentiles : gardés en float64, l'arrondi en float32 pouvant faire passer
+# une valeur de l'autre côté d'un seuil de scoring
+SCORED_AMOUNT_COLUMNS = [
+    column for spec in SERVICE_SCORING_SPEC for column in spec['usage_columns'] if column in AMOUNT_COLUMNS
+]
+
+# Chaînes répétées à vocabulaire ouvert (catégories déduites des données)
+VOCABULARY_COLUMNS = [
+    'DATE_OF_THE_DAY', 'REGION', 'TOWN', 'TERRITORY', 'FIRST_NAME', 'LAST_NAME', 'NATIONALITY'
+]
+
+# Registre des types compacts des colonnes brutes (USER_DATA et KYC) : colonne -> dtype
+COLUMN_DTYPES = {
+    **{column: np.dtype(np.uint8) for column in FLAG_COLUMNS},
+    **{column: np.dtype(np.uint16) for column in COUNT_COLUMNS},
+    **{column: np.dtype(np.float32) for column in AMOUNT_COLUMNS},
+    **{column: np.dtype(np.float64) for column in SCORED_AMOUNT_COLUMNS},
+    **{column: 'category' for column in VOCABULARY_COLUMNS},
+    'LAST_EVENT_TYPE': pd.CategoricalDtype(LAST_EVENT_TYPES),
+    'CUST_CATEGORY': pd.CategoricalDtype(CUST_CATEGORIES),
+    'GENDER': pd.CategoricalDtype(GENDERS),
+    'ID_TYPE': pd.CategoricalDtype(ID_TYPES),
+    'REGISTRATION_STATUS': pd.CategoricalDtype(REGISTRATION_STATUSES),
+    'REGISTRATION_TYPE': pd.CategoricalDtype(REGISTRATION_TYPES),
+    'LANG': pd.CategoricalDtype(LANGUAGES),
+    'DEVICE_TYPE': pd.CategoricalDtype(DEVICE_TYPES)
+}
+
+
+def _fits_integer_dtype(values, dtype):
+    """Indique si une colonne peut être convertie sans perte dans un type entier (pas de NaN, bornes respectées)."""
+    values = pd.to_numeric(values, errors='coerce')
+    if values.isna().any():
+        return False
+    info = np.iinfo(dtype)
+    return bool(len(values) == 0 or (values.min() >= info.min and values.max() <= info.max and (values % 1 == 0).all()))
+
+
+def _target_dtype(values, dtype):
+    """Type cible d'une colonne ; les valeurs hors d'une énumération sont ajoutées à ses catégories."""
+    if isinstance(dtype, pd.CategoricalDtype):
+        unknown = pd.Index(values.dropna().unique()).difference(dtype.categories)
+        if len(unknown):
+            return pd.CategoricalDtype(sorted(dtype.categories.union(unknown)))
+    return dtype
+
+
+def reader_dtypes(schema=COLUMN_DTYPES):
+    """
+    Types du registre qui peuvent être passés au lecteur CSV (`read_artifact(..., dtypes=...)`),
+    pour que les colonnes soient lues directement dans leur type compact.
+
+    Les montants sont lus en flottants et les chaînes en catégories (les énumérations du registre
+    sont appliquées ensuite par `apply_schema`, qui conserve les valeurs inattendues). Les entiers
+    sont exclus : le lecteur CSV convertirait sans erreur une valeur hors des bornes du type
+    (ex: 300 en uint8), ils sont donc vérifiés puis convertis par `apply_schema`.
+
+    Args:
+        schema (dict): Registre colonne -> dtype (voir `COLUMN_DTYPES`).
+
+    Returns:
+        dict: Types colonne -> dtype à passer au lecteur.
+    """
+    dtypes = {}
+    for column, dtype in schema.items():
+        if isinstance(dtype, np.dtype) and dtype.kind == 'f':
+            dtypes[column] = dtype
+        elif isinstance(dtype, pd.CategoricalDtype) or dtype == 'category':
+            dtypes[column] = 'category'
+    return dtypes
+
+
+def apply_schema(data, schema=COLUMN_DTYPES):
+    """
+    Convertit les colonnes connues du registre dans leur type compact : uint8 pour les indicateurs
+    0/1, uint16 pour les compteurs, float32 pour les montants non notés (les montants notés restent
+    en float64, voir `SCORED_AMOUNT_COLUMNS`) et catégories pour les chaînes répétées.
+
+    Les données simulées sont écrites avec ces types et les colonnes flottantes et catégorielles
+    d'un CSV sont lues directement dans leur type (voir `reader_dtypes`) : la conversion ne porte
+    alors que sur les colonnes restées dans leur type d'origine.
+
+    Les colonnes absentes du registre ne sont pas modifiées. Une colonne entière contenant des
+    valeurs manquantes ou hors des bornes du type compact garde son type d'origine.
+
+    Args:
+        data (pd.DataFrame): Données chargées (USER_DATA, KYC ou données fusionnées).
+        schema (dict): Registre colonne -> dtype (voir `COLUMN_DTYPES`).
+
+    Returns:
+        pd.DataFrame: Les mêmes données, colonnes converties.
+    """
+    for column, dtype in schema.items():
+        if column not in data.columns:
+            continue
+        values = data[column]
+        if isinstance(dtype, np.dtype) and dtype.kind == 'u' and not _fits_integer_dtype(values, dtype):
+            print(f"Colonne {column} conservée en {values.dtype} : valeurs manquantes ou hors des bornes de {dtype}.")
+            continue
+        dtype = _target_dtype(values, dtype)
+        if isinstance(dtype, str) and isinstance(values.dtype, pd.CategoricalDtype):
+            continue
+        if values.dtype != dtype:
+            data[column] = values.astype(dtype)
+    return data
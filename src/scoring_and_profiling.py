@@ -1,10 +1,12 @@
-import pandas as pd
+import sys
+from src.artifact_store import read_artifact, write_artifact
 from src.scoring_functions import (
-    calculate_mobile_money_scores,
-    calculate_data_service_scores,
-    calculate_voice_service_scores,
-    calculate_sms_service_scores,
-    calculate_digital_service_scores,
+    SERVICE_SCORING_SPEC,
+    calculate_service_scores,
+    fit_scoring_calibration,
+    save_scoring_calibration,
+    load_scoring_calibration,
+    transform_with_calibration,
     generate_profile_code
 )
 
@@ -19,22 +21,48 @@ def calculate_all_scores(filtered_data):
     Returns:
         pd.DataFrame: Données enrichies avec les scores de tous les services.
     """
-    print("Calcul des scores Mobile Money...")
-    filtered_data = calculate_mobile_money_scores(filtered_data)
+    # Tous les scores sont calculés en une seule passe à partir de la spécification des services
+    services = ", ".join(entry['service'] for entry in SERVICE_SCORING_SPEC)
+    print(f"Calcul des scores ({services})...")
+    filtered_data = calculate_service_scores(filtered_data, SERVICE_SCORING_SPEC)
 
-    print("Calcul des scores Data Service...")
-    filtered_data = calculate_data_service_scores(filtered_data)
+    return filtered_data
 
-    print("Calcul des scores Voice Service...")
-    filtered_data = calculate_voice_service_scores(filtered_data)
 
-    print("Calcul des scores SMS Service...")
-    filtered_data = calculate_sms_service_scores(filtered_data)
+def fit_scoring(filtered_data, calibration_path):
+    """
+    Étape "fit" : calcule les seuils de percentiles sur la population de référence
+    et les sauvegarde dans un fichier de calibration.
 
-    print("Calcul des scores Digital Service...")
-    filtered_data = calculate_digital_service_scores(filtered_data)
+    Args:
+        filtered_data (pd.DataFrame): Population pré-filtrée de référence.
+        calibration_path (str): Chemin du fichier de calibration à écrire.
+
+    Returns:
+        dict: Calibration calculée.
+    """
+    print(f"Calibration des seuils de scoring sur {len(filtered_data)} lignes...")
+    calibration = fit_scoring_calibration(filtered_data, SERVICE_SCORING_SPEC)
+    save_scoring_calibration(calibration, calibration_path)
+    print(f"Calibration sauvegardée dans {calibration_path}")
+    return calibration
 
-    return filtered_data
+
+def transform_scoring(data, calibration_path):
+    """
+    Étape "transform" : note un lot de lignes avec une calibration existante,
+    sans recalculer les percentiles sur toute la population.
+
+    Args:
+        data (pd.DataFrame): Lignes à noter.
+        calibration_path (str): Chemin du fichier de calibration produit par `fit_scoring`.
+
+    Returns:
+        pd.DataFrame: Données enrichies avec les scores de tous les services.
+    """
+    calibration = load_scoring_calibration(calibration_path)
+    print(f"Calcul des scores de {len(data)} lignes avec la calibration du {calibration['created_at']}...")
+    return transform_with_calibration(data, calibration, SERVICE_SCORING_SPEC)
 
 
 def verify_scoring_columns(filtered_data, required_scoring_columns):
@@ -91,27 +119,34 @@ def verify_profile_code(scored_data):
 
 
 if __name__ == "__main__":
+    # Mode d'exécution : "full" (par défaut), "fit" ou "transform"
+    mode = sys.argv[1] if len(sys.argv) > 1 else "full"
+
     # Définir les chemins des fichiers
-    filtered_data_path = "data/processed/filtered_data.csv"
-    scored_data_path = "data/processed/scored_data.csv"
+    filtered_data_path = sys.argv[2] if len(sys.argv) > 2 else "data/processed/filtered_data.parquet"
+    scored_data_path = "data/processed/scored_data.parquet"
+    calibration_path = "data/processed/scoring_calibration.json"
 
     # Charger les données pré-filtrées
     print("Chargement des données pré-filtrées...")
-    filtered_data = pd.read_csv(filtered_data_path)
-
-
-    # Calcul de tous les scores
-    filtered_data = calculate_all_scores(filtered_data)
+    filtered_data = read_artifact(filtered_data_path)
+
+    if mode == "fit":
+        # Calibration seule : les seuils sont sauvegardés pour les transformations suivantes
+        fit_scoring(filtered_data, calibration_path)
+        sys.exit(0)
+    elif mode == "transform":
+        # Scoring avec les seuils calibrés
+        filtered_data = transform_scoring(filtered_data, calibration_path)
+    elif mode == "full":
+        # Calcul de tous les scores
+        filtered_data = calculate_all_scores(filtered_data)
+    else:
+        raise ValueError(f"Mode inconnu : {mode}. Modes possibles : full, fit, transform.")
 
 
     # Vérification des colonnes de scoring
-    required_scoring_columns = [
-        'Mobile_Money_Score',
-        'Data_Service_Score',
-        'Voice_Service_Score',
-        'SMS_Service_Score',
-        'Digital_Service_Score'
-    ]
+    required_scoring_columns = [entry['score_column'] for entry in SERVICE_SCORING_SPEC]
     verify_scoring_columns(filtered_data, required_scoring_columns)
 
 
@@ -124,5 +159,5 @@ if __name__ == "__main__":
 
 
     print(f"Sauvegarde des données scorées dans {scored_data_path}...")
-    scored_data.to_csv(scored_data_path, index=False)
+    write_artifact(scored_data, scored_data_path)
     print(f"Données scorées sauvegardées dans {scored_data_path}")
@@ -1,235 +1,414 @@
+import json
+import datetime
 import pandas as pd
 import numpy as np
+from src.quantile_sketch import sketch_columns, sketch_percentile_cutpoints
+from src.profile_codes import PROFILE_SCORE_COLUMNS, encode_profile_codes
 
-########### Fonction de Scoring du service Mobile Money ##########
-def calculate_mobile_money_scores(filtered_data):
+# Percentiles servant de seuils pour découper chaque colonne en quintiles (scores 1 à 5)
+SCORING_PERCENTILES = [20, 40, 60, 80]
+
+# Version du format des fichiers de calibration (à incrémenter si leur structure change)
+CALIBRATION_FORMAT_VERSION = 1
+
+
+########### Moteur de scoring par colonnes ##########
+def compute_percentile_cutpoints(data, columns):
     """
-    Calcule les scores Mobile Money pour chaque SIM_NUMBER.
+    Calcule les seuils (20e, 40e, 60e et 80e percentiles) de chaque colonne, hors valeurs manquantes.
 
     Args:
-        filtered_data (pd.DataFrame): Données pré-filtrées contenant les colonnes nécessaires.
+        data (pd.DataFrame): Données contenant les colonnes à découper.
+        columns (list): Liste des colonnes pour lesquelles calculer les seuils.
+
+    Returns:
+        dict: Dictionnaire {colonne: np.ndarray des quatre seuils}.
+    """
+    # Un seul appel de quantiles sur toutes les colonnes (les NaN sont ignorés colonne par colonne)
+    columns = list(columns)
+    values = data[columns].to_numpy(dtype=np.float64)
+    cutpoints = np.nanpercentile(values, SCORING_PERCENTILES, axis=0)
+    return {col: cutpoints[:, i] for i, col in enumerate(columns)}
+
+
+def score_by_percentiles(values, cutpoints):
+    """
+    Attribue à chaque valeur un score de 1 à 5 selon sa position par rapport aux seuils.
+
+    Une valeur strictement inférieure au 20e percentile vaut 1, une valeur supérieure ou
+    égale au 80e percentile vaut 5. Les valeurs manquantes valent 5, comme dans l'ancienne
+    cascade de if/elif où toutes les comparaisons avec NaN sont fausses.
+
+    Args:
+        values (array-like): Valeurs d'une colonne.
+        cutpoints (array-like): Les quatre seuils triés de la colonne.
+
+    Returns:
+        np.ndarray: Scores (int8) de même longueur que `values`.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    return np.searchsorted(cutpoints, values, side='right').astype(np.int8) + 1
+
+
+def score_activity(values):
+    """
+    Attribue un score de 5 aux lignes actives (valeur égale à 1) et de 1 aux autres.
+
+    Args:
+        values (array-like): Valeurs d'une colonne d'activité binaire (ex: 'IS_DATA_RGS90').
+
+    Returns:
+        np.ndarray: Scores (int8) de même longueur que `values`.
+    """
+    return np.where(np.asarray(values) == 1, 5, 1).astype(np.int8)
+
+
+def average_scores(score_blocks):
+    """
+    Calcule la moyenne ligne à ligne de plusieurs colonnes de scores et l'arrondit à l'entier
+    le plus proche, avec l'arrondi bancaire de `int(round(...))`.
+
+    Args:
+        score_blocks (list): Liste de tableaux de scores de même longueur.
 
     Returns:
-        pd.DataFrame: DataFrame avec deux colonnes : 'SIM_NUMBER' et 'Mobile_Money_Score'.
-    """
-    # Define transaction and subscription columns
-    transaction_columns = [
-        'MOB_MONEY_REVENUE', 'TOTAL_SPENT_MOB_MONEY_ACCOUNT', 'TOTAL_LOADING_MONEY_IN_MOB_MONEY',
-        'TOTAL_CASHOUT_MOB_MONEY_ACCOUNT', 'TOTAL_CASHOUT_MOB_MONEY_FOR_package_PURCHASE',
-        'TOTAL_CASHOUT_MOB_MONEY_TRANSFER_MONEY', 'REFILL_mobile_money_ACCOUNT'
-    ]
-    
-    subscription_columns = [
-        'NB_VOICE_PACKAGES_SUBS_VIA_MOB_MONEY', 'NB_DATA_package_SUBS_VIA_MOB_MONEY',
-        'NB_SMS_package_SUBS_VIA_MOB_MONEY', 'NB_MIXED_package_SUBS_VIA_MOB_MONEY'
-    ]
-    
-    # Calculate percentiles for transaction and subscription columns
-    transaction_percentiles = {
-        col: np.percentile(filtered_data[col].dropna(), [20, 40, 60, 80]) for col in transaction_columns
+        np.ndarray: Scores finaux (int64).
+    """
+    stacked = np.column_stack(score_blocks)
+    return np.rint(stacked.mean(axis=1)).astype(np.int64)
+
+
+########### Spécification déclarative des services ##########
+# Chaque service est décrit par ses colonnes d'usage et de souscription (notées par percentiles)
+# et ses colonnes d'activité binaire (notées 5 si actives, 1 sinon).
+# Ajouter un service revient à ajouter une entrée à cette liste.
+SERVICE_SCORING_SPEC = [
+    {
+        'service': 'Mobile Money',
+        'score_column': 'Mobile_Money_Score',
+        'usage_columns': [
+            'MOB_MONEY_REVENUE', 'TOTAL_SPENT_MOB_MONEY_ACCOUNT', 'TOTAL_LOADING_MONEY_IN_MOB_MONEY',
+            'TOTAL_CASHOUT_MOB_MONEY_ACCOUNT', 'TOTAL_CASHOUT_MOB_MONEY_FOR_package_PURCHASE',
+            'TOTAL_CASHOUT_MOB_MONEY_TRANSFER_MONEY', 'REFILL_mobile_money_ACCOUNT'
+        ],
+        'subscription_columns': [
+            'NB_VOICE_PACKAGES_SUBS_VIA_MOB_MONEY', 'NB_DATA_package_SUBS_VIA_MOB_MONEY',
+            'NB_SMS_package_SUBS_VIA_MOB_MONEY', 'NB_MIXED_package_SUBS_VIA_MOB_MONEY'
+        ],
+        'activity_columns': []
+    },
+    {
+        'service': 'Data',
+        'score_column': 'Data_Service_Score',
+        'usage_columns': ['PAID_DATA_VOLUME', 'DATA_REVENUE', 'FREE_DATA_VOLUME'],
+        'subscription_columns': [
+            'NB_DATA_PACKAGES_SUBSCRIPTIONS', 'NB_DATA_package_SUBS_VIA_POS',
+            'NB_DATA_package_SUBS_VIA_MAIN_ACCOUNT'
+        ],
+        'activity_columns': ['IS_DATA_RGS90']
+    },
+    {
+        'service': 'Voice',
+        'score_column': 'Voice_Service_Score',
+        'usage_columns': [
+            'PAID_VOICE_TRAFFIC', 'VOICE_REVENUE', 'FREE_VOICE_TRAFFIC', 'VOICE_TRAFFIC_ONNET',
+            'VOICE_TRAFFIC_OFFNET', 'VOICE_OUTGOING_TRAFFIC_INTERNATIONAL', 'VOICE_INCOMING_TRAFFIC_INTERNATIONAL',
+            'VOICE_OUTGOING_TRAFFIC_ONNET', 'VOICE_INCOMING_TRAFFIC_ONNET',
+            'VOICE_OUTGOING_TRAFFIC_OFFNET', 'VOICE_INCOMING_TRAFFIC_OFFNET',
+            'NB_CALLS_EMITTED_ONNET', 'NB_CALLS_RECEIVED_ONNET', 'NB_CALLS_EMITTED_OFFNET',
+            'NB_CALLS_RECEIVED_OFFNET', 'VOICE_PACKAGES_REVENUE'
+        ],
+        'subscription_columns': [
+            'NB_VOICE_PACKAGES_SUBSCRIPTIONS', 'NB_VOICE_PACKAGES_SUBS_VIA_POS',
+            'NB_VOICE_PACKAGES_SUBS_VIA_MAIN_ACCOUNT'
+        ],
+        'activity_columns': []
+    },
+    {
+        'service': 'SMS',
+        'score_column': 'SMS_Service_Score',
+        'usage_columns': [
+            'SMS_REVENUE', 'NB_SMS_SENT_ONNET', 'NB_SMS_SENT_OFFNET', 'NB_SMS_RECEIVED_ONNET',
+            'NB_SMS_RECEIVED_OFFNET', 'NB_SMS_SENT_INTERNATIONAL', 'NB_SMS_RECEIVED_INTERNATIONAL',
+            'SMS_PACKAGE_REVENUE'
+        ],
+        'subscription_columns': [
+            'NB_SMS_PACKAGES_SUBSCRIPTIONS', 'NB_SMS_package_SUBS_VIA_POS',
+            'NB_SMS_package_SUBS_VIA_MAIN_ACCOUNT'
+        ],
+        'activity_columns': []
+    },
+    {
+        'service': 'Digital',
+        'score_column': 'Digital_Service_Score',
+        'usage_columns': ['DIGITAL_REVENUE'],
+        'subscription_columns': [],
+        'activity_columns': []
     }
-    subscription_percentiles = {
-        col: np.percentile(filtered_data[col].dropna(), [20, 40, 60, 80]) for col in subscription_columns
+]
+
+
+def compile_scoring_spec(spec=SERVICE_SCORING_SPEC):
+    """
+    Compile la spécification des services en un plan de scoring exécutable en une seule passe.
+
+    Les colonnes notées par percentiles sont dédupliquées entre services afin que chacune
+    ne soit découpée qu'une seule fois.
+
+    Args:
+        spec (list): Spécification des services (voir `SERVICE_SCORING_SPEC`).
+
+    Raises:
+        ValueError: Si une entrée de la spécification n'a aucune colonne à noter.
+
+    Returns:
+        dict: Plan avec les clés 'percentile_columns' (liste ordonnée des colonnes à découper)
+              et 'services' (colonne de score, colonnes par percentile et colonnes d'activité).
+    """
+    percentile_columns = []
+    services = []
+    for entry in spec:
+        columns = list(entry.get('usage_columns', [])) + list(entry.get('subscription_columns', []))
+        activity_columns = list(entry.get('activity_columns', []))
+        if not columns and not activity_columns:
+            raise ValueError(f"Le service '{entry['service']}' ne déclare aucune colonne à noter.")
+
+        for col in columns:
+            if col not in percentile_columns:
+                percentile_columns.append(col)
+
+        services.append({
+            'service': entry['service'],
+            'score_column': entry['score_column'],
+            'percentile_columns': columns,
+            'activity_columns': activity_columns
+        })
+
+    return {'percentile_columns': percentile_columns, 'services': services}
+
+
+def apply_scoring_plan(data, plan, cutpoints=None):
+    """
+    Exécute un plan de scoring compilé et ajoute toutes les colonnes '*_Score' en une passe.
+
+    Args:
+        data (pd.DataFrame): Données pré-filtrées contenant les colonnes du plan.
+        plan (dict): Plan renvoyé par `compile_scoring_spec`.
+        cutpoints (dict, optional): Seuils par colonne. S'ils ne sont pas fournis, ils sont
+                                    calculés sur `data` en un seul appel multi-colonnes.
+
+    Returns:
+        pd.DataFrame: Données enrichies avec une colonne de score par service.
+    """
+    if cutpoints is None:
+        cutpoints = compute_percentile_cutpoints(data, plan['percentile_columns'])
+
+    # Chaque colonne est découpée une seule fois, puis partagée entre les services
+    column_scores = {
+        col: score_by_percentiles(data[col], cutpoints[col]) for col in plan['percentile_columns']
     }
-    
-    # Define scoring function
-    def calculate_mobile_money_score(row):
-        scores = []
-
-        # Transaction columns scoring
-        for col in transaction_columns:
-            value = row[col]
-            if value < transaction_percentiles[col][0]:
-                scores.append(1)
-            elif value < transaction_percentiles[col][1]:
-                scores.append(2)
-            elif value < transaction_percentiles[col][2]:
-                scores.append(3)
-            elif value < transaction_percentiles[col][3]:
-                scores.append(4)
-            else:
-                scores.append(5)
-
-        # Subscription columns scoring
-        for col in subscription_columns:
-            value = row[col]
-            if value < subscription_percentiles[col][0]:
-                scores.append(1)
-            elif value < subscription_percentiles[col][1]:
-                scores.append(2)
-            elif value < subscription_percentiles[col][2]:
-                scores.append(3)
-            elif value < subscription_percentiles[col][3]:
-                scores.append(4)
-            else:
-                scores.append(5)
-
-        # Average the scores and round to nearest integer for final score
-        final_score = int(round(np.mean(scores)))
-        return final_score
-    
-    # Apply the scoring function to the dataframe
-    filtered_data['Mobile_Money_Score'] = filtered_data.apply(calculate_mobile_money_score, axis=1)
-    
-    # Return the result as a new dataframe 
-    return filtered_data
 
+    for service in plan['services']:
+        score_blocks = [column_scores[col] for col in service['percentile_columns']]
+        score_blocks += [score_activity(data[col]) for col in service['activity_columns']]
+        data[service['score_column']] = average_scores(score_blocks)
 
-########### Fonction de Scoring du service Data ##########
-def calculate_data_service_scores(filtered_data):
+    return data
+
+
+def calculate_service_scores(filtered_data, spec=SERVICE_SCORING_SPEC):
     """
-    Calcule les scores du service Data pour chaque SIM_NUMBER.
+    Calcule les scores de tous les services décrits par la spécification en une seule passe.
 
     Args:
         filtered_data (pd.DataFrame): Données pré-filtrées contenant les colonnes nécessaires.
+        spec (list): Spécification des services (voir `SERVICE_SCORING_SPEC`).
 
     Returns:
-        pd.DataFrame: DataFrame avec deux colonnes : 'SIM_NUMBER' et 'Data_Service_Score'.
-    """
-    # Define data usage, subscription, and activity columns
-    data_usage_columns = ['PAID_DATA_VOLUME', 'DATA_REVENUE', 'FREE_DATA_VOLUME']
-    data_subscription_columns = [
-        'NB_DATA_PACKAGES_SUBSCRIPTIONS', 'NB_DATA_package_SUBS_VIA_POS',
-        'NB_DATA_package_SUBS_VIA_MAIN_ACCOUNT'
-    ]
-    data_activity_column = ['IS_DATA_RGS90']
-
-    # Calculate percentiles for usage and subscription columns
-    data_usage_percentiles = {
-        col: np.percentile(filtered_data[col].dropna(), [20, 40, 60, 80]) for col in data_usage_columns
+        pd.DataFrame: Données enrichies avec une colonne de score par service.
+    """
+    return apply_scoring_plan(filtered_data, compile_scoring_spec(spec))
+
+
+def _service_spec(service):
+    """Renvoie la spécification d'un seul service de `SERVICE_SCORING_SPEC`."""
+    return [entry for entry in SERVICE_SCORING_SPEC if entry['service'] == service]
+
+
+########### Calibration des seuils (fit / transform) ##########
+def fit_scoring_calibration(filtered_data, spec=SERVICE_SCORING_SPEC):
+    """
+    Calcule les seuils de percentiles de toutes les colonnes notées sur une population de référence.
+
+    Args:
+        filtered_data (pd.DataFrame): Population pré-filtrée servant de référence.
+        spec (list): Spécification des services (voir `SERVICE_SCORING_SPEC`).
+
+    Returns:
+        dict: Calibration contenant la version du format, les percentiles utilisés,
+              la taille de la population et les seuils par colonne.
+    """
+    plan = compile_scoring_spec(spec)
+    cutpoints = compute_percentile_cutpoints(filtered_data, plan['percentile_columns'])
+
+    return {
+        'format_version': CALIBRATION_FORMAT_VERSION,
+        'created_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'method': 'exact',
+        'percentiles': list(SCORING_PERCENTILES),
+        'n_rows': int(len(filtered_data)),
+        'cutpoints': {col: [float(v) for v in values] for col, values in cutpoints.items()}
     }
-    data_subscription_percentiles = {
-        col: np.percentile(filtered_data[col].dropna(), [20, 40, 60, 80]) for col in data_subscription_columns
+
+
+def fit_scoring_calibration_from_chunks(chunks, spec=SERVICE_SCORING_SPEC, epsilon=0.01, seed=None):
+    """
+    Calcule une calibration approximative en lisant la population bloc par bloc,
+    sans jamais la charger entièrement en mémoire.
+
+    Les seuils sont estimés par des sketches de quantiles dont l'erreur de rang est
+    d'environ `epsilon` (ex: un seuil du 20e percentile tombe entre le 19e et le 21e pour 0.01).
+
+    Args:
+        chunks (iterable): Blocs de la population pré-filtrée (pd.DataFrame).
+        spec (list): Spécification des services (voir `SERVICE_SCORING_SPEC`).
+        epsilon (float): Erreur de rang normalisée visée.
+        seed (int, optional): Graine des sketches, pour des seuils reproductibles.
+
+    Returns:
+        dict: Calibration au même format que `fit_scoring_calibration`.
+    """
+    plan = compile_scoring_spec(spec)
+    sketches = sketch_columns(chunks, plan['percentile_columns'], epsilon=epsilon, seed=seed)
+    cutpoints = sketch_percentile_cutpoints(sketches, SCORING_PERCENTILES)
+    n_rows = max((sketch.n for sketch in sketches.values()), default=0)
+
+    return {
+        'format_version': CALIBRATION_FORMAT_VERSION,
+        'created_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'method': 'sketch',
+        'epsilon': epsilon,
+        'percentiles': list(SCORING_PERCENTILES),
+        'n_rows': int(n_rows),
+        'cutpoints': {col: [float(v) for v in values] for col, values in cutpoints.items()}
     }
 
-    # Define scoring function for Data service
-    def calculate_data_service_score(row):
-        scores = []
-
-        # Data usage columns scoring based on percentiles
-        for col in data_usage_columns:
-            value = row[col]
-            if value < data_usage_percentiles[col][0]:
-                scores.append(1)
-            elif value < data_usage_percentiles[col][1]:
-                scores.append(2)
-            elif value < data_usage_percentiles[col][2]:
-                scores.append(3)
-            elif value < data_usage_percentiles[col][3]:
-                scores.append(4)
-            else:
-                scores.append(5)
-
-        # Data subscription columns scoring based on percentiles
-        for col in data_subscription_columns:
-            value = row[col]
-            if value < data_subscription_percentiles[col][0]:
-                scores.append(1)
-            elif value < data_subscription_percentiles[col][1]:
-                scores.append(2)
-            elif value < data_subscription_percentiles[col][2]:
-                scores.append(3)
-            elif value < data_subscription_percentiles[col][3]:
-                scores.append(4)
-            else:
-                scores.append(5)
-
-        # Activity column scoring
-        for col in data_activity_column:
-            if row[col] == 1:
-                scores.append(5)  # High score for recent activity
-            else:
-                scores.append(1)  # Low score if no recent activity
-
-        # Average the scores and round to nearest integer for final score
-        final_score = int(round(np.mean(scores)))
-        return final_score
-
-    # Apply the scoring function to the dataframe
-    filtered_data['Data_Service_Score'] = filtered_data.apply(calculate_data_service_score, axis=1)
-
-    # Return the result as a new dataframe 
-    return filtered_data
 
+def save_scoring_calibration(calibration, path):
+    """
+    Sauvegarde une calibration au format JSON.
 
-########### Fonction de scoring du service Voice ##########
-def calculate_voice_service_scores(filtered_data):
+    Args:
+        calibration (dict): Calibration renvoyée par `fit_scoring_calibration`.
+        path (str): Chemin du fichier JSON à écrire.
+
+    Returns:
+        None
     """
-    Calcule les scores Voice Service pour chaque SIM_NUMBER.
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(calibration, f, indent=2)
+
+
+def load_scoring_calibration(path):
+    """
+    Charge une calibration sauvegardée et vérifie sa compatibilité.
 
     Args:
-        filtered_data (pd.DataFrame): Données pré-filtrées contenant les colonnes nécessaires.
+        path (str): Chemin du fichier JSON de calibration.
+
+    Raises:
+        ValueError: Si la version du format ou les percentiles ne correspondent pas.
 
     Returns:
-        pd.DataFrame: DataFrame avec deux colonnes : 'SIM_NUMBER' et 'Voice_Service_Score'.
-    """
-    # Define voice usage and subscription columns
-    voice_usage_columns = [
-        'PAID_VOICE_TRAFFIC', 'VOICE_REVENUE', 'FREE_VOICE_TRAFFIC', 'VOICE_TRAFFIC_ONNET',
-        'VOICE_TRAFFIC_OFFNET', 'VOICE_OUTGOING_TRAFFIC_INTERNATIONAL', 'VOICE_INCOMING_TRAFFIC_INTERNATIONAL',
-        'VOICE_OUTGOING_TRAFFIC_ONNET', 'VOICE_INCOMING_TRAFFIC_ONNET',
-        'VOICE_OUTGOING_TRAFFIC_OFFNET', 'VOICE_INCOMING_TRAFFIC_OFFNET',
-        'NB_CALLS_EMITTED_ONNET', 'NB_CALLS_RECEIVED_ONNET', 'NB_CALLS_EMITTED_OFFNET',
-        'NB_CALLS_RECEIVED_OFFNET', 'VOICE_PACKAGES_REVENUE'
-    ]
-    voice_subscription_columns = [
-        'NB_VOICE_PACKAGES_SUBSCRIPTIONS', 'NB_VOICE_PACKAGES_SUBS_VIA_POS',
-        'NB_VOICE_PACKAGES_SUBS_VIA_MAIN_ACCOUNT'
-    ]
-
-    # Calculate percentiles for voice usage and subscription columns
-    voice_usage_percentiles = {
-        col: np.percentile(filtered_data[col].dropna(), [20, 40, 60, 80]) for col in voice_usage_columns
+        dict: Calibration avec les seuils convertis en np.ndarray.
+    """
+    with open(path, encoding='utf-8') as f:
+        calibration = json.load(f)
+
+    if calibration.get('format_version') != CALIBRATION_FORMAT_VERSION:
+        raise ValueError(
+            f"Version de calibration non supportée : {calibration.get('format_version')} "
+            f"(attendue : {CALIBRATION_FORMAT_VERSION})."
+        )
+    if calibration.get('percentiles') != list(SCORING_PERCENTILES):
+        raise ValueError(
+            f"Percentiles de calibration inattendus : {calibration.get('percentiles')}."
+        )
+
+    calibration['cutpoints'] = {
+        col: np.asarray(values, dtype=np.float64) for col, values in calibration['cutpoints'].items()
     }
-    voice_subscription_percentiles = {
-        col: np.percentile(filtered_data[col].dropna(), [20, 40, 60, 80]) for col in voice_subscription_columns
+    return calibration
+
+
+def transform_with_calibration(data, calibration, spec=SERVICE_SCORING_SPEC):
+    """
+    Note un lot de lignes de n'importe quelle taille avec des seuils déjà calibrés,
+    sans recalculer de percentiles sur le lot.
+
+    Args:
+        data (pd.DataFrame): Lignes à noter (une seule SIM ou toute la population).
+        calibration (dict): Calibration chargée par `load_scoring_calibration`.
+        spec (list): Spécification des services (voir `SERVICE_SCORING_SPEC`).
+
+    Raises:
+        ValueError: Si la calibration ne couvre pas toutes les colonnes de la spécification.
+
+    Returns:
+        pd.DataFrame: Données enrichies avec une colonne de score par service.
+    """
+    plan = compile_scoring_spec(spec)
+    missing_columns = [col for col in plan['percentile_columns'] if col not in calibration['cutpoints']]
+    if missing_columns:
+        raise ValueError(f"Seuils manquants dans la calibration pour les colonnes : {missing_columns}")
+
+    cutpoints = {
+        col: np.asarray(calibration['cutpoints'][col], dtype=np.float64)
+        for col in plan['percentile_columns']
     }
+    return apply_scoring_plan(data, plan, cutpoints)
 
-    # Define scoring function for Voice Service
-    def calculate_voice_service_score(row):
-        scores = []
-
-        # Voice usage columns scoring
-        for col in voice_usage_columns:
-            value = row[col]
-            if value < voice_usage_percentiles[col][0]:
-                scores.append(1)
-            elif value < voice_usage_percentiles[col][1]:
-                scores.append(2)
-            elif value < voice_usage_percentiles[col][2]:
-                scores.append(3)
-            elif value < voice_usage_percentiles[col][3]:
-                scores.append(4)
-            else:
-                scores.append(5)
-
-        # Voice subscription columns scoring
-        for col in voice_subscription_columns:
-            value = row[col]
-            if value < voice_subscription_percentiles[col][0]:
-                scores.append(1)
-            elif value < voice_subscription_percentiles[col][1]:
-                scores.append(2)
-            elif value < voice_subscription_percentiles[col][2]:
-                scores.append(3)
-            elif value < voice_subscription_percentiles[col][3]:
-                scores.append(4)
-            else:
-                scores.append(5)
-
-        # Average the scores and round to the nearest integer
-        final_score = int(round(np.mean(scores)))
-        return final_score
-
-    # Apply the scoring function to the dataframe
-    filtered_data['Voice_Service_Score'] = filtered_data.apply(calculate_voice_service_score, axis=1)
-
-    # Return the result as a new dataframe 
-    return filtered_data
 
+########### Fonctions de scoring par service ##########
+def calculate_mobile_money_scores(filtered_data):
+    """
+    Calcule les scores Mobile Money pour chaque SIM_NUMBER.
+
+    Args:
+        filtered_data (pd.DataFrame): Données pré-filtrées contenant les colonnes nécessaires.
+
+    Returns:
+        pd.DataFrame: Données enrichies avec la colonne 'Mobile_Money_Score'.
+    """
+    return calculate_service_scores(filtered_data, _service_spec('Mobile Money'))
+
+
+def calculate_data_service_scores(filtered_data):
+    """
+    Calcule les scores du service Data pour chaque SIM_NUMBER.
+
+    Args:
+        filtered_data (pd.DataFrame): Données pré-filtrées contenant les colonnes nécessaires.
+
+    Returns:
+        pd.DataFrame: Données enrichies avec la colonne 'Data_Service_Score'.
+    """
+    return calculate_service_scores(filtered_data, _service_spec('Data'))
+
+
+def calculate_voice_service_scores(filtered_data):
+    """
+    Calcule les scores Voice Service pour chaque SIM_NUMBER.
+
+    Args:
+        filtered_data (pd.DataFrame): Données pré-filtrées contenant les colonnes nécessaires.
+
+    Returns:
+        pd.DataFrame: Données enrichies avec la colonne 'Voice_Service_Score'.
+    """
+    return calculate_service_scores(filtered_data, _service_spec('Voice'))
 
 
-########## Fonction de scoring du service SMS ###########
 def calculate_sms_service_scores(filtered_data):
     """
     Calcule les scores SMS Service pour chaque SIM_NUMBER.
@@ -238,71 +417,11 @@ def calculate_sms_service_scores(filtered_data):
         filtered_data (pd.DataFrame): Données pré-filtrées contenant les colonnes nécessaires.
 
     Returns:
-        pd.DataFrame: DataFrame avec deux colonnes : 'SIM_NUMBER' et 'SMS_Service_Score'.
-    """
-    # Define SMS usage and subscription columns
-    sms_usage_columns = [
-        'SMS_REVENUE', 'NB_SMS_SENT_ONNET', 'NB_SMS_SENT_OFFNET', 'NB_SMS_RECEIVED_ONNET',
-        'NB_SMS_RECEIVED_OFFNET', 'NB_SMS_SENT_INTERNATIONAL', 'NB_SMS_RECEIVED_INTERNATIONAL',
-        'SMS_PACKAGE_REVENUE'
-    ]
-    sms_subscription_columns = [
-        'NB_SMS_PACKAGES_SUBSCRIPTIONS', 'NB_SMS_package_SUBS_VIA_POS',
-        'NB_SMS_package_SUBS_VIA_MAIN_ACCOUNT'
-    ]
-
-    # Calculate percentiles for SMS usage and subscription columns
-    sms_usage_percentiles = {
-        col: np.percentile(filtered_data[col].dropna(), [20, 40, 60, 80]) for col in sms_usage_columns
-    }
-    sms_subscription_percentiles = {
-        col: np.percentile(filtered_data[col].dropna(), [20, 40, 60, 80]) for col in sms_subscription_columns
-    }
-
-    # Define scoring function for SMS Service
-    def calculate_sms_service_score(row):
-        scores = []
-
-        # SMS usage columns scoring
-        for col in sms_usage_columns:
-            value = row[col]
-            if value < sms_usage_percentiles[col][0]:
-                scores.append(1)
-            elif value < sms_usage_percentiles[col][1]:
-                scores.append(2)
-            elif value < sms_usage_percentiles[col][2]:
-                scores.append(3)
-            elif value < sms_usage_percentiles[col][3]:
-                scores.append(4)
-            else:
-                scores.append(5)
-
-        # SMS subscription columns scoring
-        for col in sms_subscription_columns:
-            value = row[col]
-            if value < sms_subscription_percentiles[col][0]:
-                scores.append(1)
-            elif value < sms_subscription_percentiles[col][1]:
-                scores.append(2)
-            elif value < sms_subscription_percentiles[col][2]:
-                scores.append(3)
-            elif value < sms_subscription_percentiles[col][3]:
-                scores.append(4)
-            else:
-                scores.append(5)
-
-        # Average the scores and round to the nearest integer
-        final_score = int(round(np.mean(scores)))
-        return final_score
-
-    # Apply the scoring function to the dataframe
-    filtered_data['SMS_Service_Score'] = filtered_data.apply(calculate_sms_service_score, axis=1)
-
-    # Return the result as a new dataframe
-    return filtered_data
+        pd.DataFrame: Données enrichies avec la colonne 'SMS_Service_Score'.
+    """
+    return calculate_service_scores(filtered_data, _service_spec('SMS'))
 
 
-########## Fonction de scoring du service Digital ##########
 def calculate_digital_service_scores(filtered_data):
     """
     Calcule les scores Digital Service pour chaque SIM_NUMBER.
@@ -311,61 +430,26 @@ def calculate_digital_service_scores(filtered_data):
         filtered_data (pd.DataFrame): Données pré-filtrées contenant les colonnes nécessaires.
 
     Returns:
-        pd.DataFrame: DataFrame avec deux colonnes : 'SIM_NUMBER' et 'Digital_Service_Score'.
-    """
-    # Calculate percentiles for DIGITAL_REVENUE
-    digital_revenue_percentiles = np.percentile(
-        filtered_data['DIGITAL_REVENUE'].dropna(), [20, 40, 60, 80]
-    )
-
-    # Define scoring function for Digital Service
-    def calculate_digital_service_score(row):
-        scores = []
-
-        # Digital revenue scoring based on percentile thresholds
-        digital_revenue = row['DIGITAL_REVENUE']
-        if digital_revenue < digital_revenue_percentiles[0]:
-            scores.append(1)
-        elif digital_revenue < digital_revenue_percentiles[1]:
-            scores.append(2)
-        elif digital_revenue < digital_revenue_percentiles[2]:
-            scores.append(3)
-        elif digital_revenue < digital_revenue_percentiles[3]:
-            scores.append(4)
-        else:
-            scores.append(5)
-
-        # Calculate the average score for Digital Service
-        final_score = int(round(np.mean(scores)))
-        return final_score
-
-    # Apply the scoring function to the dataframe
-    filtered_data['Digital_Service_Score'] = filtered_data.apply(
-        calculate_digital_service_score, axis=1
-    )
-
-    # Return the result as a new dataframe 
-    return filtered_data
+        pd.DataFrame: Données enrichies avec la colonne 'Digital_Service_Score'.
+    """
+    return calculate_service_scores(filtered_data, _service_spec('Digital'))
 
 
 def generate_profile_code(filtered_data):
     """
     Génère le profil final 'Profile_Code' en concaténant les scores de chaque service.
 
+    La colonne est de type `PROFILE_CODE_DTYPE` (catégoriel sur les 3125 codes possibles) : ses
+    valeurs restent les chaînes à cinq chiffres (ex: '34251') dans les exports CSV et les notebooks.
+
     Args:
         filtered_data (pd.DataFrame): DataFrame contenant les scores des différents services.
 
     Returns:
         pd.DataFrame: DataFrame enrichie avec la colonne 'Profile_Code'.
     """
-    # Remplacer les valeurs manquantes par une chaîne vide avant la concaténation
-    filtered_data['Profile_Code'] = (
-        filtered_data['Mobile_Money_Score'].astype(int).astype(str) +
-        filtered_data['Data_Service_Score'].astype(int).astype(str) +
-        filtered_data['Voice_Service_Score'].astype(int).astype(str) +
-        filtered_data['SMS_Service_Score'].astype(int).astype(str) +
-        filtered_data['Digital_Service_Score'].astype(int).astype(str)
-    )
+    # Code catégoriel : la valeur est la chaîne à cinq chiffres, stockée comme un index de 0 à 3124
+    filtered_data['Profile_Code'] = encode_profile_codes(filtered_data[PROFILE_SCORE_COLUMNS].to_numpy())
     return filtered_data
 
 
@@ -1,57 +1,125 @@
 import numpy as np
 import pandas as pd
 import os
+from src.artifact_store import read_artifact, write_artifact
+from src.profile_codes import (
+    PROFILE_SCORE_COLUMNS,
+    profile_index,
+    weighted_scores,
+    weighted_scores_from_scores
+)
 
-def segment_profiles(scored_data):
+# Segments, du plus faible au plus fort
+SEGMENT_LABELS = ['Very Low', 'Low', 'Medium', 'High', 'Very High']
+
+# Type de la colonne Segment : un catégoriel ordonné
+SEGMENT_DTYPE = pd.CategoricalDtype(SEGMENT_LABELS, ordered=True)
+
+# Méthodes de découpage en segments
+SEGMENTATION_METHODS = ['percentile', 'equal_frequency']
+
+
+def calculate_weighted_score(profile_code):
+    """
+    Calcule le score pondéré d'un Profile_Code.
+
+    Args:
+        profile_code (str or int): Code de profil à cinq chiffres (ex: '34251').
+
+    Returns:
+        int: Score pondéré, compris entre 15 et 75.
+    """
+    return int(weighted_scores([profile_code])[0])
+
+
+def assign_segments_by_percentile(weighted_score, percentiles):
+    """
+    Attribue les segments par comparaison aux seuils (20e, 40e, 60e, 80e percentiles) : un score
+    égal à un seuil passe dans le segment supérieur.
+
+    Args:
+        weighted_score (np.ndarray): Scores pondérés.
+        percentiles (array-like): Quatre seuils croissants.
+
+    Returns:
+        np.ndarray: Index du segment de chaque ligne (0 pour Very Low à 4 pour Very High).
+    """
+    # Nombre de seuils inférieurs ou égaux au score
+    return np.searchsorted(np.asarray(percentiles), weighted_score, side='right')
+
+
+def assign_segments_by_equal_frequency(weighted_score, tie_breaker=None):
+    """
+    Attribue les segments par rang, de sorte que chaque segment compte le même nombre de lignes
+    (à une ligne près), même si de nombreux clients ont le même score pondéré.
+
+    Les ex aequo sont départagés par `tie_breaker` (croissant), puis par l'ordre des lignes.
+
+    Args:
+        weighted_score (np.ndarray): Scores pondérés.
+        tie_breaker (np.ndarray, optional): Critère secondaire de classement (ex: index de profil,
+                                            qui favorise Mobile Money, puis Data, etc.).
+
+    Returns:
+        np.ndarray: Index du segment de chaque ligne (0 pour Very Low à 4 pour Very High).
+    """
+    n_rows = len(weighted_score)
+    keys = (weighted_score,) if tie_breaker is None else (tie_breaker, weighted_score)
+    # np.lexsort trie selon la dernière clé, puis les précédentes, de façon stable
+    order = np.lexsort(keys)
+    ranks = np.empty(n_rows, dtype=np.int64)
+    ranks[order] = np.arange(n_rows)
+    return ranks * len(SEGMENT_LABELS) // max(n_rows, 1)
+
+
+def segment_profiles(scored_data, percentiles=None, method='percentile'):
     """
     Segmente les profils en cinq catégories (Very High, High, Medium, Low, Very Low)
     en fonction du score pondéré calculé à partir de Profile_Code.
 
+    Le score pondéré ne prend qu'une soixantaine de valeurs : avec la méthode 'percentile', les
+    ex aequo restent dans le même segment et les segments peuvent être de tailles très inégales.
+    La méthode 'equal_frequency' découpe par rang et garantit des segments de même taille.
+
     Args:
-        scored_data (pd.DataFrame): Données scorées contenant la colonne 'Profile_Code'.
+        scored_data (pd.DataFrame): Données scorées contenant la colonne 'Profile_Code'
+                                    (ou, à défaut, les cinq colonnes de score par service).
+        percentiles (array-like, optional): Seuils (20e, 40e, 60e, 80e percentiles) du score pondéré
+                                            déjà calculés sur toute la population, par exemple à l'aide
+                                            d'un sketch. Par défaut, ils sont calculés sur `scored_data`.
+        method (str): 'percentile' (par défaut) ou 'equal_frequency'.
+
+    Raises:
+        ValueError: Si la méthode est inconnue, ou si des seuils sont fournis avec 'equal_frequency'
+                    (les rangs doivent être calculés sur toute la population).
 
     Returns:
-        pd.DataFrame: Données enrichies avec les colonnes 'Weighted_Score' et 'Segment'.
+        pd.DataFrame: Données enrichies avec les colonnes 'Weighted_Score' et 'Segment' (catégoriel ordonné).
     """
-
-    # Calculer le score pondéré pour chaque Profile_Code
-    def calculate_weighted_score(profile_code):
-        weights = {
-            'Mobile Money': 5,
-            'Data': 4,
-            'Voice': 3,
-            'SMS': 2,
-            'Digital': 1
-        }
-        mobile_money_score = int(str(profile_code)[0]) * weights['Mobile Money']
-        data_score = int(str(profile_code)[1]) * weights['Data']
-        voice_score = int(str(profile_code)[2]) * weights['Voice']
-        sms_score = int(str(profile_code)[3]) * weights['SMS']
-        digital_score = int(str(profile_code)[4]) * weights['Digital']
-
-        return mobile_money_score + data_score + voice_score + sms_score + digital_score
+    if method not in SEGMENTATION_METHODS:
+        raise ValueError(f"Méthode de segmentation inconnue : {method}. Méthodes possibles : {SEGMENTATION_METHODS}.")
+    if method == 'equal_frequency' and percentiles is not None:
+        raise ValueError("La méthode 'equal_frequency' ne peut pas utiliser de seuils précalculés.")
 
     print("Calcul des scores pondérés...")
-    scored_data['Weighted_Score'] = scored_data['Profile_Code'].apply(calculate_weighted_score)
-
-    # Calculer les percentiles pour la segmentation
-    percentiles = np.percentile(scored_data['Weighted_Score'], [20, 40, 60, 80])
-
-    # Fonction pour catégoriser en fonction des percentiles
-    def categorize_by_percentile(weighted_score):
-        if weighted_score >= percentiles[3]:  # Au-dessus du 80e percentile
-            return 'Very High'
-        elif weighted_score >= percentiles[2]:  # Entre 60e et 80e percentile
-            return 'High'
-        elif weighted_score >= percentiles[1]:  # Entre 40e et 60e percentile
-            return 'Medium'
-        elif weighted_score >= percentiles[0]:  # Entre 20e et 40e percentile
-            return 'Low'
-        else:  # En dessous du 20e percentile
-            return 'Very Low'
+    if 'Profile_Code' in scored_data.columns:
+        # Lecture dans la table des scores pondérés des 3125 codes, sans décoder de chaînes
+        scored_data['Weighted_Score'] = weighted_scores(scored_data['Profile_Code'])
+    else:
+        scored_data['Weighted_Score'] = weighted_scores_from_scores(scored_data[PROFILE_SCORE_COLUMNS])
+    weighted_score = scored_data['Weighted_Score'].to_numpy()
 
     print("Catégorisation des segments...")
-    scored_data['Segment'] = scored_data['Weighted_Score'].apply(categorize_by_percentile)
+    if method == 'percentile':
+        # Calculer les percentiles pour la segmentation
+        if percentiles is None:
+            percentiles = np.percentile(weighted_score, [20, 40, 60, 80])
+        segment_index = assign_segments_by_percentile(weighted_score, percentiles)
+    else:
+        tie_breaker = profile_index(scored_data['Profile_Code']) if 'Profile_Code' in scored_data.columns else None
+        segment_index = assign_segments_by_equal_frequency(weighted_score, tie_breaker)
+
+    scored_data['Segment'] = pd.Categorical.from_codes(segment_index, dtype=SEGMENT_DTYPE)
 
     return scored_data
 
@@ -61,12 +129,12 @@ if __name__ == "__main__":
     # Définir les chemins des fichiers
     base_path = os.getcwd()
     processed_data_path = os.path.join(base_path, "data", "processed")
-    scored_data_path = os.path.join(processed_data_path, "scored_data.csv")
-    segmented_data_path = os.path.join(processed_data_path, "segmented_data.csv")
+    scored_data_path = os.path.join(processed_data_path, "scored_data.parquet")
+    segmented_data_path = os.path.join(processed_data_path, "segmented_data.parquet")
 
     # Charger les données scorées
     print("Chargement des données scorées...")
-    scored_data = pd.read_csv(scored_data_path)
+    scored_data = read_artifact(scored_data_path)
 
     # Appliquer la segmentation
     from src.segmentation import segment_profiles
@@ -83,6 +151,6 @@ if __name__ == "__main__":
 
     # Sauvegarder les données segmentées
     print(f"Sauvegarde des données segmentées dans {segmented_data_path}...")
-    segmented_data.to_csv(segmented_data_path, index=False)
+    write_artifact(segmented_data, segmented_data_path)
     print("Segmentation terminée avec succès.")
 
@@ -0,0 +1,174 @@
+import os
+import json
+import pandas as pd
+from src.artifact_store import read_artifact, remove_artifact
+
+# Nom et version du manifeste d'un entrepôt de transactions
+TRANSACTIONS_MANIFEST = "_manifest.json"
+TRANSACTIONS_STORE_FORMAT_VERSION = 1
+
+# Colonnes de partitionnement (style Hive : year=2024/month=11/)
+PARTITION_COLUMNS = ['year', 'month']
+
+# Colonnes contenant des SIM, dont les bornes sont enregistrées dans le manifeste
+SIM_COLUMNS = ['nameOrig', 'nameDest']
+
+
+def _file_statistics(part):
+    """Bornes (min, max) de la date et des SIM d'une partition."""
+    sims = pd.concat([part[column] for column in SIM_COLUMNS], ignore_index=True).dropna().astype(str)
+    return {
+        'min': {'transaction_date': part['transaction_date'].min().isoformat(), 'SIM_NUMBER': sims.min()},
+        'max': {'transaction_date': part['transaction_date'].max().isoformat(), 'SIM_NUMBER': sims.max()}
+    }
+
+
+def write_transactions_store(transactions, path):
+    """
+    Sauvegarde les transactions en un jeu de données Parquet partitionné par année et par mois
+    (year=AAAA/month=M/part-00000.parquet), accompagné d'un manifeste des fichiers et de leurs
+    bornes (min, max) de date et de SIM.
+
+    Chaque partition est triée par date, pour que les statistiques des groupes de lignes
+    permettent aussi d'ignorer les jours non demandés.
+
+    Args:
+        transactions (pd.DataFrame): Transactions avec 'transaction_date', 'nameOrig' et 'nameDest'.
+        path (str): Répertoire de l'entrepôt (ex: 'data/raw/real_transactions_with_dates.parquet').
+
+    Returns:
+        dict: Manifeste de l'entrepôt.
+    """
+    remove_artifact(path)
+    transaction_dates = pd.to_datetime(transactions['transaction_date'])
+    transactions = transactions.assign(transaction_date=transaction_dates)
+
+    files = []
+    for (year, month), part in transactions.groupby(
+        [transaction_dates.dt.year.rename('year'), transaction_dates.dt.month.rename('month')]
+    ):
+        relative_path = os.path.join(f"year={year}", f"month={month}", "part-00000.parquet")
+        os.makedirs(os.path.join(path, os.path.dirname(relative_path)), exist_ok=True)
+        part = part.sort_values('transaction_date', kind='stable')
+        part.to_parquet(os.path.join(path, relative_path), index=False)
+        files.append({
+            'path': relative_path,
+            'partition': {'year': int(year), 'month': int(month)},
+            'num_rows': len(part),
+            **_file_statistics(part)
+        })
+
+    manifest = {'format_version': TRANSACTIONS_STORE_FORMAT_VERSION, 'partitioning': PARTITION_COLUMNS, 'files': files}
+    with open(os.path.join(path, TRANSACTIONS_MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def read_manifest(path):
+    """
+    Charge le manifeste d'un entrepôt de transactions.
+
+    Args:
+        path (str): Chemin des transactions.
+
+    Returns:
+        dict: Manifeste, ou None si `path` n'est pas un entrepôt partitionné (ex: un fichier unique).
+    """
+    manifest_path = os.path.join(path, TRANSACTIONS_MANIFEST)
+    if not os.path.isfile(manifest_path):
+        return None
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') != TRANSACTIONS_STORE_FORMAT_VERSION:
+        raise ValueError(f"Version de manifeste non supportée pour {path} : {manifest.get('format_version')}")
+    return manifest
+
+
+def select_files(path, start=None, end=None, sim_numbers=None):
+    """
+    Renvoie les fichiers d'un entrepôt pouvant contenir des transactions de la période et des SIM
+    demandées, d'après les bornes du manifeste : les autres fichiers ne sont pas ouverts.
+
+    Args:
+        path (str): Répertoire de l'entrepôt.
+        start (pd.Timestamp, optional): Début de la période (inclus).
+        end (pd.Timestamp, optional): Fin de la période (exclue).
+        sim_numbers (array-like, optional): SIM recherchées.
+
+    Returns:
+        list: Chemins des fichiers retenus.
+    """
+    sims = None if sim_numbers is None else pd.Series(sim_numbers).dropna().astype(str)
+    selected = []
+    for entry in read_manifest(path)['files']:
+        min_date = pd.Timestamp(entry['min']['transaction_date'])
+        max_date = pd.Timestamp(entry['max']['transaction_date'])
+        if start is not None and max_date < start:
+            continue
+        if end is not None and min_date >= end:
+            continue
+        if sims is not None and not sims.between(entry['min']['SIM_NUMBER'], entry['max']['SIM_NUMBER']).any():
+            continue
+        selected.append(os.path.join(path, entry['path']))
+    return selected
+
+
+def read_transactions(path, columns=None, start=None, end=None):
+    """
+    Charge les transactions d'une période, en ne lisant que les partitions qui la recoupent.
+
+    Accepte un entrepôt partitionné (voir `write_transactions_store`) ou un artefact unique
+    (Parquet ou CSV) ; pour Parquet, les bornes de la période sont poussées dans la lecture.
+
+    Args:
+        path (str): Chemin des transactions.
+        columns (list, optional): Colonnes à charger. Par défaut, toutes.
+        start (pd.Timestamp, optional): Début de la période (inclus).
+        end (pd.Timestamp, optional): Fin de la période (exclue).
+
+    Returns:
+        pd.DataFrame: Transactions de la période ('transaction_date' convertie en datetime).
+    """
+    filters = []
+    if start is not None:
+        filters.append(('transaction_date', '>=', pd.Timestamp(start)))
+    if end is not None:
+        filters.append(('transaction_date', '<', pd.Timestamp(end)))
+
+    if read_manifest(path) is not None:
+        files = select_files(path, start, end)
+        parts = [pd.read_parquet(f, columns=columns, filters=filters or None) for f in files]
+        transactions = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=columns)
+    elif os.path.splitext(path)[1].lower() == '.csv':
+        # Les dates d'un CSV sont lues comme des chaînes : la période est filtrée après conversion
+        transactions = read_artifact(path, columns=columns)
+    else:
+        transactions = read_artifact(path, columns=columns, filters=filters or None)
+
+    transactions['transaction_date'] = pd.to_datetime(transactions['transaction_date'])
+    in_period = pd.Series(True, index=transactions.index)
+    if start is not None:
+        in_period &= transactions['transaction_date'] >= start
+    if end is not None:
+        in_period &= transactions['transaction_date'] < end
+    return transactions[in_period.to_numpy()].reset_index(drop=True)
+
+
+def transactions_date_range(path):
+    """
+    Renvoie la première et la dernière date des transactions, lues dans le manifeste si possible.
+
+    Args:
+        path (str): Chemin des transactions.
+
+    Returns:
+        tuple: (première date, dernière date) (pd.Timestamp).
+    """
+    manifest = read_manifest(path)
+    if manifest is not None:
+        return (
+            min(pd.Timestamp(entry['min']['transaction_date']) for entry in manifest['files']),
+            max(pd.Timestamp(entry['max']['transaction_date']) for entry in manifest['files'])
+        )
+    transaction_dates = pd.to_datetime(read_artifact(path, columns=['transaction_date'])['transaction_date'])
+    return transaction_dates.min(), transaction_dates.max()
@@ -0,0 +1,114 @@
+import os
+import numpy as np
+import pandas as pd
+from src.artifact_store import (
+    ARTIFACT_FORMATS,
+    PartitionWriter,
+    append_artifact,
+    artifact_path,
+    count_artifact_rows,
+    filter_mask,
+    iter_artifact,
+    read_artifact,
+    register_artifact_format,
+    remove_artifact,
+    write_artifact
+)
+
+def test_write_and_read_artifact(tmp_path):
+    data = pd.DataFrame({
+        'SIM_NUMBER': ['C1', 'C2', 'C3', 'C4'],
+        'Segment': ['Low', 'High', 'High', 'Medium'],
+        'Score': [1.5, 4.0, 3.5, 2.0]
+    })
+
+    for fmt in ['parquet', 'csv']:
+        path = artifact_path(str(tmp_path), "scored_data", fmt)
+        write_artifact(data, path)
+
+        # Aller-retour complet, puis projection et filtres poussés dans la lecture
+        pd.testing.assert_frame_equal(read_artifact(path), data)
+        filters = [('Segment', '==', 'High'), ('Score', '>', 3.8)]
+        filtered = read_artifact(path, columns=['SIM_NUMBER', 'Score'], filters=filters)
+        assert list(filtered.columns) == ['SIM_NUMBER', 'Score'], f"Seules les colonnes demandées doivent être lues ({fmt})"
+        assert list(filtered['SIM_NUMBER']) == ['C2'], f"Les filtres doivent être appliqués à la lecture ({fmt})"
+
+        remove_artifact(path)
+        assert not os.path.exists(path), f"L'artefact doit être supprimé ({fmt})"
+
+    # Opérateurs 'in' et 'not in' ; un opérateur inconnu est refusé
+    mask = filter_mask(data, [('Segment', 'in', ['High', 'Medium']), ('SIM_NUMBER', 'not in', ['C3'])])
+    assert list(mask) == [False, True, False, True], "Le masque des filtres est incorrect"
+    try:
+        filter_mask(data, [('Score', 'like', 1)])
+        assert False, "Un opérateur inconnu doit lever une erreur"
+    except ValueError:
+        pass
+
+    # Un format enregistré est choisi d'après l'extension
+    register_artifact_format(
+        'pkl',
+        read=lambda path, columns=None, filters=None, dtypes=None: pd.read_pickle(path),
+        write=lambda data, path: data.to_pickle(path)
+    )
+    path = artifact_path(str(tmp_path), "scored_data", 'pkl')
+    write_artifact(data, path)
+    pd.testing.assert_frame_equal(read_artifact(path), data)
+    try:
+        append_artifact(data, path)
+        assert False, "Une opération non supportée par le format doit lever une erreur"
+    except ValueError:
+        pass
+    ARTIFACT_FORMATS.pop('pkl')
+
+
+def test_append_and_count_artifact(tmp_path):
+    blocks = [
+        pd.DataFrame({'SIM_NUMBER': np.arange(start, start + 3), 'Score': np.arange(3) + 0.5}) for start in [0, 3, 6]
+    ]
+
+    for fmt in ['parquet', 'csv']:
+        path = artifact_path(str(tmp_path), "cash_allocated_data", fmt)
+        for block in blocks:
+            append_artifact(block, path)
+
+        # Les blocs ajoutés sont relus dans l'ordre, entiers ou par blocs
+        assert count_artifact_rows(path) == 9, f"Le nombre de lignes est incorrect ({fmt})"
+        assert list(read_artifact(path)['SIM_NUMBER']) == list(range(9)), f"Les blocs doivent être relus dans l'ordre ({fmt})"
+        chunks = [len(chunk) for chunk in iter_artifact(path, 4)]
+        assert max(chunks) <= 4 and sum(chunks) == 9, f"Les blocs lus sont incorrects ({fmt})"
+
+    # CSV sans fin de ligne finale, avec un champ sur deux lignes et une ligne vide
+    path = str(tmp_path / "quoted.csv")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('SIM_NUMBER,TOWN\nC1,"Saint\nLouis"\n\nC2,Dakar')
+    assert count_artifact_rows(path) == len(read_artifact(path)) == 2, "Le comptage CSV doit suivre le lecteur CSV"
+
+
+def test_partition_writer(tmp_path):
+    paths = [str(tmp_path / f"part_{p}.parquet") for p in range(3)]
+
+    # Trois blocs par partition, puis une valeur manquante (convertie) et une chaîne (non convertible)
+    with PartitionWriter(paths) as writer:
+        for block in range(3):
+            for p in range(3):
+                writer.write(p, pd.DataFrame({'SIM_NUMBER': [f"C{block}{p}"], 'Score': [block]}))
+        writer.write(0, pd.DataFrame({'SIM_NUMBER': ["C30"], 'Score': [np.nan]}))
+        writer.write(1, pd.DataFrame({'SIM_NUMBER': ["C31"], 'Score': ["haut"]}))
+
+    # Vérifications : un fichier par partition, sauf si le schéma ne peut pas être converti
+    assert [sorted(os.listdir(path)) for path in paths] == [
+        ["part-00000.parquet"], ["part-00000.parquet", "part-00001.parquet"], ["part-00000.parquet"]
+    ], "Chaque partition doit garder un seul fichier ouvert"
+    assert list(read_artifact(paths[0])['SIM_NUMBER']) == ["C00", "C10", "C20", "C30"], "Les lignes doivent être conservées"
+    assert read_artifact(paths[0])['Score'].isna().sum() == 1, "Une valeur manquante doit être convertie dans le schéma ouvert"
+    assert count_artifact_rows(paths[1]) == 4, "Les parts d'une partition doivent être comptées ensemble"
+
+    print("Tous les tests ont réussi !")
+
+# Exécuter les tests
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_write_and_read_artifact(pathlib.Path(tempfile.mkdtemp()))
+    test_append_and_count_artifact(pathlib.Path(tempfile.mkdtemp()))
+    test_partition_writer(pathlib.Path(tempfile.mkdtemp()))
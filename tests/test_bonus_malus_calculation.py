@@ -0,0 +1,154 @@
+import numpy as np
+import pandas as pd
+from src.bonus_malus_calculation import (
+    REPAYMENT_RULES,
+    snapshot_dates,
+    aggregate_transactions,
+    process_transactions,
+    run_bonus_malus,
+    pivot_snapshot_balances,
+    evaluate_bonus_malus_rules
+)
+
+def test_process_transactions(tmp_path):
+    # Transactions du 15, du 29 février (dernier jour) et du 20 (ignorée)
+    transactions = pd.DataFrame({
+        'step': [1, 2, 3, 4],
+        'transaction_date': pd.to_datetime(['2024-02-15', '2024-02-15', '2024-02-29', '2024-02-20']),
+        'nameOrig': ['C1', 'C1', 'C2', 'C1'],
+        'newbalanceOrig': [100.0, 200.0, 50.0, 999.0],
+        'nameDest': ['C2', 'C3', 'C1', 'C2'],
+        'newbalanceDest': [10.0, 30.0, 0.0, 999.0]
+    })
+    input_file = str(tmp_path / "transactions.parquet")
+    transactions.to_parquet(input_file, index=False)
+
+    results = {}
+    for backend in ['pandas', 'dask']:
+        output_file = str(tmp_path / f"transactions_previous_month_{backend}.parquet")
+        process_transactions(input_file, output_file, backend=backend)
+        results[backend] = pd.read_parquet(output_file)
+
+    # Vérifications : soldes moyens par SIM et par jour, identiques avec les deux moteurs
+    expected = pd.DataFrame({
+        'SIM_NUMBER': ['C1', 'C1', 'C2', 'C2', 'C3'],
+        'DATE_OF_THE_DAY': pd.to_datetime(['2024-02-15', '2024-02-29', '2024-02-15', '2024-02-29', '2024-02-15']),
+        'balance': [150.0, 0.0, 10.0, 50.0, 30.0]
+    })
+    pd.testing.assert_frame_equal(results['pandas'], expected, check_dtype=False)
+    pd.testing.assert_frame_equal(results['dask'], results['pandas'])
+
+
+def test_reference_month(tmp_path):
+    # Le dernier jour du mois est le 29 en février 2024, le 31 en mars
+    assert snapshot_dates('2024-02') == [pd.Timestamp('2024-02-15'), pd.Timestamp('2024-02-29')]
+    assert snapshot_dates('2024-03')[1] == pd.Timestamp('2024-03-31'), "Le relevé doit tomber le dernier jour du mois"
+
+    transactions = pd.DataFrame({
+        'transaction_date': pd.to_datetime(['2024-02-29', '2024-03-15', '2024-03-31', '2024-04-10']),
+        'nameOrig': ['C1', 'C1', 'C1', 'C1'],
+        'newbalanceOrig': [1.0, 2.0, 3.0, 4.0],
+        'nameDest': ['C2', 'C2', 'C2', 'C2'],
+        'newbalanceDest': [5.0, 6.0, 7.0, 8.0]
+    })
+    input_file = str(tmp_path / "transactions.parquet")
+    transactions.to_parquet(input_file, index=False)
+
+    # Seules les transactions du mois de référence sont prises en compte
+    balances = aggregate_transactions(input_file, reference_month='2024-03')
+    assert list(balances['balance']) == [2.0, 3.0, 6.0, 7.0], "Les relevés du mois de référence sont incorrects"
+
+    # Par défaut, le dernier mois complet (avril n'est pas terminé)
+    balances = aggregate_transactions(input_file)
+    assert set(balances['DATE_OF_THE_DAY']) == {pd.Timestamp('2024-03-15'), pd.Timestamp('2024-03-31')}, \
+        "Le mois de référence par défaut doit être le dernier mois complet"
+
+
+def test_run_bonus_malus():
+    # Soldes du 15 et du 31 pour C1 et C2 ; C3 n'a aucune transaction ; C4 n'est pas un client final
+    balances = pd.DataFrame({
+        'SIM_NUMBER': ['C1', 'C1', 'C2', 'C2', 'C4'],
+        'DATE_OF_THE_DAY': pd.to_datetime(['2024-10-15', '2024-10-31', '2024-10-15', '2024-10-31', '2024-10-15']),
+        'balance': [100.0, 50.0, 0.0, 80.0, 10.0]
+    })
+    final_clients = pd.DataFrame({
+        'SIM_NUMBER': ['C1', 'C2', 'C3'],
+        'Nano_Loan': [30.0, np.nan, np.nan],
+        'Advanced_Credit': [200.0, np.nan, np.nan],
+        'Macro_Loan': [np.nan, 100.0, 50.0],
+        'Cash_Roller_Over': [np.nan, 300.0, 200.0]
+    })
+
+    transactions_previous_month, updated_loans = run_bonus_malus(balances, final_clients)
+
+    # Vérifications : une ligne par client, soldes en colonnes, clients d'entrée non modifiés
+    assert set(transactions_previous_month['SIM_NUMBER']) == {'C1', 'C2'}, "Seules les SIM des clients finaux sont gardées"
+    assert list(updated_loans['Balance_First'])[:2] == [100.0, 0.0], "Le solde du 15 est incorrect"
+    assert list(updated_loans['Repayment_Label']) == [
+        "Strong repayment capacity", "Strong ability to borrow", "Uncertain"
+    ], "Les libellés de remboursement sont incorrects"
+    assert list(updated_loans['Bonus_Malus']) == [36.0, 300.0, 0.0], "Les bonus/malus sont incorrects"
+    assert updated_loans['Macro_Loan_updated'].iloc[1] == 400.0, "Le crédit mis à jour est incorrect"
+    assert 'Bonus_Malus' not in final_clients.columns, "Les clients d'entrée ne doivent pas être modifiés"
+
+
+def test_pivot_snapshot_balances():
+    # Soldes de deux mois : octobre (15 et 31) et novembre (15 et 30), plus un jour hors relevé
+    balances = pd.DataFrame({
+        'SIM_NUMBER': ['C1', 'C1', 'C1', 'C1', 'C1'],
+        'DATE_OF_THE_DAY': pd.to_datetime(['2024-10-15', '2024-10-31', '2024-11-15', '2024-11-20', '2024-11-30']),
+        'balance': [100.0, 50.0, 70.0, 60.0, 20.0]
+    })
+
+    # Seuls les relevés du mois de référence sont mis en colonnes
+    snapshot = pivot_snapshot_balances(balances, reference_month='2024-11')
+    assert list(snapshot.iloc[0]) == ['C1', 70.0, 20.0], "Les relevés de novembre sont incorrects"
+
+    # Sans mois de référence, des soldes de plusieurs mois sont refusés
+    try:
+        pivot_snapshot_balances(balances)
+        assert False, "Des soldes de plusieurs mois doivent lever une erreur"
+    except ValueError:
+        pass
+
+    # Un seul mois : le mois de référence est celui des soldes, les jours hors relevé sont ignorés
+    snapshot = pivot_snapshot_balances(balances.iloc[2:])
+    assert list(snapshot.iloc[0]) == ['C1', 70.0, 20.0], "Les jours hors relevé doivent être ignorés"
+
+
+def test_evaluate_bonus_malus_rules():
+    # Plafonds : Nano (45) prioritaire sur Advanced, Macro (250), Cash Roller Over (500), aucun crédit (0)
+    data = pd.DataFrame({
+        'Nano_Loan': [30.0, np.nan, np.nan, np.nan, 30.0],
+        'Advanced_Credit': [200.0, np.nan, np.nan, np.nan, 200.0],
+        'Macro_Loan': [np.nan, 100.0, np.nan, np.nan, np.nan],
+        'Cash_Roller_Over': [np.nan, 300.0, 300.0, np.nan, np.nan],
+        'Balance_First': [10.0, -5.0, 10.0, 0.0, np.nan],
+        'Balance_Second': [20.0, 10.0, 0.0, 5.0, 5.0]
+    })
+
+    labels, bonus_malus = evaluate_bonus_malus_rules(data)
+
+    # Vérifications : première règle satisfaite, dans l'ordre de la table
+    assert list(labels) == [
+        "Strong repayment capacity", "Strong ability to borrow", "Strong ability to borrow",
+        "Strong ability to borrow", "Uncertain"
+    ], "Les libellés ne suivent pas l'ordre des règles"
+    assert list(bonus_malus) == [36.0, 300.0, 600.0, 0.0, 0.0], "Les bonus/malus sont incorrects"
+    assert isinstance(labels, pd.Categorical), "Repayment_Label doit être catégoriel"
+
+    # Une nouvelle règle s'ajoute à la table sans code par ligne
+    rules = [{'label': "Dormant", 'all': [('Balance_First', '==', 0)], 'adjustment_pct': -100}] + REPAYMENT_RULES
+    labels, bonus_malus = evaluate_bonus_malus_rules(data, rules=rules)
+    assert labels[3] == "Dormant" and bonus_malus[3] == 0.0, "La règle ajoutée doit être prioritaire"
+
+    print("Tous les tests ont réussi !")
+
+# Exécuter les tests
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_process_transactions(pathlib.Path(tempfile.mkdtemp()))
+    test_reference_month(pathlib.Path(tempfile.mkdtemp()))
+    test_run_bonus_malus()
+    test_pivot_snapshot_balances()
+    test_evaluate_bonus_malus_rules()
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+from src.cash_allocation import (
+    calculate_individual_credits,
+    calculate_business_credits,
+    allocate_credits
+)
+from src.profile_codes import decode_profile_codes, encode_profile_codes
+
+def test_decode_profile_codes():
+    digits = decode_profile_codes(['34251', 11155])
+
+    assert digits.tolist() == [[3, 4, 2, 5, 1], [1, 1, 1, 5, 5]], "Le décodage des Profile_Code est incorrect"
+
+
+def test_allocate_credits_matches_row_functions():
+    # Créer un échantillon de clients des deux catégories, avec tous les codes extrêmes
+    rng = np.random.default_rng(0)
+    codes = [''.join(map(str, row)) for row in rng.integers(1, 6, size=(200, 5))] + ['11111', '55555']
+    data = pd.DataFrame({
+        'Profile_Code': codes,
+        'CUST_CATEGORY': rng.choice(['Individual', 'Business'], size=len(codes))
+    })
+
+    expected = data.copy()
+    expected[['Nano_Loan', 'Advanced_Credit']] = expected.apply(calculate_individual_credits, axis=1, result_type='expand')
+    expected[['Macro_Loan', 'Cash_Roller_Over']] = expected.apply(calculate_business_credits, axis=1, result_type='expand')
+
+    allocated = allocate_credits(data.copy())
+    # Même résultat avec des Profile_Code catégoriels (lecture directe des index de profil)
+    categorical = data.assign(Profile_Code=encode_profile_codes(decode_profile_codes(data['Profile_Code'])))
+    assert allocated.equals(allocate_credits(categorical).assign(Profile_Code=data['Profile_Code'])), \
+        "Les Profile_Code catégoriels doivent donner les mêmes crédits"
+
+    # Vérifications : valeurs identiques au bit près, NaN pour l'autre catégorie
+    for column in ['Nano_Loan', 'Advanced_Credit', 'Macro_Loan', 'Cash_Roller_Over']:
+        assert np.array_equal(allocated[column].to_numpy(), expected[column].to_numpy(dtype=float), equal_nan=True), \
+            f"La colonne '{column}' diffère des fonctions ligne par ligne"
+
+    print("Tous les tests ont réussi !")
+
+# Exécuter les tests
+if __name__ == "__main__":
+    test_decode_profile_codes()
+    test_allocate_credits_matches_row_functions()
@@ -0,0 +1,66 @@
+import os
+import numpy as np
+import pandas as pd
+from src.artifact_store import artifact_path, read_artifact, write_artifact
+from src.chunked_pipeline import run_chunked_pipeline
+from src.data_filtering import load_filtered_data
+from src.data_processing import build_kyc_index
+from src.data_simulation import build_vocabularies, simulate_kyc_data, simulate_user_data
+from src.schema import apply_schema, reader_dtypes
+from src.scoring_and_profiling import calculate_all_scores, generate_profile_code
+from src.segmentation import segment_profiles
+from src.cash_allocation import allocate_credits
+from src.multi_sim_management import manage_multi_sim_clients
+
+def _simulate_raw_data(raw_data_path, n_sims=600):
+    rng = np.random.default_rng(3)
+    sim_numbers = np.array([f"C{i:05d}" for i in range(n_sims)], dtype=object)
+    transaction_dates = pd.date_range('2024-01-01', '2024-03-31').to_numpy()
+    user_data = simulate_user_data(sim_numbers, transaction_dates, rng)
+    kyc_data = simulate_kyc_data(sim_numbers, transaction_dates, rng, build_vocabularies(seed=3, size=200))
+
+    # Un client sur cinq possède aussi la SIM suivante : les clients multi-SIM sont répartis dans les blocs
+    shared = np.arange(0, n_sims - 1, 5)
+    kyc_data.loc[shared + 1, ['ID_TYPE', 'ID_NUMBER']] = kyc_data.loc[shared, ['ID_TYPE', 'ID_NUMBER']].to_numpy()
+
+    paths = {name: artifact_path(raw_data_path, name) for name in ['user_data', 'kyc_data']}
+    write_artifact(user_data, paths['user_data'])
+    write_artifact(kyc_data, paths['kyc_data'])
+    return paths
+
+
+def test_chunked_pipeline_matches_in_memory(tmp_path):
+    paths = _simulate_raw_data(str(tmp_path))
+
+    # Exécution par blocs, avec des blocs bien plus petits que la base
+    processed_data_path = str(tmp_path / "processed")
+    os.makedirs(processed_data_path)
+    run_chunked_pipeline(paths['user_data'], paths['kyc_data'], processed_data_path, chunksize=50)
+    chunked = read_artifact(artifact_path(processed_data_path, "final_clients"))
+    assert os.listdir(processed_data_path).count("final_clients.parquet") == 1, "La table finale doit être publiée"
+    assert not any(name.startswith("chunked_") for name in os.listdir(processed_data_path)), \
+        "Les fichiers temporaires doivent être supprimés"
+
+    # Exécution en mémoire, étape par étape
+    kyc_index = build_kyc_index(apply_schema(read_artifact(paths['kyc_data'], dtypes=reader_dtypes())))
+    scored_data = generate_profile_code(calculate_all_scores(load_filtered_data(paths['user_data'], kyc_index=kyc_index)))
+    in_memory = manage_multi_sim_clients(allocate_credits(segment_profiles(scored_data)))
+
+    # Vérifications : mêmes clients, mêmes scores, segments et crédits (l'ordre des lignes peut différer)
+    assert in_memory['ID_NUMBER'].duplicated().sum() == 0 and len(in_memory) < len(scored_data), \
+        "Le jeu de test doit contenir des clients multi-SIM"
+
+    def normalize(data):
+        data = data.sort_values('SIM_NUMBER').reset_index(drop=True)
+        categories = data.select_dtypes('category').columns
+        return data.astype({column: str for column in categories})
+
+    assert sorted(chunked.columns) == sorted(in_memory.columns), "Les deux modes doivent produire les mêmes colonnes"
+    pd.testing.assert_frame_equal(normalize(chunked), normalize(in_memory)[list(chunked.columns)], check_dtype=False)
+
+    print("Tous les tests ont réussi !")
+
+# Exécuter les tests
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_chunked_pipeline_matches_in_memory(pathlib.Path(tempfile.mkdtemp()))
@@ -1,5 +1,7 @@
 import pandas as pd
 from src.data_filtering import filter_data
+from src.data_filtering import load_filtered_data
+from src.data_processing import load_and_merge_data, prepare_kyc_data
 
 def test_filter_data():
     # Créer un échantillon de données simulées
@@ -22,6 +24,35 @@ def test_filter_data():
 
     print("Tous les tests ont réussi !")
 
+
+def test_load_filtered_data(tmp_path):
+    # Naissances de part et d'autre des bornes d'âge (21 et 60 ans révolus au 2024-06-15)
+    current_date = pd.Timestamp('2024-06-15')
+    birth_dates = current_date - pd.to_timedelta([7670, 7671, 22280, 22281, 10000, 10000], unit='d')
+    user_data = pd.DataFrame({
+        'SIM_NUMBER': ['C1', 'C2', 'C3', 'C4', 'C5', 'C6'],
+        'HAS_USED_MOB_MONEY_IN_LAST_90_DAYS': [1, 1, 1, 1, 0, 1]
+    })
+    kyc_data = pd.DataFrame({
+        'SIM_NUMBER': ['C6', 'C5', 'C4', 'C3', 'C2', 'C1'],
+        'BIRTH_DATE': birth_dates[::-1].strftime('%Y-%m-%d'),
+        'ACQUISITION_DATE': ['2020-01-01'] * 6,
+        'REGISTRATION_STATUS': ['Not Accepted', 'Accepted', 'Accepted', 'Accepted', 'Accepted', 'Accepted']
+    })
+    user_data_path, kyc_data_path = str(tmp_path / "user_data.parquet"), str(tmp_path / "kyc_data.parquet")
+    user_data.to_parquet(user_data_path, index=False)
+    kyc_data.to_parquet(kyc_data_path, index=False)
+
+    # Filtrer avant la fusion
+    filtered_data = load_filtered_data(user_data_path, kyc_data_path, current_date=current_date)
+
+    # Vérifications : mêmes lignes que la fusion complète suivie de filter_data
+    assert list(filtered_data['SIM_NUMBER']) == ['C2', 'C3'], "Les bornes d'âge ne sont pas respectées"
+    merged_data = prepare_kyc_data(load_and_merge_data(user_data_path, kyc_data_path), current_date=current_date)
+    pd.testing.assert_frame_equal(filtered_data, filter_data(merged_data))
+
 # Exécuter les tests
 if __name__ == "__main__":
     test_filter_data()
+    import tempfile, pathlib
+    test_load_filtered_data(pathlib.Path(tempfile.mkdtemp()))
@@ -1,6 +1,7 @@
 import os
 import pandas as pd
 from src.data_processing import load_and_merge_data
+from src.data_processing import build_kyc_index, merge_user_and_kyc, merge_with_kyc_index
 
 def test_load_and_merge_data():
     # Définir les chemins des fichiers de test
@@ -16,6 +17,24 @@ def test_load_and_merge_data():
     assert 'SIM_NUMBER' in merged_data.columns, "La colonne 'SIM_NUMBER' devrait être présente dans le DataFrame"
     print("Tous les tests ont réussi !")
 
+
+def test_merge_with_kyc_index():
+    # SIM C4 absente du KYC, SIM C9 sans données utilisateur
+    user_data = pd.DataFrame({'SIM_NUMBER': ['C3', 'C1', 'C4', 'C3'], 'DATA_REVENUE': [1.0, 2.0, 3.0, 4.0]})
+    kyc_data = pd.DataFrame({'SIM_NUMBER': ['C9', 'C3', 'C1'], 'GENDER': ['Male', 'Female', 'Male']})
+
+    kyc_index = build_kyc_index(kyc_data)
+    merged_data = merge_with_kyc_index(user_data, kyc_index)
+
+    # Vérifications : index trié par SIM, résultat identique à la fusion complète
+    assert list(kyc_index['SIM_NUMBER']) == ['C1', 'C3', 'C9'], "L'index KYC doit être trié par SIM"
+    pd.testing.assert_frame_equal(merged_data, merge_user_and_kyc(user_data, kyc_data))
+
+    # Une SIM en double dans le KYC : la fusion complète est utilisée
+    duplicated = build_kyc_index(pd.concat([kyc_data, kyc_data.iloc[[1]]], ignore_index=True))
+    assert len(merge_with_kyc_index(user_data, duplicated)) == 5, "Chaque doublon KYC doit produire une ligne"
+
 # Exécuter les tests
 if __name__ == "__main__":
-    test_load_and_merge_data()
\ No newline at end of file
+    test_load_and_merge_data()
+    test_merge_with_kyc_index()
\ No newline at end of file
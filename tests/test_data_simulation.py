@@ -0,0 +1,79 @@
+import os
+import re
+import numpy as np
+import pandas as pd
+from src.data_simulation import (
+    build_vocabularies,
+    simulate_data,
+    simulate_id_numbers,
+    simulate_kyc_data,
+    simulate_user_data
+)
+
+def test_simulate_kyc_data():
+    sim_numbers = np.array([f"C{i:05d}" for i in range(1000)], dtype=object)
+    transaction_dates = pd.date_range('2024-01-01', '2024-03-31').to_numpy()
+    vocabularies = build_vocabularies(seed=1, size=200)
+
+    kyc_data = simulate_kyc_data(sim_numbers, transaction_dates, np.random.default_rng(1), vocabularies)
+
+    # Vérifications : une ligne par SIM, valeurs textuelles issues des vocabulaires Faker
+    assert list(kyc_data['SIM_NUMBER']) == list(sim_numbers), "Une ligne par SIM est attendue"
+    assert kyc_data['FIRST_NAME'].isin(vocabularies['FIRST_NAME']).all(), "Les prénoms doivent venir du vocabulaire"
+    assert kyc_data['ID_NUMBER'].map(lambda x: bool(re.fullmatch(r"\d{3}-\d{2}-\d{4}", x))).all(), \
+        "Les numéros de pièce d'identité doivent suivre le format AAA-GG-SSSS"
+    assert kyc_data['FIRST_EVENT_DATE'].between(transaction_dates.min(), transaction_dates.max()).all(), \
+        "La première activité doit tomber dans la période des transactions"
+
+    # Une même graine donne les mêmes données
+    again = simulate_kyc_data(sim_numbers, transaction_dates, np.random.default_rng(1), build_vocabularies(seed=1, size=200))
+    pd.testing.assert_frame_equal(
+        kyc_data.drop(columns=['BIRTH_DATE', 'ID_EXPIRY_DATE']), again.drop(columns=['BIRTH_DATE', 'ID_EXPIRY_DATE'])
+    )
+
+
+def test_simulate_id_numbers():
+    # Les zones 000 et 666 ne sont jamais attribuées, les séries sont complétées par des zéros
+    id_numbers = simulate_id_numbers(100000, np.random.default_rng(0))
+    areas = pd.Series(id_numbers).str[:3].astype(int)
+    assert areas.between(1, 899).all() and not (areas == 666).any(), "Zone de numéro invalide"
+
+    user_data = simulate_user_data(['C1', 'C2'], pd.to_datetime(['2024-02-05']), np.random.default_rng(0))
+    assert list(user_data['DATE_OF_THE_DAY']) == ['20240205', '20240205'], "DATE_OF_THE_DAY doit être au format AAAAMMJJ"
+
+
+def test_simulate_data_shards(tmp_path):
+    # Petit journal PaySim : 40 transactions sur 3 jours
+    paysim = pd.DataFrame({
+        'step': np.arange(40) % 3,
+        'nameOrig': [f"C{i:03d}" for i in range(40)],
+        'newbalanceOrig': np.arange(40, dtype=float),
+        'nameDest': [f"M{i:03d}" for i in range(40)],
+        'newbalanceDest': np.arange(40, dtype=float)
+    })
+    runs = {}
+    for name, max_workers in [('pool', 2), ('sequential', 1)]:
+        output_path = str(tmp_path / name)
+        os.makedirs(output_path)
+        paysim.to_csv(os.path.join(output_path, "PS_20174392719_1491204439457_log.csv"), index=False)
+        simulate_data(output_path, seed=7, n_shards=3, max_workers=max_workers, today='2026-01-01', n_transactions=40)
+        runs[name] = {
+            part: (tmp_path / name / "simulated_KYC_DATA.parquet" / part).read_bytes()
+            for part in sorted(os.listdir(os.path.join(output_path, "simulated_KYC_DATA.parquet")))
+        }
+
+    # Vérifications : une part par processus, fichiers identiques quel que soit le nombre de processus
+    assert list(runs['pool']) == ["part-00000.parquet", "part-00001.parquet", "part-00002.parquet"], \
+        "Chaque part doit écrire son propre fichier"
+    assert runs['pool'] == runs['sequential'], "La simulation par parts doit être reproductible"
+    kyc_data = pd.read_parquet(str(tmp_path / "pool" / "simulated_KYC_DATA.parquet"))
+    assert len(kyc_data) == 80 and kyc_data['SIM_NUMBER'].is_unique, "Chaque SIM doit apparaître une seule fois"
+
+    print("Tous les tests ont réussi !")
+
+# Exécuter les tests
+if __name__ == "__main__":
+    test_simulate_kyc_data()
+    test_simulate_id_numbers()
+    import tempfile, pathlib
+    test_simulate_data_shards(pathlib.Path(tempfile.mkdtemp()))
@@ -0,0 +1,70 @@
+import json
+import pandas as pd
+from src.filter_rules import (
+    FILTER_RULES,
+    apply_filter_rules,
+    compile_filter_rules,
+    load_filter_rules,
+    load_filter_stats,
+    save_filter_stats
+)
+
+def test_apply_filter_rules(tmp_path):
+    # Données fusionnées simulées
+    data = pd.DataFrame({
+        'SIM_NUMBER': ['C1', 'C2', 'C3', 'C4', 'C5'],
+        'HAS_USED_MOB_MONEY_IN_LAST_90_DAYS': [1, 0, 1, 1, 1],
+        'age': [25, 30, 18, 45, 40],
+        'REGISTRATION_STATUS': ['Accepted', 'Accepted', 'Accepted', 'Not Accepted', 'Accepted']
+    })
+
+    # Sans statistiques, les règles sont évaluées dans l'ordre de la configuration
+    filtered_data, stats = apply_filter_rules(data, compile_filter_rules(FILTER_RULES))
+    assert list(filtered_data['SIM_NUMBER']) == ['C1', 'C5'], "Les règles n'ont pas retenu les bonnes lignes"
+    assert [(s['name'], s['evaluated'], s['rejected']) for s in stats] == [
+        ('active_90_days', 5, 1), ('age_range', 4, 1), ('kyc_accepted', 3, 1)
+    ], "Chaque règle ne doit être évaluée que sur les lignes retenues par les précédentes"
+
+    # Une règle qui a rejeté plus de lignes pour un coût égal passe en premier à l'exécution suivante
+    stats_path = str(tmp_path / "filter_stats.json")
+    save_filter_stats([
+        {'name': 'active_90_days', 'table': 'user_data', 'evaluated': 100, 'passed': 90, 'rejected': 10, 'seconds': 0.1},
+        {'name': 'age_range', 'table': 'kyc', 'evaluated': 90, 'passed': 30, 'rejected': 60, 'seconds': 0.09},
+        {'name': 'kyc_accepted', 'table': 'kyc', 'evaluated': 30, 'passed': 15, 'rejected': 15, 'seconds': 0.03}
+    ], stats_path)
+    plan = compile_filter_rules(FILTER_RULES, stats=load_filter_stats(stats_path))
+    assert [rule['name'] for rule in plan] == ['age_range', 'kyc_accepted', 'active_90_days'], \
+        "Les règles doivent être triées par coût par ligne rejetée"
+    pd.testing.assert_frame_equal(apply_filter_rules(data, plan)[0], filtered_data)
+
+
+def test_load_filter_rules(tmp_path):
+    # Règles chargées depuis un fichier JSON ; l'âge est traduit en bornes de BIRTH_DATE
+    rules_path = str(tmp_path / "filter_rules.json")
+    with open(rules_path, 'w') as f:
+        json.dump({'format_version': 1, 'rules': [
+            {'name': 'adult', 'table': 'kyc', 'column': 'age', 'op': '>', 'value': 20}
+        ]}, f)
+    current_date = pd.Timestamp('2024-06-15')
+    plan = compile_filter_rules(load_filter_rules(rules_path), current_date=current_date)
+    assert plan[0]['predicates'] == [('BIRTH_DATE', '<=', current_date - pd.Timedelta(days=7671))], \
+        "L'âge de 21 ans révolus doit être atteint 7671 jours après la naissance"
+
+    # Une règle avec un opérateur inconnu est refusée
+    with open(rules_path, 'w') as f:
+        json.dump({'format_version': 1, 'rules': [
+            {'name': 'adult', 'table': 'kyc', 'column': 'age', 'op': 'like', 'value': 20}
+        ]}, f)
+    try:
+        load_filter_rules(rules_path)
+        assert False, "Un opérateur inconnu doit lever une erreur"
+    except ValueError:
+        pass
+
+    print("Tous les tests ont réussi !")
+
+# Exécuter les tests
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_apply_filter_rules(pathlib.Path(tempfile.mkdtemp()))
+    test_load_filter_rules(pathlib.Path(tempfile.mkdtemp()))
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import os
+from src.identity_index import IdentityIndex, NULL_IDENTITY, identity_hash, upsert_kyc_changes
+from src.multi_sim_management import manage_multi_sim_clients
+
+def test_identity_index_upsert(tmp_path):
+    # Base initiale : le client A a deux SIM, la SIM 4 n'a pas de pièce d'identité
+    kyc_data = pd.DataFrame({
+        'SIM_NUMBER': [1, 2, 3, 4],
+        'ID_TYPE': ['CNI', 'CNI', 'CNI', None],
+        'ID_NUMBER': ['A', 'A', 'B', 'C']
+    })
+    identity_index = IdentityIndex().upsert(kyc_data)
+
+    assert list(identity_index.sim_counts([1, 2, 3, 4])) == [2, 2, 1, 0], "Nombre de SIM par identité incorrect"
+    assert identity_index.lookup([4])[0] == NULL_IDENTITY, "Une identité incomplète doit avoir le hash nul"
+
+    # Delta du jour : la SIM 2 change de titulaire, la SIM 5 est une nouvelle SIM du client B
+    delta = pd.DataFrame({'SIM_NUMBER': [2, 5], 'ID_TYPE': ['CNI', 'CNI'], 'ID_NUMBER': ['B', 'B']})
+    identity_index.upsert(delta)
+
+    assert len(identity_index) == 5, "Les nouvelles SIM doivent être ajoutées à l'index"
+    assert list(identity_index.sim_counts([1, 2, 3, 5])) == [1, 3, 3, 3], "Les comptages doivent suivre le delta"
+    assert [list(sims) for sims in identity_index.sims(identity_index.lookup([1, 3]))] == [[1], [2, 3, 5]], \
+        "Les SIM de chaque identité doivent suivre le delta"
+    assert len(identity_index.sims([NULL_IDENTITY + 1])[0]) == 0, "Une identité inconnue n'a aucune SIM"
+
+    # L'index sauvegardé est identique une fois rechargé
+    index_path = str(tmp_path / "identity_index.parquet")
+    identity_index.save(index_path)
+    reloaded = IdentityIndex.load(index_path)
+    assert np.array_equal(reloaded.lookup([1, 2, 3, 4, 5]), identity_index.lookup([1, 2, 3, 4, 5])), \
+        "Le rechargement de l'index doit conserver les hash"
+
+
+def test_upsert_kyc_changes(tmp_path):
+    # KYC partitionné : une part par jour de mise à jour
+    kyc_path = str(tmp_path / "kyc.parquet")
+    os.makedirs(kyc_path)
+    pd.DataFrame({'SIM_NUMBER': [1, 2], 'ID_TYPE': ['CNI', 'CNI'], 'ID_NUMBER': ['A', 'B']}).to_parquet(
+        os.path.join(kyc_path, "part-00000.parquet"), index=False
+    )
+    identity_index = IdentityIndex()
+    indexed_parts = upsert_kyc_changes(identity_index, kyc_path)
+    assert len(identity_index) == 2, "Toutes les parts doivent être indexées à la première exécution"
+
+    # Delta du jour ajouté comme nouvelle part ; la première part disparaît du KYC
+    pd.DataFrame({'SIM_NUMBER': [3], 'ID_TYPE': ['CNI'], 'ID_NUMBER': ['A']}).to_parquet(
+        os.path.join(kyc_path, "part-00001.parquet"), index=False
+    )
+    os.remove(os.path.join(kyc_path, "part-00000.parquet"))
+    indexed_parts = upsert_kyc_changes(identity_index, kyc_path, indexed_parts)
+
+    assert list(indexed_parts['PART']) == ["part-00001.parquet"], "Les parts indexées doivent suivre le KYC"
+    assert list(identity_index.sim_counts([1, 2, 3])) == [2, 1, 2], \
+        "Les SIM retirées du KYC restent dans l'index et dans les comptages"
+
+    # Sans nouvelle part, rien n'est relu
+    indexed_again = upsert_kyc_changes(identity_index, kyc_path, indexed_parts)
+    assert indexed_again.equals(indexed_parts) and len(identity_index) == 3, "L'index ne doit pas changer"
+
+
+def test_manage_multi_sim_clients_with_identity_index():
+    # Le client A a trois SIM dans la base mais une seule dans les données ; B en a deux
+    kyc_data = pd.DataFrame({
+        'SIM_NUMBER': [1, 2, 3, 4, 5, 6],
+        'ID_TYPE': ['CNI', 'CNI', 'CNI', 'CNI', 'CNI', None],
+        'ID_NUMBER': ['A', 'A', 'A', 'B', 'B', 'C']
+    })
+    data = kyc_data.drop(index=[1, 2]).assign(
+        Segment=['Low', 'High', 'Very High', 'Medium'],
+        Nano_Loan=[20.0, 40.0, 45.0, 30.0],
+        Advanced_Credit=[100.0, 400.0, 500.0, 200.0],
+        Macro_Loan=np.nan,
+        Cash_Roller_Over=np.nan
+    )
+    identity_index = IdentityIndex().upsert(kyc_data)
+
+    final_clients = manage_multi_sim_clients(data, identity_index)
+
+    # Vérifications : même résultat que le regroupement complet
+    assert final_clients.equals(manage_multi_sim_clients(data)), "L'index doit donner le même résultat"
+    assert list(final_clients['SIM_NUMBER']) == [1, 6, 5], "La sélection du meilleur profil est incorrecte"
+    assert (identity_hash(data)[data['ID_TYPE'].isna().to_numpy()] == NULL_IDENTITY).all(), \
+        "Une identité incomplète doit avoir le hash nul"
+
+    print("Tous les tests ont réussi !")
+
+# Exécuter les tests
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_identity_index_upsert(pathlib.Path(tempfile.mkdtemp()))
+    test_upsert_kyc_changes(pathlib.Path(tempfile.mkdtemp()))
+    test_manage_multi_sim_clients_with_identity_index()
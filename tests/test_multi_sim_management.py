@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+from src.multi_sim_management import manage_multi_sim_clients, validate_final_clients
+
+def test_manage_multi_sim_clients():
+    # Le client A a trois SIM, dont deux ex aequo ; le client B n'en a qu'une
+    data = pd.DataFrame({
+        'ID_TYPE': ['CNI', 'CNI', 'CNI', 'CNI', None],
+        'ID_NUMBER': ['A', 'B', 'A', 'A', 'C'],
+        'SIM_NUMBER': [1, 2, 3, 4, 5],
+        'Segment': ['High', 'Low', 'Very High', 'Very High', 'Medium'],
+        'Nano_Loan': [30.0, 20.0, 40.0, 40.0, np.nan],
+        'Advanced_Credit': [300.0, 100.0, 450.0, 450.0, np.nan],
+        'Macro_Loan': [np.nan, np.nan, np.nan, np.nan, 100.0],
+        'Cash_Roller_Over': [np.nan, np.nan, np.nan, np.nan, 300.0]
+    })
+
+    final_clients = manage_multi_sim_clients(data)
+
+    # Vérifications : SIM uniques d'abord, puis le meilleur profil (première ligne en cas d'égalité)
+    assert list(final_clients['SIM_NUMBER']) == [2, 5, 3], "La sélection du meilleur profil est incorrecte"
+    assert list(final_clients.columns) == list(data.columns), "Aucune colonne technique ne doit rester"
+
+
+def test_manage_multi_sim_clients_without_multi_sim():
+    data = pd.DataFrame({
+        'ID_TYPE': ['CNI', 'CNI'], 'ID_NUMBER': ['A', 'B'], 'SIM_NUMBER': [1, 2], 'Segment': ['Low', 'High'],
+        'Nano_Loan': [20.0, 40.0], 'Advanced_Credit': [100.0, 400.0],
+        'Macro_Loan': [np.nan, np.nan], 'Cash_Roller_Over': [np.nan, np.nan]
+    })
+
+    final_clients = manage_multi_sim_clients(data)
+
+    assert final_clients.equals(data), "Sans client multi-SIM, les données doivent être inchangées"
+
+
+def test_validate_final_clients():
+    # Le client A a deux lignes (deux SIM), dont une sans Nano_Loan ; le Macro_Loan de C est hors bornes
+    data = pd.DataFrame({
+        'ID_TYPE': ['CNI', 'CNI', 'CNI', None],
+        'ID_NUMBER': ['A', 'A', 'B', 'C'],
+        'SIM_NUMBER': [1, 2, 3, 4],
+        'CUST_CATEGORY': ['Individual', 'Individual', 'Business', 'Business'],
+        'Nano_Loan': [30.0, np.nan, np.nan, np.nan],
+        'Advanced_Credit': [200.0, 300.0, np.nan, np.nan],
+        'Macro_Loan': [np.nan, np.nan, 100.0, 20.0],
+        'Cash_Roller_Over': [np.nan, np.nan, 200.0, 200.0]
+    })
+
+    report = validate_final_clients(data)
+
+    # Vérifications : nombre d'infractions et exemples par contrôle
+    checks = report['checks']
+    assert not report['valid'], "Le rapport doit signaler les infractions"
+    assert checks['unique_client']['samples'] == [{'ID_TYPE': 'CNI', 'ID_NUMBER': 'A', 'ROW_COUNT': 2}], \
+        "Le client A doit être signalé en double"
+    assert checks['single_sim']['n_breaches'] == 1, "Le client A doit être signalé avec deux SIM"
+    assert [row['SIM_NUMBER'] for row in checks['required_credits']['samples']] == [2], "Crédit manquant non détecté"
+    assert [row['SIM_NUMBER'] for row in checks['credit_bounds']['samples']] == [4], "Crédit hors bornes non détecté"
+
+    # Sur une table conforme, le rapport est valide ; sinon la validation peut arrêter le pipeline
+    assert validate_final_clients(data.iloc[[0, 2]])['valid'], "Une table conforme doit être valide"
+    try:
+        validate_final_clients(data, raise_on_breach=True)
+        assert False, "Une infraction doit lever une erreur avec raise_on_breach=True"
+    except ValueError:
+        pass
+
+    # Une SIM manquante (client D) n'est pas comptée comme une SIM d'un autre client
+    with_missing_sim = data.iloc[[0, 2, 2, 2]].assign(ID_NUMBER=['A', 'B', 'D', 'E'], SIM_NUMBER=[1, 3, np.nan, 7])
+    checks = validate_final_clients(with_missing_sim)['checks']
+    assert checks['single_sim']['n_breaches'] == 0, "Une SIM manquante ne doit pas créer de client multi-SIM"
+
+    print("Tous les tests ont réussi !")
+
+# Exécuter les tests
+if __name__ == "__main__":
+    test_manage_multi_sim_clients()
+    test_manage_multi_sim_clients_without_multi_sim()
+    test_validate_final_clients()
@@ -0,0 +1,59 @@
+import os
+import pandas as pd
+from src.pipeline_runner import CheckpointWriter, run_pipeline
+
+def test_checkpoint_is_a_snapshot(tmp_path):
+    data = pd.DataFrame({'SIM_NUMBER': [1, 2, 3], 'Score': [1, 2, 3]})
+    checkpoint_path = str(tmp_path / "scored_data.parquet")
+
+    with CheckpointWriter() as checkpoints:
+        checkpoints.submit(data, checkpoint_path)
+        # L'étape suivante modifie les données pendant l'écriture
+        data['Segment'] = 'High'
+        data.loc[0, 'Score'] = 5
+
+    saved = pd.read_parquet(checkpoint_path)
+
+    # Vérifications : le fichier reflète l'état des données au moment de la soumission
+    assert list(saved.columns) == ['SIM_NUMBER', 'Score'], "Les colonnes ajoutées après coup ne doivent pas être écrites"
+    assert list(saved['Score']) == [1, 2, 3], "Les modifications ultérieures ne doivent pas être écrites"
+
+def _double_stage(inputs, paths, config):
+    return {'doubled': inputs['raw'] * config['factor']}
+
+
+def _sum_stage(inputs, paths, config):
+    return {'total': inputs['doubled'].sum().to_frame('total')}
+
+
+def test_run_pipeline_skips_unchanged_stages(tmp_path):
+    paths = {name: str(tmp_path / f"{name}.parquet") for name in ['raw', 'doubled', 'total']}
+    pd.DataFrame({'Score': [1, 2, 3]}).to_parquet(paths['raw'], index=False)
+    cache_path = str(tmp_path / "stage_cache.json")
+
+    def stages(factor):
+        return [
+            {'name': 'double', 'step': 1, 'description': "Doublement", 'inputs': ['raw'],
+             'outputs': ['doubled'], 'run': _double_stage, 'config': {'factor': factor}},
+            {'name': 'sum', 'step': 2, 'description': "Somme", 'inputs': ['doubled'],
+             'outputs': ['total'], 'run': _sum_stage}
+        ]
+
+    # Vérifications : première exécution complète, puis rien à refaire, puis invalidation en cascade
+    assert run_pipeline(stages(2), paths, cache_path) == ['double', 'sum']
+    assert run_pipeline(stages(2), paths, cache_path) == [], "Les étapes inchangées doivent être sautées"
+    assert run_pipeline(stages(3), paths, cache_path) == ['double', 'sum'], "Une configuration modifiée doit invalider l'étape et sa descendance"
+    assert pd.read_parquet(paths['total'])['total'].iloc[0] == 18
+
+    # Une sortie supprimée n'est recalculée que pour son étape
+    os.remove(paths['total'])
+    assert run_pipeline(stages(3), paths, cache_path) == ['sum']
+
+    print("Tous les tests ont réussi !")
+
+
+# Exécuter les tests
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_checkpoint_is_a_snapshot(pathlib.Path(tempfile.mkdtemp()))
+    test_run_pipeline_skips_unchanged_stages(pathlib.Path(tempfile.mkdtemp()))
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+from src.profile_codes import (
+    PROFILE_CODES,
+    PROFILE_CODE_DTYPE,
+    encode_profile_codes,
+    profile_index,
+    weighted_scores
+)
+
+def test_profile_index_matches_code_order():
+    # L'index de profil est la position du code dans la liste triée des 3125 codes
+    codes = ['11111', '11112', '34251', '55555']
+
+    assert len(PROFILE_CODES) == 3125, "Il doit exister 5^5 codes de profil"
+    assert list(profile_index(codes)) == [PROFILE_CODES.index(code) for code in codes], "Les index de profil sont incorrects"
+
+
+def test_encode_profile_codes_round_trip():
+    scores = np.array([[3, 4, 2, 5, 1], [5, 5, 5, 5, 5]])
+
+    profile_codes = pd.Series(encode_profile_codes(scores))
+
+    # Vérifications : valeurs lisibles en chaînes, scores pondérés lus dans la table
+    assert profile_codes.dtype == PROFILE_CODE_DTYPE, "Profile_Code doit être catégoriel"
+    assert list(profile_codes.astype(str)) == ['34251', '55555'], "Les chaînes des codes sont incorrectes"
+    assert list(weighted_scores(profile_codes)) == [3*5 + 4*4 + 2*3 + 5*2 + 1, 75], "Les scores pondérés sont incorrects"
+
+    print("Tous les tests ont réussi !")
+
+# Exécuter les tests
+if __name__ == "__main__":
+    test_profile_index_matches_code_order()
+    test_encode_profile_codes_round_trip()
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+from src.quantile_sketch import KLLSketch, percentiles_from_counts
+
+def test_sketch_is_exact_on_small_data():
+    # Tant qu'aucun compactage n'a lieu, le sketch reproduit np.percentile
+    values = np.arange(100, dtype=float)
+    sketch = KLLSketch(epsilon=0.01).update(values)
+
+    assert np.array_equal(sketch.percentiles([20, 40, 60, 80]), np.percentile(values, [20, 40, 60, 80])), \
+        "Les percentiles d'un petit échantillon doivent être exacts"
+
+
+def test_merged_sketches_respect_error_bound():
+    # Quatre partitions résumées séparément puis fusionnées
+    rng = np.random.default_rng(0)
+    values = rng.lognormal(3, 1, size=400_000)
+    partitions = [KLLSketch(epsilon=0.01, seed=i).update(values[i::4]) for i in range(4)]
+
+    merged = partitions[0]
+    for sketch in partitions[1:]:
+        merged.merge(sketch)
+
+    # Rang réel des seuils estimés
+    estimated_ranks = np.searchsorted(np.sort(values), merged.percentiles([20, 40, 60, 80])) / len(values)
+
+    assert merged.n == len(values), "La fusion doit conserver le nombre total de valeurs"
+    assert np.all(np.abs(estimated_ranks - [0.2, 0.4, 0.6, 0.8]) <= 0.02), "L'erreur de rang est trop grande"
+
+
+def test_percentiles_from_counts():
+    # Comptages d'un score pondéré à faible cardinalité
+    values = np.array([15, 15, 20, 31, 31, 31, 47, 60, 75, 75])
+    counts = pd.Series(values).value_counts()
+
+    assert np.array_equal(percentiles_from_counts(counts, [20, 40, 60, 80]), np.percentile(values, [20, 40, 60, 80])), \
+        "Les percentiles calculés à partir des comptages doivent être exacts"
+
+    print("Tous les tests ont réussi !")
+
+# Exécuter les tests
+if __name__ == "__main__":
+    test_sketch_is_exact_on_small_data()
+    test_merged_sketches_respect_error_bound()
+    test_percentiles_from_counts()
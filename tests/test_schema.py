@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+from src.artifact_store import append_artifact, read_artifact
+from src.schema import apply_schema, reader_dtypes
+
+def test_apply_schema():
+    data = pd.DataFrame({
+        'SIM_NUMBER': ['C1', 'C2', 'C3'],
+        'IS_RGS_90': [1, 0, 1],
+        'NB_SMS_SENT_ONNET': [3, 70000, 5],
+        'NB_CALLS_EMITTED_ONNET': [10, 20, 30],
+        'DATA_REVENUE': [12.5, 0.25, 300.0],
+        'MAIN_ACCOUNT_AMOUNT': [1.5, 2.0, 0.1],
+        'REGISTRATION_STATUS': ['Accepted', 'Not Accepted', 'Suspended'],
+        'REGION': ['Texas', 'Ohio', 'Texas']
+    })
+
+    data = apply_schema(data)
+
+    # Vérifications : types compacts, colonnes hors registre inchangées
+    assert data['IS_RGS_90'].dtype == np.uint8, "Les indicateurs doivent être en uint8"
+    assert data['NB_CALLS_EMITTED_ONNET'].dtype == np.uint16, "Les compteurs doivent être en uint16"
+    assert data['MAIN_ACCOUNT_AMOUNT'].dtype == np.float32, "Les montants non notés doivent être en float32"
+    assert data['DATA_REVENUE'].dtype == np.float64, "Les montants notés doivent rester en float64"
+    assert data['SIM_NUMBER'].dtype == object, "Les colonnes hors registre ne doivent pas changer"
+    assert data['NB_SMS_SENT_ONNET'].dtype == np.int64, "Une colonne hors des bornes de uint16 doit garder son type"
+
+    # Une valeur inattendue est ajoutée aux catégories, dans l'ordre lexical
+    assert list(data['REGISTRATION_STATUS'].cat.categories) == ['Accepted', 'Not Accepted', 'Suspended'], \
+        "Les valeurs inattendues doivent être conservées"
+    assert (data['REGISTRATION_STATUS'] == 'Accepted').sum() == 1, "Les filtres sur les chaînes doivent fonctionner"
+    assert isinstance(data['REGION'].dtype, pd.CategoricalDtype), "Les chaînes répétées doivent être catégorielles"
+
+
+def test_read_csv_with_reader_dtypes(tmp_path):
+    # Un CSV lu avec les types du registre : flottants et catégories dès la lecture, entiers vérifiés ensuite
+    path = str(tmp_path / "user_data.csv")
+    pd.DataFrame({
+        'MAIN_ACCOUNT_AMOUNT': [1.5, 2.0],
+        'REGISTRATION_STATUS': ['Accepted', 'Suspended'],
+        'NB_SMS_SENT_ONNET': [3, 70000]
+    }).to_csv(path, index=False)
+
+    data = read_artifact(path, dtypes=reader_dtypes())
+    assert data['MAIN_ACCOUNT_AMOUNT'].dtype == np.float32, "Les montants doivent être lus en float32"
+    assert isinstance(data['REGISTRATION_STATUS'].dtype, pd.CategoricalDtype), "Les chaînes doivent être lues en catégories"
+    assert data['NB_SMS_SENT_ONNET'].dtype == np.int64, "Les entiers ne doivent pas être convertis par le lecteur"
+
+    data = apply_schema(data)
+    assert list(data['REGISTRATION_STATUS'].cat.categories) == ['Accepted', 'Not Accepted', 'Suspended'], \
+        "Les énumérations doivent être appliquées après la lecture"
+    assert list(data['NB_SMS_SENT_ONNET']) == [3, 70000], "Un entier hors des bornes de uint16 doit être conservé"
+
+
+def test_read_parts_with_different_categories(tmp_path):
+    # Deux blocs écrits avec des catégories différentes, puis un bloc où la colonne est une chaîne
+    path = str(tmp_path / "filtered_data.parquet")
+    append_artifact(apply_schema(pd.DataFrame({'REGION': ['Texas', 'Ohio']})), path)
+    append_artifact(apply_schema(pd.DataFrame({'REGION': ['Utah'] * 300 + [f"R{i}" for i in range(200)]})), path)
+    append_artifact(pd.DataFrame({'REGION': ['Iowa']}), path)
+
+    data = read_artifact(path)
+
+    assert len(data) == 503 and list(data['REGION'][:3].astype(str)) == ['Texas', 'Ohio', 'Utah'], \
+        "Les parts doivent être relues malgré des catégories différentes"
+
+    print("Tous les tests ont réussi !")
+
+# Exécuter les tests
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_apply_schema()
+    test_read_csv_with_reader_dtypes(pathlib.Path(tempfile.mkdtemp()))
+    test_read_parts_with_different_categories(pathlib.Path(tempfile.mkdtemp()))
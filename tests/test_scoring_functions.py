@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+from src.scoring_functions import (
+    score_by_percentiles,
+    average_scores,
+    calculate_data_service_scores,
+    compile_scoring_spec,
+    fit_scoring_calibration,
+    save_scoring_calibration,
+    load_scoring_calibration,
+    transform_with_calibration
+)
+
+def test_score_by_percentiles():
+    # Seuils des 20e, 40e, 60e et 80e percentiles
+    cutpoints = np.array([10.0, 20.0, 30.0, 40.0])
+    values = [5, 10, 15, 20, 35, 40, 100, np.nan]
+
+    scores = score_by_percentiles(values, cutpoints)
+
+    # Vérifications : un seuil atteint fait passer au score supérieur, NaN vaut 5 comme avant
+    assert list(scores) == [1, 2, 2, 3, 4, 5, 5, 5], "Les scores par percentile sont incorrects"
+
+
+def test_average_scores_uses_bankers_rounding():
+    # Moyennes 2.5 et 3.5 : int(round(...)) arrondit à l'entier pair
+    scores = average_scores([np.array([2, 3]), np.array([3, 4])])
+
+    assert list(scores) == [2, 4], "L'arrondi doit reproduire int(round(np.mean(...)))"
+
+
+def test_calculate_data_service_scores():
+    # Créer un échantillon de données simulées
+    data = pd.DataFrame({
+        'PAID_DATA_VOLUME': [1.0, 2.0, 3.0, 4.0, 5.0],
+        'DATA_REVENUE': [5.0, 4.0, 3.0, 2.0, 1.0],
+        'FREE_DATA_VOLUME': [1.0, 1.0, 1.0, 1.0, 1.0],
+        'NB_DATA_PACKAGES_SUBSCRIPTIONS': [0, 1, 2, 3, 4],
+        'NB_DATA_package_SUBS_VIA_POS': [0, 0, 0, 0, 0],
+        'NB_DATA_package_SUBS_VIA_MAIN_ACCOUNT': [4, 3, 2, 1, 0],
+        'IS_DATA_RGS90': [1, 0, 1, 0, 1]
+    })
+
+    scored_data = calculate_data_service_scores(data)
+
+    # Vérifications
+    assert 'Data_Service_Score' in scored_data.columns, "La colonne 'Data_Service_Score' est manquante"
+    assert list(scored_data['Data_Service_Score']) == [4, 3, 4, 3, 4], "Les scores Data sont incorrects"
+
+    print("Tous les tests ont réussi !")
+
+
+def test_compile_scoring_spec_shares_columns():
+    # Deux services partageant une colonne : elle ne doit être découpée qu'une fois
+    spec = [
+        {'service': 'A', 'score_column': 'A_Score', 'usage_columns': ['X', 'Y'], 'activity_columns': []},
+        {'service': 'B', 'score_column': 'B_Score', 'usage_columns': ['Y'], 'activity_columns': ['Z']}
+    ]
+
+    plan = compile_scoring_spec(spec)
+
+    assert plan['percentile_columns'] == ['X', 'Y'], "Les colonnes partagées doivent être dédupliquées"
+    assert [s['score_column'] for s in plan['services']] == ['A_Score', 'B_Score']
+
+
+def test_calibration_round_trip(tmp_path):
+    # Population de référence : une colonne par percentile pour le service Digital
+    spec = [{'service': 'Digital', 'score_column': 'Digital_Service_Score', 'usage_columns': ['DIGITAL_REVENUE']}]
+    population = pd.DataFrame({'DIGITAL_REVENUE': [10.0, 20.0, 30.0, 40.0, 50.0]})
+    calibration_path = tmp_path / "scoring_calibration.json"
+
+    save_scoring_calibration(fit_scoring_calibration(population, spec), calibration_path)
+    calibration = load_scoring_calibration(calibration_path)
+
+    # Une seule SIM est notée avec les seuils de la population, sans recalcul
+    single_sim = transform_with_calibration(pd.DataFrame({'DIGITAL_REVENUE': [45.0]}), calibration, spec)
+
+    assert single_sim['Digital_Service_Score'].iloc[0] == 5, "La calibration doit être réutilisée telle quelle"
+
+
+# Exécuter les tests
+if __name__ == "__main__":
+    test_score_by_percentiles()
+    test_average_scores_uses_bankers_rounding()
+    test_calculate_data_service_scores()
+    test_compile_scoring_spec_shares_columns()
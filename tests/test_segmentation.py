@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+from src.segmentation import segment_profiles
+
+def test_segment_profiles_by_percentile():
+    # Seuils fournis : un score égal à un seuil passe dans le segment supérieur
+    scored_data = pd.DataFrame({'Profile_Code': ['11111', '22222', '33333', '44444', '55555', '33334']})
+
+    segmented_data = segment_profiles(scored_data, percentiles=[30, 45, 46, 60])
+
+    # Scores pondérés : 15, 30, 45, 60, 75, 46
+    assert list(segmented_data['Weighted_Score']) == [15, 30, 45, 60, 75, 46], "Les scores pondérés sont incorrects"
+    assert list(segmented_data['Segment']) == ['Very Low', 'Low', 'Medium', 'Very High', 'Very High', 'High'], \
+        "Les segments ne respectent pas les seuils"
+
+
+def test_segment_profiles_equal_frequency_with_ties():
+    # Population très concentrée : 80% des clients ont le même score pondéré
+    scored_data = pd.DataFrame({'Profile_Code': ['33333'] * 80 + ['11111'] * 10 + ['55555'] * 10})
+
+    by_percentile = segment_profiles(scored_data.copy())
+    by_rank = segment_profiles(scored_data.copy(), method='equal_frequency')
+
+    # Vérifications : les percentiles regroupent les ex aequo, les rangs équilibrent les segments
+    assert by_percentile['Segment'].value_counts().max() >= 80, "Les ex aequo doivent rester groupés par percentile"
+    assert set(by_rank['Segment'].value_counts()) == {20}, "Chaque segment doit compter 20 clients"
+    bounds = by_rank.groupby('Segment', observed=True)['Weighted_Score'].agg(['min', 'max'])
+    assert np.all(bounds['max'].to_numpy()[:-1] <= bounds['min'].to_numpy()[1:]), \
+        "Un client mieux noté ne peut pas être dans un segment inférieur"
+
+    print("Tous les tests ont réussi !")
+
+# Exécuter les tests
+if __name__ == "__main__":
+    test_segment_profiles_by_percentile()
+    test_segment_profiles_equal_frequency_with_ties()
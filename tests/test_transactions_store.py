@@ -0,0 +1,62 @@
+import os
+import pandas as pd
+from src.transactions_store import (
+    read_manifest,
+    read_transactions,
+    select_files,
+    transactions_date_range,
+    write_transactions_store
+)
+from src.bonus_malus_calculation import aggregate_transactions
+
+def test_transactions_store(tmp_path):
+    # Transactions de janvier, février et mars 2024
+    transactions = pd.DataFrame({
+        'step': [1, 2, 3, 4, 5],
+        'transaction_date': pd.to_datetime(['2024-02-29', '2024-01-15', '2024-02-15', '2024-03-31', '2024-01-31']),
+        'nameOrig': ['C5', 'C1', 'C2', 'C9', 'C1'],
+        'newbalanceOrig': [1.0, 2.0, 3.0, 4.0, 5.0],
+        'nameDest': ['C3', 'C4', 'C2', 'C8', 'C7'],
+        'newbalanceDest': [6.0, 7.0, 8.0, 9.0, 10.0]
+    })
+    store_path = str(tmp_path / "transactions.parquet")
+    write_transactions_store(transactions, store_path)
+
+    # Vérifications : une partition Hive par mois, bornes de date et de SIM dans le manifeste
+    manifest = read_manifest(store_path)
+    assert [entry['path'] for entry in manifest['files']] == [
+        os.path.join("year=2024", "month=1", "part-00000.parquet"),
+        os.path.join("year=2024", "month=2", "part-00000.parquet"),
+        os.path.join("year=2024", "month=3", "part-00000.parquet")
+    ], "Les partitions doivent suivre l'année et le mois"
+    february = manifest['files'][1]
+    assert february['num_rows'] == 2, "Nombre de lignes de la partition incorrect"
+    assert (february['min']['SIM_NUMBER'], february['max']['SIM_NUMBER']) == ('C2', 'C5'), \
+        "Les bornes de SIM doivent couvrir nameOrig et nameDest"
+    assert transactions_date_range(store_path) == (pd.Timestamp('2024-01-15'), pd.Timestamp('2024-03-31')), \
+        "Les bornes de date doivent être lues dans le manifeste"
+
+    # Seuls les fichiers recoupant la période et les SIM demandées sont retenus
+    assert select_files(store_path, pd.Timestamp('2024-02-01'), pd.Timestamp('2024-03-01')) == [
+        os.path.join(store_path, february['path'])
+    ], "Seule la partition de février doit être lue"
+    assert len(select_files(store_path, sim_numbers=['C8'])) == 1, "Les bornes de SIM doivent élaguer les fichiers"
+
+    february_transactions = read_transactions(store_path, start=pd.Timestamp('2024-02-01'), end=pd.Timestamp('2024-03-01'))
+    assert list(february_transactions['step']) == [3, 1], "Les transactions de la période sont incorrectes"
+
+    # Les soldes calculés sur l'entrepôt sont identiques à ceux du fichier unique, avec les deux moteurs
+    single_file = str(tmp_path / "transactions_single.parquet")
+    transactions.to_parquet(single_file, index=False)
+    for backend in ['pandas', 'dask']:
+        pd.testing.assert_frame_equal(
+            aggregate_transactions(store_path, backend=backend),
+            aggregate_transactions(single_file, backend=backend)
+        )
+
+    print("Tous les tests ont réussi !")
+
+# Exécuter les tests
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_transactions_store(pathlib.Path(tempfile.mkdtemp()))